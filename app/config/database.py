@@ -1,14 +1,144 @@
 from sqlmodel import SQLModel, create_engine, Session
-from typing import Generator
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from typing import AsyncGenerator, Generator, Optional
 import os
 
+from app.monitoring.sql import instrument_engine
+from app.monitoring.slow_queries import slow_query_log
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./seguridad_vial.db")
-engine = create_engine(DATABASE_URL, echo=True, connect_args={"check_same_thread": False})
+# El esquema se crea y actualiza con `python migrate_db.py`, una vez por despliegue. Activarlo
+# vuelve a ejecutar create_all al arrancar cada worker (cómodo en desarrollo, lento al escalar).
+DB_CREATE_TABLES_ON_STARTUP = _env_bool("DB_CREATE_TABLES_ON_STARTUP", False)
+
+# Drivers asíncronos equivalentes a cada backend síncrono
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+
+def to_async_url(database_url: str) -> str:
+    """Convierte una URL síncrona (p. ej. sqlite:///x.db) a su variante asíncrona (sqlite+aiosqlite:///x.db)."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if url.drivername != backend or backend not in ASYNC_DRIVERS:
+        return database_url
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# Registro de sentencias SQL: "off" (por defecto), "info" (cada sentencia) o "debug" (sentencias y filas)
+DB_LOG_LEVEL = os.getenv("DB_LOG_LEVEL", "off").strip().lower()
+
+# Pool de conexiones
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", False)
+
+# Perfil de SQLite: PRAGMAs que se aplican a cada conexión nueva
+SQLITE_TUNING = _env_bool("SQLITE_TUNING", True)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negativo = KiB (64 MiB)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def _echo_option(level: str):
+    return {"info": True, "debug": "debug"}.get(level, False)
+
+
+def engine_options(database_url: str) -> dict:
+    """
+    Arma los argumentos de create_engine según la URL y la configuración del entorno.
+    Las bases SQLite en memoria usan un pool de una sola conexión, por lo que no reciben
+    los parámetros de tamaño del pool.
+    """
+    url = make_url(database_url)
+    options = {"echo": _echo_option(DB_LOG_LEVEL), "pool_pre_ping": DB_POOL_PRE_PING}
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            return options
+    if url.get_driver_name() == "aiosqlite":
+        # aiosqlite usa NullPool por defecto: cada sesión abriría un archivo y un hilo nuevos
+        options["poolclass"] = AsyncAdaptedQueuePool
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Aplica el perfil de SQLite a cada conexión nueva del pool.
+    WAL permite que los lectores no esperen a un escritor; synchronous=NORMAL es seguro con WAL
+    y evita un fsync por commit; mmap y cache_size reducen lecturas del disco.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    finally:
+        cursor.close()
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+if engine.dialect.name == "sqlite" and SQLITE_TUNING:
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+instrument_engine(engine)
+if slow_query_log is not None:
+    slow_query_log.attach(engine)
+
+_async_engine: Optional[AsyncEngine] = None
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Devuelve el motor asíncrono, creándolo en el primer uso para que el driver
+    asíncrono (aiosqlite, asyncpg) solo se importe si se usan los endpoints asíncronos.
+    """
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+        if _async_engine.dialect.name == "sqlite" and SQLITE_TUNING:
+            event.listen(_async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+        instrument_engine(_async_engine.sync_engine)
+        if slow_query_log is not None:
+            slow_query_log.attach(_async_engine.sync_engine)
+    return _async_engine
+
+async def dispose_async_engine():
+    """Cierra las conexiones del motor asíncrono (sus hilos de aiosqlite impedirían terminar el proceso)."""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
 
 def get_session() -> Generator[Session, None, None]:
     with Session(engine) as session:
         yield session
 
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """Dependencia equivalente a get_session para los endpoints que corren en el event loop."""
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
+
 def create_db_and_tables():
     """Importa los modelos localmente para evitar importaciones circulares"""
     # Importa todos los modelos aquí para que SQLModel.metadata los registre
@@ -18,5 +148,10 @@ def create_db_and_tables():
     from app.models.judge import Judge
     from app.models.course_enrollment import CourseEnrollment
     from app.models.user import User
-    
+    from app.models.data_import import ImportCheckpoint
+    from app.models.token_revocation import UserTokenRevocation
+    from app.models.catalog_version import CatalogVersion
+    from app.models.enrollment_stats import EnrollmentCounter
+    from app.models.expiry_sweep import ExpirySweepWatermark
+
     SQLModel.metadata.create_all(engine)
@@ -0,0 +1,124 @@
+# app/config/migrations.py
+
+from typing import List
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import AddConstraint, CreateColumn
+from sqlmodel import SQLModel
+
+from app.models.person import create_person_search_index
+
+
+def _load_models():
+    """Importa los modelos para que SQLModel.metadata tenga todas las tablas registradas."""
+    import app.models  # noqa: F401
+
+
+def _declared_foreign_key(fk) -> tuple:
+    return (
+        tuple(column.name for column in fk.columns),
+        fk.referred_table.name,
+        tuple(element.column.name for element in fk.elements),
+    )
+
+
+def _existing_foreign_key(fk: dict) -> tuple:
+    return tuple(fk["constrained_columns"]), fk["referred_table"], tuple(fk["referred_columns"])
+
+
+def _missing_foreign_keys(table, existing_fks: List[dict]) -> list:
+    existing = {_existing_foreign_key(fk) for fk in existing_fks}
+    return [fk for fk in table.foreign_key_constraints if _declared_foreign_key(fk) not in existing]
+
+
+def _stale_foreign_keys(table, existing_fks: List[dict]) -> List[dict]:
+    """Claves foráneas de la base que el modelo ya no declara (p. ej. inspector_id hacia inspector en lugar de user)."""
+    declared = {_declared_foreign_key(fk) for fk in table.foreign_key_constraints}
+    return [fk for fk in existing_fks if _existing_foreign_key(fk) not in declared]
+
+
+def _rebuild_sqlite_table(connection, table, existing_columns: List[str], existing_indexes: List[str]):
+    """
+    SQLite no permite agregar FOREIGN KEY a una tabla existente: se recrea la tabla con el
+    esquema actual y se copian los datos (procedimiento recomendado por la documentación de SQLite).
+    Los índices viejos se eliminan antes y se recrean junto con la tabla nueva.
+    """
+    old_name = f"_{table.name}_old"
+    for index_name in existing_indexes:
+        connection.exec_driver_sql(f'DROP INDEX IF EXISTS "{index_name}"')
+    columns = ", ".join(f'"{column.name}"' for column in table.columns if column.name in existing_columns)
+    connection.exec_driver_sql(f'ALTER TABLE "{table.name}" RENAME TO "{old_name}"')
+    table.create(connection)
+    connection.exec_driver_sql(f'INSERT INTO "{table.name}" ({columns}) SELECT {columns} FROM "{old_name}"')
+    connection.exec_driver_sql(f'DROP TABLE "{old_name}"')
+
+
+def upgrade_schema(engine: Engine) -> List[str]:
+    """
+    Lleva una base de datos existente al esquema declarado en los modelos:
+    crea las tablas que falten, agrega columnas nuevas (si admiten NULL o tienen valor por defecto),
+    agrega las claves foráneas y crea los índices que falten.
+    Es idempotente; devuelve la lista de cambios aplicados.
+    """
+    _load_models()
+    SQLModel.metadata.create_all(engine)
+    actions = []
+
+    is_sqlite = engine.dialect.name == "sqlite"
+    with engine.connect() as connection:
+        if is_sqlite:
+            # Debe desactivarse fuera de una transacción para poder recrear tablas referenciadas
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            connection.commit()
+
+        with connection.begin():
+            inspector = inspect(connection)
+            for table in SQLModel.metadata.sorted_tables:
+                existing_columns = [column["name"] for column in inspector.get_columns(table.name)]
+                existing_fks = inspector.get_foreign_keys(table.name)
+                missing_fks = _missing_foreign_keys(table, existing_fks)
+                stale_fks = _stale_foreign_keys(table, existing_fks)
+
+                if (missing_fks or stale_fks) and is_sqlite:
+                    existing_indexes = [index["name"] for index in inspector.get_indexes(table.name)]
+                    _rebuild_sqlite_table(connection, table, existing_columns, existing_indexes)
+                    actions.append(f"rebuilt table {table.name} with foreign keys")
+                    existing_columns = [column.name for column in table.columns]
+                    missing_fks = stale_fks = []
+
+                for fk in stale_fks:
+                    if fk.get("name"):
+                        connection.exec_driver_sql(f'ALTER TABLE "{table.name}" DROP CONSTRAINT "{fk["name"]}"')
+                        actions.append(f"dropped foreign key {table.name}({', '.join(fk['constrained_columns'])})")
+
+                for column in table.columns:
+                    if column.name in existing_columns:
+                        continue
+                    if not column.nullable and column.server_default is None:
+                        actions.append(f"skipped column {table.name}.{column.name}: NOT NULL without server default")
+                        continue
+                    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {ddl}')
+                    actions.append(f"added column {table.name}.{column.name}")
+
+                for fk in missing_fks:
+                    connection.execute(AddConstraint(fk))
+                    actions.append(f"added foreign key {table.name}({', '.join(c.name for c in fk.columns)})")
+
+                existing_indexes = {index["name"] for index in inspect(connection).get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name not in existing_indexes:
+                        index.create(connection)
+                        actions.append(f"created index {index.name}")
+
+        with connection.begin():
+            if create_person_search_index(connection):
+                actions.append("created full-text index person_fts")
+
+        if is_sqlite:
+            # Actualiza las estadísticas que usa el planificador para elegir índices
+            connection.exec_driver_sql("ANALYZE")
+            connection.commit()
+
+    return actions
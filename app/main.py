@@ -1,7 +1,8 @@
 from fastapi import FastAPI, HTTPException, status, Depends
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.security import OAuth2PasswordBearer
-from sqlmodel import Session, select
-from app.config.database import create_db_and_tables, engine, get_session, Session as DBSession
+from sqlmodel import select
+from app.config.database import DB_CREATE_TABLES_ON_STARTUP, create_db_and_tables, dispose_async_engine, engine, get_session, Session as DBSession
 
 from app.routers.person_router import router as person_router
 from app.routers.traffic_safety_course_router import router as course_router
@@ -9,10 +10,17 @@ from app.routers.course_enrollment_router import router as enrollment_router
 from app.routers.inspector_router import router as inspector_router
 from app.routers.judge_router import router as judge_router
 from app.routers.user_router import router as user_router
+from app.routers.monitoring_router import router as monitoring_router
 
 from importlib.metadata import version as get_package_version
-from app.security.security import decode_access_token
-from app.services.user_service import get_user_by_username
+import asyncio
+from app.monitoring import metrics
+from app.monitoring.middleware import MetricsMiddleware
+from app.monitoring.sql import SQL_DEBUG_HEADERS
+from app.monitoring.slow_queries import SLOW_QUERY_LOG_ENABLED
+from app.security.password_hashing import password_hasher
+from app.security import security, token_revocation
+from app.services import expiry_sweep_service, write_queue
 
 
 API_VERSION = "1.0.0"
@@ -21,15 +29,81 @@ app = FastAPI(
     title="API de Gestión de Cursos de Seguridad Vial",
     description="API para gestionar personas, cursos, inspectores, jueces e inscripciones de seguridad vial, con transformación de negocio y desnormalización de datos.",
     version=API_VERSION,
+    default_response_class=ORJSONResponse,
 )
 
+# El middleware también identifica el endpoint de cada consulta lenta
+if metrics.METRICS_ENABLED or SQL_DEBUG_HEADERS or SLOW_QUERY_LOG_ENABLED:
+    app.add_middleware(MetricsMiddleware, sql_debug_headers=SQL_DEBUG_HEADERS)
+
 @app.on_event("startup")
 def on_startup():
     """
     Función que se ejecuta al inicio de la aplicación.
-    Crea las tablas de la base de datos si no existen.
+    Solo crea las tablas si DB_CREATE_TABLES_ON_STARTUP está activo; normalmente el esquema
+    se crea una vez con `python migrate_db.py` y los workers arrancan sin tocar la base.
+    """
+    if DB_CREATE_TABLES_ON_STARTUP:
+        create_db_and_tables()
+
+@app.on_event("startup")
+async def preload_security_backends():
+    """
+    Carga passlib y jose en un hilo después de arrancar, para que el primer login no pague
+    su importación y el worker acepte requests sin esperarla.
+    """
+    app.state.security_preload = asyncio.get_running_loop().run_in_executor(None, security.load_backends)
+
+@app.on_event("startup")
+async def start_metrics_publisher():
+    """
+    Con varios workers, cada uno publica periódicamente sus métricas en METRICS_MULTIPROC_DIR
+    para que /metrics las sume sin importar qué worker atienda el scrape.
+    """
+    if metrics.METRICS_ENABLED and metrics.METRICS_MULTIPROC_DIR:
+        app.state.metrics_publisher = asyncio.create_task(
+            metrics.publish_periodically(metrics.registry, metrics.METRICS_MULTIPROC_DIR)
+        )
+
+@app.on_event("startup")
+async def start_token_denylist_sync():
     """
-    create_db_and_tables()
+    En modo sin estado (AUTH_STATELESS), cada worker relee periódicamente las revocaciones
+    de tokens para ver las hechas por los demás workers.
+    """
+    if token_revocation.AUTH_STATELESS:
+        app.state.denylist_sync = asyncio.create_task(token_revocation.sync_periodically(engine))
+
+@app.on_event("startup")
+async def start_expiry_sweeper():
+    """
+    Con EXPIRY_SWEEP_INTERVAL_SECONDS > 0, la API pasa periódicamente a incomplete/expired las
+    inscripciones vencidas. Si no, se ejecuta `sweep_expired_enrollments.py` (p. ej. desde cron).
+    """
+    if expiry_sweep_service.EXPIRY_SWEEP_INTERVAL_SECONDS > 0:
+        app.state.expiry_sweeper = asyncio.create_task(
+            expiry_sweep_service.sweep_periodically(engine, expiry_sweep_service.EXPIRY_SWEEP_INTERVAL_SECONDS)
+        )
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """
+    Función que se ejecuta al detener la aplicación.
+    Libera las conexiones del motor asíncrono, confirma las escrituras encoladas, detiene el pool
+    de hashing de contraseñas, la sincronización de revocaciones y el barrido de vencimientos,
+    y publica las métricas finales del worker.
+    """
+    await dispose_async_engine()
+    password_hasher.shutdown()
+    await asyncio.to_thread(write_queue.close_all)
+    for task_name in ("denylist_sync", "expiry_sweeper"):
+        task = getattr(app.state, task_name, None)
+        if task is not None:
+            task.cancel()
+    publisher = getattr(app.state, "metrics_publisher", None)
+    if publisher is not None:
+        publisher.cancel()
+        metrics.write_worker_snapshot(metrics.METRICS_MULTIPROC_DIR, metrics.registry.snapshot())
 
 app.include_router(person_router)
 app.include_router(course_router)
@@ -37,6 +111,7 @@ app.include_router(enrollment_router)
 app.include_router(inspector_router)
 app.include_router(judge_router)
 app.include_router(user_router)
+app.include_router(monitoring_router)
 
 @app.get("/")
 def root():
@@ -59,6 +134,20 @@ def healthcheck(session: DBSession = Depends(get_session)):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database connection failed: {e}")
 
 
+@app.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Métricas en formato de texto de Prometheus: latencia por ruta, método y estado,
+    tiempo de base de datos por request y requests en curso, sumadas entre todos los workers.
+    """
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metrics are disabled")
+    return PlainTextResponse(
+        metrics.registry.collect(metrics.METRICS_MULTIPROC_DIR),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.get("/version", summary="Muestra la versión de la API")
 def get_api_version():
     """
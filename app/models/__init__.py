@@ -1,17 +1,34 @@
 # app/models/__init__.py
 
-from .person import Person, PersonCreate, PersonRead, PersonUpdate
+from .person import Person, PersonCreate, PersonRead, PersonUpdate, PersonSearchResult
 from .traffic_safety_course import TrafficSafetyCourse, TrafficSafetyCourseCreate, TrafficSafetyCourseRead, TrafficSafetyCourseUpdate
 from .inspector import Inspector, InspectorCreate, InspectorRead, InspectorUpdate
 from .judge import Judge, JudgeCreate, JudgeRead, JudgeUpdate
-from .course_enrollment import CourseEnrollment, CourseEnrollmentStatus, CourseEnrollmentCreate, CourseEnrollmentRead, CourseEnrollmentUpdate
-from .user import User, UserRole, UserCreate, UserRead, UserUpdate
+from .course_enrollment import CourseEnrollment, CourseEnrollmentStatus, CourseEnrollmentCreate, CourseEnrollmentRead, CourseEnrollmentUpdate, CourseEnrollmentOrder, CourseEnrollmentFilter, CourseEnrollmentPage, CourseEnrollmentExportFormat, CourseEnrollmentReportItem, CourseEnrollmentReportPage, CourseEnrollmentBatchRequest, CourseEnrollmentBatchOutcome, CourseEnrollmentBatchItem, CourseEnrollmentBatchResult
+from .user import User, UserRole, UserCreate, UserRead, UserSummary, UserUpdate
+from .bulk import BulkItemResult, BulkCreateResult
+from .data_import import ImportKind, ImportFileFormat, ImportCheckpoint
+from .monitoring import SlowQueryEntry
+from .token_revocation import UserTokenRevocation
+from .catalog_version import CatalogVersion
+from .enrollment_stats import EnrollmentCounter, EnrollmentCourseCount, EnrollmentStatusCourseCount, EnrollmentStats
+from .expiry_sweep import ExpirySweepWatermark
 
 __all__ = [
-    "Person", "PersonCreate", "PersonRead", "PersonUpdate",
+    "Person", "PersonCreate", "PersonRead", "PersonUpdate", "PersonSearchResult",
     "TrafficSafetyCourse", "TrafficSafetyCourseCreate", "TrafficSafetyCourseRead", "TrafficSafetyCourseUpdate",
     "Inspector", "InspectorCreate", "InspectorRead", "InspectorUpdate",
     "Judge", "JudgeCreate", "JudgeRead", "JudgeUpdate",
     "CourseEnrollment", "CourseEnrollmentStatus", "CourseEnrollmentCreate", "CourseEnrollmentRead", "CourseEnrollmentUpdate",
-    "User", "UserRole", "UserCreate", "UserRead", "UserUpdate",
+    "CourseEnrollmentOrder", "CourseEnrollmentFilter", "CourseEnrollmentPage", "CourseEnrollmentExportFormat",
+    "CourseEnrollmentReportItem", "CourseEnrollmentReportPage",
+    "CourseEnrollmentBatchRequest", "CourseEnrollmentBatchOutcome", "CourseEnrollmentBatchItem", "CourseEnrollmentBatchResult",
+    "User", "UserRole", "UserCreate", "UserRead", "UserSummary", "UserUpdate",
+    "BulkItemResult", "BulkCreateResult",
+    "ImportKind", "ImportFileFormat", "ImportCheckpoint",
+    "SlowQueryEntry",
+    "UserTokenRevocation",
+    "CatalogVersion",
+    "EnrollmentCounter", "EnrollmentCourseCount", "EnrollmentStatusCourseCount", "EnrollmentStats",
+    "ExpirySweepWatermark",
 ]
@@ -0,0 +1,15 @@
+# app/models/bulk.py
+from __future__ import annotations
+
+from sqlmodel import SQLModel
+from typing import Optional, List
+
+class BulkItemResult(SQLModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkCreateResult(SQLModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
@@ -0,0 +1,14 @@
+# app/models/catalog_version.py
+from __future__ import annotations
+
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+
+class CatalogVersion(SQLModel, table=True):
+    """
+    Versión de cada catálogo (courses, inspectors, judges). Se incrementa en la misma
+    transacción que cada alta, modificación o baja, y se usa como ETag de su listado.
+    """
+    name: str = Field(primary_key=True, max_length=32)
+    version: int = 0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -5,13 +5,13 @@ from sqlmodel import SQLModel, Field
 from typing import Optional, List
 from datetime import date
 from enum import Enum
+from sqlalchemy import Index
 # from sqlalchemy.orm import Mapped
 
 # Importar los esquemas de lectura para las relaciones anidadas en el esquema CourseEnrollmentRead
 from app.models.person import PersonRead
 from app.models.traffic_safety_course import TrafficSafetyCourseRead
-from app.models.inspector import InspectorRead
-from app.models.judge import JudgeRead
+from app.models.user import UserSummary
 
 class CourseEnrollmentStatus(str, Enum):
     PENDING = "pending"
@@ -21,25 +21,87 @@ class CourseEnrollmentStatus(str, Enum):
     INCOMPLETE = "incomplete"
 
 class CourseEnrollmentBase(SQLModel):
-    person_id: int
-    course_id: int
+    person_id: int = Field(foreign_key="person.id", index=True)
+    course_id: int = Field(foreign_key="trafficsafetycourse.id", index=True)
     enrollment_date: date = Field(default_factory=date.today)
     completion_date: Optional[date] = None
     deadline_date: date
-    expiration_date: date
-    status: CourseEnrollmentStatus = Field(default=CourseEnrollmentStatus.PENDING)
-    inspector_id: Optional[int] = None
-    judge_id: Optional[int] = None
+    expiration_date: date = Field(index=True)
+    status: CourseEnrollmentStatus = Field(default=CourseEnrollmentStatus.PENDING, index=True)
+    # Usuarios (rol inspector y juez) que completaron y usaron la inscripción
+    inspector_id: Optional[int] = Field(default=None, foreign_key="user.id", index=True)
+    judge_id: Optional[int] = Field(default=None, foreign_key="user.id", index=True)
 
 class CourseEnrollmentCreate(CourseEnrollmentBase):
     pass
 
 class CourseEnrollmentRead(CourseEnrollmentBase):
     id: int
+    version: int = 1
     person: Optional[PersonRead] = None
     course: Optional[TrafficSafetyCourseRead] = None
-    inspector: Optional[InspectorRead] = None
-    judge: Optional[JudgeRead] = None
+    inspector: Optional[UserSummary] = None
+    judge: Optional[UserSummary] = None
+
+class CourseEnrollmentOrder(str, Enum):
+    ID = "id"
+    EXPIRATION_DATE = "expiration_date"
+
+class CourseEnrollmentExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class CourseEnrollmentFilter(SQLModel):
+    status: Optional[CourseEnrollmentStatus] = None
+    course_id: Optional[int] = None
+    person_id: Optional[int] = None
+    inspector_id: Optional[int] = None
+    judge_id: Optional[int] = None
+    enrollment_date_from: Optional[date] = None
+    enrollment_date_to: Optional[date] = None
+    expiration_date_from: Optional[date] = None
+    expiration_date_to: Optional[date] = None
+
+class CourseEnrollmentPage(SQLModel):
+    items: List[CourseEnrollmentRead]
+    next_cursor: Optional[str] = None
+
+class CourseEnrollmentReportItem(SQLModel):
+    id: int
+    enrollment_date: date
+    completion_date: Optional[date] = None
+    deadline_date: date
+    expiration_date: date
+    status: CourseEnrollmentStatus
+    person: Optional[PersonRead] = None
+    course: Optional[TrafficSafetyCourseRead] = None
+    days_until_expiration: int
+    is_expired: bool
+
+class CourseEnrollmentReportPage(SQLModel):
+    items: List[CourseEnrollmentReportItem]
+    next_cursor: Optional[str] = None
+
+class CourseEnrollmentBatchRequest(SQLModel):
+    ids: List[int]
+
+class CourseEnrollmentBatchOutcome(str, Enum):
+    TRANSITIONED = "transitioned"
+    WRONG_STATE = "wrong_state"
+    NOT_FOUND = "not_found"
+
+class CourseEnrollmentBatchItem(SQLModel):
+    id: int
+    outcome: CourseEnrollmentBatchOutcome
+    # Estado y versión después del lote (None si la inscripción no existe)
+    status: Optional[CourseEnrollmentStatus] = None
+    version: Optional[int] = None
+
+class CourseEnrollmentBatchResult(SQLModel):
+    transitioned: int
+    wrong_state: int
+    not_found: int
+    results: List[CourseEnrollmentBatchItem]
 
 class CourseEnrollmentUpdate(SQLModel):
     completion_date: Optional[date] = None
@@ -50,7 +112,16 @@ class CourseEnrollmentUpdate(SQLModel):
     expiration_date: Optional[date] = None
 
 class CourseEnrollment(CourseEnrollmentBase, table=True):
+    # Índices compuestos para los filtros por estado ordenados o acotados por vencimiento,
+    # y para que el barrido de vencimientos encuentre las inscripciones pending con plazo vencido
+    __table_args__ = (
+        Index("ix_courseenrollment_status_expiration_date", "status", "expiration_date"),
+        Index("ix_courseenrollment_status_deadline_date", "status", "deadline_date"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Versión de la fila: cada modificación la incrementa; se expone como ETag para usar con If-Match
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
 
     # RELACIONES TEMPORALMENTE ELIMINADAS
     # person: Mapped["Person"] = Relationship(back_populates="course_enrollments")
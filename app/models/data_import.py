@@ -0,0 +1,29 @@
+# app/models/data_import.py
+from __future__ import annotations
+
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+from enum import Enum
+
+class ImportKind(str, Enum):
+    PERSONS = "persons"
+    COURSES = "courses"
+    ENROLLMENTS = "enrollments"
+
+class ImportFileFormat(str, Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
+
+class ImportCheckpoint(SQLModel, table=True):
+    """
+    Avance de una importación masiva. Se actualiza en la misma transacción que cada lote,
+    así que al reanudar se continúa exactamente después del último lote confirmado.
+    """
+    source: str = Field(primary_key=True)  # "<tipo>:<ruta absoluta del archivo>"
+    kind: ImportKind
+    rows_done: int = 0
+    inserted: int = 0
+    failed: int = 0
+    finished: bool = False
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,32 @@
+# app/models/enrollment_stats.py
+from __future__ import annotations
+
+from sqlmodel import SQLModel, Field
+from typing import Dict, List
+
+from app.models.course_enrollment import CourseEnrollmentStatus
+
+class EnrollmentCounter(SQLModel, table=True):
+    """
+    Cantidad de inscripciones de un curso en un estado. Se actualiza en la misma transacción que
+    cada alta, cambio de estado o de curso y baja de una inscripción; `rebuild_enrollment_stats.py`
+    la recalcula desde courseenrollment si se desincroniza.
+    """
+    course_id: int = Field(primary_key=True)
+    status: CourseEnrollmentStatus = Field(primary_key=True)
+    count: int = 0
+
+class EnrollmentCourseCount(SQLModel):
+    course_id: int
+    count: int
+
+class EnrollmentStatusCourseCount(SQLModel):
+    course_id: int
+    status: CourseEnrollmentStatus
+    count: int
+
+class EnrollmentStats(SQLModel):
+    total: int
+    by_status: Dict[CourseEnrollmentStatus, int]
+    by_course: List[EnrollmentCourseCount]
+    by_status_course: List[EnrollmentStatusCourseCount]
@@ -0,0 +1,14 @@
+# app/models/expiry_sweep.py
+from __future__ import annotations
+
+from datetime import date, datetime
+from sqlmodel import SQLModel, Field
+
+class ExpirySweepWatermark(SQLModel, table=True):
+    """
+    Hasta qué fecha (inclusive) barrió cada regla de vencimiento. La corrida siguiente solo
+    busca inscripciones con fecha posterior, es decir, las que vencieron desde entonces.
+    """
+    rule: str = Field(primary_key=True, max_length=32)
+    swept_through: date
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
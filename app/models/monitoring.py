@@ -0,0 +1,14 @@
+# app/models/monitoring.py
+from __future__ import annotations
+
+from sqlmodel import SQLModel
+from typing import Optional, List
+
+class SlowQueryEntry(SQLModel):
+    timestamp: str
+    duration_ms: float
+    route: Optional[str] = None
+    statement: str
+    plan: List[str] = []
+    table_scans: List[str] = []
+    explain_error: Optional[str] = None
@@ -2,12 +2,13 @@
 from __future__ import annotations
 
 from sqlmodel import SQLModel, Field
+from sqlalchemy import event
 from typing import Optional, List
 # from sqlalchemy.orm import Mapped # No necesitamos Mapped si no hay Relationship
 
 class PersonBase(SQLModel):
     name: str
-    dni: str
+    dni: str = Field(index=True)
 
 class PersonCreate(PersonBase):
     pass
@@ -15,6 +16,10 @@ class PersonCreate(PersonBase):
 class PersonRead(PersonBase):
     id: int
 
+class PersonSearchResult(PersonRead):
+    # "dni_exact", "dni_prefix" o "name"
+    match: str
+
 class PersonUpdate(SQLModel):
     name: Optional[str] = None
     dni: Optional[str] = None
@@ -24,3 +29,41 @@ class Person(PersonBase, table=True):
 
     # RELACIÓN TEMPORALMENTE ELIMINADA
     # course_enrollments: Mapped[List["CourseEnrollment"]] = Relationship(back_populates="person")
+
+
+# Índice de texto completo de los nombres para /persons/search (SQLite FTS5). Es una tabla de
+# contenido externo: guarda solo el índice y lee los nombres de `person`. Los triggers la
+# actualizan en la misma transacción que cualquier alta, cambio o baja (ORM, altas masivas o
+# importación). unicode61 con remove_diacritics pasa a minúsculas y quita los acentos, tanto de
+# los nombres como de las búsquedas; `prefix` precalcula los prefijos de 2 y 3 letras.
+PERSON_FTS_TABLE = "person_fts"
+PERSON_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {PERSON_FTS_TABLE} USING fts5("
+    "name, content='person', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {PERSON_FTS_TABLE}_ai AFTER INSERT ON person BEGIN "
+    f"INSERT INTO {PERSON_FTS_TABLE}(rowid, name) VALUES (new.id, new.name); END",
+    f"CREATE TRIGGER IF NOT EXISTS {PERSON_FTS_TABLE}_ad AFTER DELETE ON person BEGIN "
+    f"INSERT INTO {PERSON_FTS_TABLE}({PERSON_FTS_TABLE}, rowid, name) VALUES ('delete', old.id, old.name); END",
+    f"CREATE TRIGGER IF NOT EXISTS {PERSON_FTS_TABLE}_au AFTER UPDATE OF name ON person BEGIN "
+    f"INSERT INTO {PERSON_FTS_TABLE}({PERSON_FTS_TABLE}, rowid, name) VALUES ('delete', old.id, old.name); "
+    f"INSERT INTO {PERSON_FTS_TABLE}(rowid, name) VALUES (new.id, new.name); END",
+)
+
+def create_person_search_index(connection) -> bool:
+    """
+    Crea el índice de texto completo y sus triggers si no existen (solo SQLite) y, al crearlo,
+    indexa las personas existentes. Devuelve True si lo creó.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+    exists = connection.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (PERSON_FTS_TABLE,)).first()
+    for ddl in PERSON_FTS_DDL:
+        connection.exec_driver_sql(ddl)
+    if exists:
+        return False
+    connection.exec_driver_sql(f"INSERT INTO {PERSON_FTS_TABLE}({PERSON_FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+@event.listens_for(Person.__table__, "after_create")
+def _create_person_search_index(target, connection, **kw):
+    create_person_search_index(connection)
@@ -0,0 +1,12 @@
+# app/models/token_revocation.py
+from __future__ import annotations
+
+from sqlmodel import SQLModel, Field
+
+class UserTokenRevocation(SQLModel, table=True):
+    """
+    Momento a partir del cual se revocan los tokens emitidos a un usuario (modificado o eliminado).
+    Una fila por usuario; los workers la leen periódicamente para sincronizar su deny-list.
+    """
+    user_id: int = Field(primary_key=True)
+    revoked_at: float = Field(index=True)
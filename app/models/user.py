@@ -3,11 +3,8 @@ from __future__ import annotations
 
 from sqlmodel import SQLModel, Field
 from enum import Enum
-from passlib.context import CryptContext
 from typing import Optional
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 class UserRole(str, Enum):
     NORMAL = "normal"
     INSPECTOR = "inspector"
@@ -15,7 +12,7 @@ class UserRole(str, Enum):
     ADMIN = "admin"
 
 class UserBase(SQLModel):
-    username: str
+    username: str = Field(index=True, unique=True)
     dni: str
     nombres: str
     apellidos: str
@@ -28,6 +25,12 @@ class UserCreate(UserBase):
 class UserRead(UserBase):
     id: int
 
+class UserSummary(SQLModel):
+    """Datos de un usuario que se embeben en otras respuestas (p. ej. el inspector de una inscripción), sin DNI ni credenciales."""
+    id: int
+    nombres: str
+    apellidos: str
+
 class UserUpdate(SQLModel):
     username: Optional[str] = None
     password: Optional[str] = None
@@ -0,0 +1,311 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuración de las métricas
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+# Directorio compartido por los workers de uvicorn/gunicorn; cada uno publica allí sus métricas
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histogram:
+    """
+    Histograma con etiquetas. Cada serie es una lista con la cuenta de cada bucket (no acumulada),
+    la del bucket +Inf y la suma de los valores, para que registrar una observación sea
+    una búsqueda binaria y dos sumas.
+    Con `threaded=True` cada observación y cada copia de las series toman un lock (ver MetricsRegistry).
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float], threaded: bool = False):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+        self.lock: Optional[threading.Lock] = threading.Lock() if threaded else None
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        if self.lock is None:
+            self._observe(labels, value)
+        else:
+            with self.lock:
+                self._observe(labels, value)
+
+    def _observe(self, labels: Tuple[str, ...], value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series.setdefault(labels, [0] * (len(self.buckets) + 2))
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def merge(self, series: List[float], other: List[float]) -> List[float]:
+        return [a + b for a, b in zip(series, other)]
+
+    def render(self, labels: Tuple[str, ...], series: List[float]) -> Iterable[str]:
+        pairs = list(zip(self.labelnames, labels))
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), series):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f"{self.name}_bucket{_labels(pairs + [('le', le)])} {cumulative}"
+        yield f"{self.name}_sum{_labels(pairs)} {series[-1]}"
+        yield f"{self.name}_count{_labels(pairs)} {cumulative}"
+
+
+class Gauge:
+    """
+    Valor con etiquetas que sube y baja (por ejemplo, requests en curso).
+    Con `threaded=True`, `inc`, `dec` y `set` toman un lock; `labels()` devuelve la serie sin lock,
+    para modificarla solo desde el event loop.
+    """
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), threaded: bool = False):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+        self.lock: Optional[threading.Lock] = threading.Lock() if threaded else None
+
+    def labels(self, labels: Tuple[str, ...] = ()) -> List[float]:
+        """Serie de `labels` (lista de un elemento), para modificarla sin volver a buscarla."""
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series.setdefault(labels, [0])
+        return series
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1):
+        if self.lock is None:
+            self.labels(labels)[0] += amount
+        else:
+            with self.lock:
+                self.labels(labels)[0] += amount
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+    def set(self, labels: Tuple[str, ...], value: float):
+        if self.lock is None:
+            self.series[labels] = [value]
+        else:
+            with self.lock:
+                self.series[labels] = [value]
+
+    def merge(self, series: List[float], other: List[float]) -> List[float]:
+        return [series[0] + other[0]]
+
+    def render(self, labels: Tuple[str, ...], series: List[float]) -> Iterable[str]:
+        yield f"{self.name}{_labels(list(zip(self.labelnames, labels)))} {series[0]}"
+
+
+class Counter(Gauge):
+    """Valor con etiquetas que solo crece. A diferencia de los gauges, se conserva el de los workers terminados."""
+    type = "counter"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: List[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """
+    Conjunto de métricas del proceso.
+    Las de los requests se registran solo desde el event loop (middleware), por lo que no usan
+    locks. Las que se registran desde otros hilos (pool de hashing, escritor de la cola de
+    escrituras, barrido de vencimientos) se declaran con `threaded=True`: cada registro y la
+    copia de sus series en `snapshot()` toman el lock de la métrica.
+    Con varios workers, cada uno publica su `snapshot()` en METRICS_MULTIPROC_DIR y /metrics
+    suma los de todos: histogramas y contadores de todos los procesos y gauges solo de los que siguen vivos.
+    """
+
+    def __init__(self, metrics: Sequence = ()):
+        self.metrics = {metric.name: metric for metric in metrics}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, list]:
+        return {name: self._copy_series(metric) for name, metric in self.metrics.items()}
+
+    @staticmethod
+    def _copy_series(metric) -> list:
+        if metric.lock is None:
+            return [[list(labels), list(series)] for labels, series in list(metric.series.items())]
+        with metric.lock:
+            return [[list(labels), list(series)] for labels, series in metric.series.items()]
+
+    def merge(self, snapshots: Iterable[Tuple[Dict[str, list], bool]]) -> Dict[str, Dict[tuple, list]]:
+        """Suma snapshots (snapshot, proceso_vivo); descarta los gauges de procesos terminados."""
+        merged: Dict[str, Dict[tuple, list]] = {name: {} for name in self.metrics}
+        for snapshot, alive in snapshots:
+            for name, series_list in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None or (metric.type == "gauge" and not alive):
+                    continue
+                target = merged[name]
+                for labels, series in series_list:
+                    labels = tuple(labels)
+                    target[labels] = metric.merge(target[labels], series) if labels in target else list(series)
+        return merged
+
+    def render(self, merged: Dict[str, Dict[tuple, list]]) -> str:
+        """Formato de texto de Prometheus (versión 0.0.4)."""
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for labels, series in sorted(merged.get(name, {}).items()):
+                lines.extend(metric.render(labels, series))
+        return "\n".join(lines) + "\n"
+
+    def collect(self, directory: Optional[str] = None) -> str:
+        """Devuelve las métricas de este proceso sumadas a las publicadas por los demás workers."""
+        snapshots = [(self.snapshot(), True)]
+        if directory:
+            snapshots.extend(read_worker_snapshots(directory, exclude_pid=os.getpid()))
+        return self.render(self.merge(snapshots))
+
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"metrics-{pid}.json")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def write_worker_snapshot(directory: str, snapshot: Dict[str, list], pid: Optional[int] = None):
+    """Publica el snapshot del proceso de forma atómica (archivo temporal + rename)."""
+    path = _snapshot_path(directory, pid or os.getpid())
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(snapshot, file, separators=(",", ":"))
+    os.replace(temporary, path)
+
+
+def read_worker_snapshots(directory: str, exclude_pid: Optional[int] = None) -> List[Tuple[Dict[str, list], bool]]:
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        pid = int(os.path.basename(path)[len("metrics-"):-len(".json")])
+        if pid == exclude_pid:
+            continue
+        try:
+            with open(path, encoding="utf-8") as file:
+                snapshots.append((json.load(file), _pid_alive(pid)))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+async def publish_periodically(registry: MetricsRegistry, directory: str, interval: float = METRICS_FLUSH_SECONDS):
+    """Tarea de fondo de cada worker: publica su snapshot cada `interval` segundos."""
+    os.makedirs(directory, exist_ok=True)
+    while True:
+        try:
+            await asyncio.to_thread(write_worker_snapshot, directory, registry.snapshot())
+        except Exception:
+            logger.exception("No se pudo publicar el snapshot de métricas; se reintenta en el próximo intervalo")
+        await asyncio.sleep(interval)
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Duración de los requests HTTP por método, ruta y código de estado.",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_seconds",
+    "Tiempo total de base de datos por request HTTP, por método y ruta.",
+    ("method", "route"),
+    DB_TIME_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests HTTP en curso por método y router (primer segmento de la ruta).",
+    ("method", "router"),
+)
+
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth",
+    "Operaciones de hashing de contraseñas esperando un worker del pool.",
+    threaded=True,
+)
+PASSWORD_HASH_IN_PROGRESS = Gauge(
+    "password_hash_in_progress",
+    "Operaciones de hashing de contraseñas ejecutándose en el pool.",
+    threaded=True,
+)
+PASSWORD_HASH_WAIT = Histogram(
+    "password_hash_wait_seconds",
+    "Tiempo que una operación de hashing espera en la cola del pool, por operación.",
+    ("operation",),
+    LATENCY_BUCKETS,
+    threaded=True,
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Operaciones de hashing rechazadas por tener la cola del pool llena, por operación.",
+    ("operation",),
+    threaded=True,
+)
+
+ENROLLMENT_SWEEP_TRANSITIONS = Counter(
+    "enrollment_sweep_transitions_total",
+    "Inscripciones pasadas a incomplete o expired por el barrido de vencimientos, por estado nuevo.",
+    ("status",),
+    threaded=True,
+)
+
+WRITE_QUEUE_BATCH_SIZE = Histogram(
+    "write_queue_batch_size",
+    "Operaciones confirmadas en cada COMMIT de la cola de escrituras (WRITE_QUEUE_ENABLED).",
+    (),
+    (1, 2, 4, 8, 16, 32, 64, 128),
+    threaded=True,
+)
+WRITE_QUEUE_WAIT = Histogram(
+    "write_queue_wait_seconds",
+    "Tiempo que una operación espera en la cola de escrituras hasta que el escritor la ejecuta.",
+    (),
+    DB_TIME_BUCKETS,
+    threaded=True,
+)
+
+registry = MetricsRegistry([
+    REQUEST_DURATION,
+    REQUEST_DB_DURATION,
+    REQUESTS_IN_FLIGHT,
+    PASSWORD_HASH_QUEUE_DEPTH,
+    PASSWORD_HASH_IN_PROGRESS,
+    PASSWORD_HASH_WAIT,
+    PASSWORD_HASH_REJECTED,
+    ENROLLMENT_SWEEP_TRANSITIONS,
+    WRITE_QUEUE_BATCH_SIZE,
+    WRITE_QUEUE_WAIT,
+])
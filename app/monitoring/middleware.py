@@ -0,0 +1,74 @@
+import time
+
+from app.monitoring import metrics
+from app.monitoring.sql import RequestStats, current_request_stats, debug_headers, warn_repeated_statements
+
+
+def route_label(scope: dict) -> str:
+    """
+    Plantilla de la ruta que atendió el request (p. ej. /enrollments/{enrollment_id}), para que
+    la cantidad de series no dependa de los IDs. Los requests sin ruta se agrupan en "unmatched".
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        # Rutas propias de Starlette/FastAPI (/docs, /openapi.json): su path es fijo
+        return scope["path"]
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada request HTTP: latencia por método, ruta y estado, tiempo de
+    base de datos (sumado por los eventos del motor) y requests en curso por router.
+    Registra un warning si el request repite muchas veces la misma sentencia (probable N+1) y,
+    con `sql_debug_headers`, agrega a la respuesta las cabeceras X-DB-Query-Count, X-DB-Time-Ms
+    y X-DB-N-Plus-One.
+    Es un middleware ASGI puro (sin BaseHTTPMiddleware) para que el costo por request
+    sea de pocos microsegundos.
+    """
+
+    def __init__(self, app, sql_debug_headers: bool = False):
+        self.app = app
+        self.sql_debug_headers = sql_debug_headers
+        self._routers = None
+
+    def _router_label(self, scope: dict) -> str:
+        if self._routers is None:
+            application = scope.get("app")
+            paths = [getattr(route, "path", "") for route in getattr(application, "routes", [])]
+            self._routers = {path.split("/", 2)[1] for path in paths if path.startswith("/")}
+        segment = scope["path"].split("/", 2)[1]
+        return "/" + segment if segment in self._routers else "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stats = RequestStats(scope)
+        token = current_request_stats.set(stats)
+        method = scope["method"]
+        in_flight = metrics.REQUESTS_IN_FLIGHT.labels((method, self._router_label(scope)))
+        in_flight[0] += 1
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.sql_debug_headers:
+                    message["headers"] = list(message.get("headers", [])) + debug_headers(stats)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_request_stats.reset(token)
+            in_flight[0] -= 1
+            route = route_label(scope)
+            metrics.REQUEST_DURATION.observe((method, route, str(status_code)), time.perf_counter() - start)
+            metrics.REQUEST_DB_DURATION.observe((method, route), stats.db_time)
+            warn_repeated_statements(method, route, stats)
@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.monitoring.middleware import route_label
+from app.monitoring.sql import current_request_stats, instrument_engine, statement_shape
+
+logger = logging.getLogger(__name__)
+
+# Registro de consultas lentas (desactivado por defecto)
+SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG_ENABLED", "false").strip().lower() in ("1", "true", "yes", "on")
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_LOG_PATH = os.getenv("SLOW_QUERY_LOG_PATH", "slow_queries.jsonl")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "3"))
+
+# Solo se pide el plan de sentencias que lo tienen y se pueden repetir sin efectos (EXPLAIN no las ejecuta)
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE)\b", re.IGNORECASE)
+# "SCAN courseenrollment" es un recorrido completo; "SCAN t USING INDEX ix" recorre un índice
+_SQLITE_TABLE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+def explain_sqlite(cursor, statement: str, parameters) -> Tuple[List[str], List[str]]:
+    """Plan de SQLite (EXPLAIN QUERY PLAN), indentado como en la consola sqlite3, y tablas recorridas completas."""
+    cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    depths = {0: -1}
+    plan, scans = [], []
+    for node_id, parent, _, detail in cursor.fetchall():
+        depth = depths.get(parent, -1) + 1
+        depths[node_id] = depth
+        plan.append("  " * depth + detail)
+        match = _SQLITE_TABLE_SCAN.match(detail)
+        if match:
+            scans.append(match.group(1))
+    return plan, scans
+
+
+def explain_postgresql(cursor, statement: str, parameters) -> Tuple[List[str], List[str]]:
+    """Plan de PostgreSQL (EXPLAIN en JSON, sin ANALYZE) y tablas con Seq Scan."""
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+    document = cursor.fetchone()[0]
+    if isinstance(document, str):
+        document = json.loads(document)
+    plan, scans = [], []
+    pending = [(document[0]["Plan"], 0)]
+    while pending:
+        node, depth = pending.pop()
+        relation = node.get("Relation Name")
+        plan.append("  " * depth + node["Node Type"] + (f" on {relation}" if relation else "") + f" (cost={node.get('Total Cost')})")
+        if node["Node Type"] == "Seq Scan" and relation:
+            scans.append(relation)
+        pending.extend((child, depth + 1) for child in reversed(node.get("Plans", [])))
+    return plan, scans
+
+
+EXPLAINERS = {"sqlite": explain_sqlite, "postgresql": explain_postgresql}
+# Motores donde una sentencia fallida aborta la transacción en curso
+SAVEPOINT_DIALECTS = {"postgresql"}
+_EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+
+class SlowQueryLog:
+    """
+    Registra en un archivo JSONL rotativo las sentencias que superan `threshold_ms`: el SQL
+    parametrizado (sin valores, que pueden ser datos personales), la duración, el endpoint que
+    la ejecutó y su plan de ejecución, con las tablas que se recorren completas.
+
+    El plan se obtiene con un cursor aparte sobre la misma conexión, justo después de la
+    sentencia lenta, por lo que ve los mismos índices y parámetros; en PostgreSQL va dentro de
+    un SAVEPOINT, para que un EXPLAIN fallido no aborte la transacción del request.
+    Solo cuesta algo en las sentencias lentas; para las demás es una comparación.
+    """
+
+    def __init__(
+        self,
+        path: str = SLOW_QUERY_LOG_PATH,
+        threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+        max_bytes: int = SLOW_QUERY_LOG_MAX_BYTES,
+        backups: int = SLOW_QUERY_LOG_BACKUPS,
+    ):
+        self.path = path
+        self.threshold = threshold_ms / 1000
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._handler: Optional[RotatingFileHandler] = None
+        # Referencia fija al listener: event.remove necesita el mismo objeto que event.listen
+        self._listener = self._after_cursor_execute
+
+    def attach(self, engine: Engine):
+        """Registra el log en el motor (síncrono, o el `sync_engine` de uno asíncrono)."""
+        instrument_engine(engine)  # toma el tiempo de inicio de cada sentencia
+        if not event.contains(engine, "after_cursor_execute", self._listener):
+            event.listen(engine, "after_cursor_execute", self._listener)
+
+    def detach(self, engine: Engine):
+        if event.contains(engine, "after_cursor_execute", self._listener):
+            event.remove(engine, "after_cursor_execute", self._listener)
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_monitoring_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        if elapsed >= self.threshold:
+            self.record(self.build_entry(conn, statement, parameters, executemany, elapsed))
+
+    def build_entry(self, conn, statement: str, parameters, executemany: bool, elapsed: float) -> Dict[str, Any]:
+        stats = current_request_stats.get()
+        scope = stats.scope if stats is not None else None
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "duration_ms": round(elapsed * 1000, 3),
+            "route": f"{scope['method']} {route_label(scope)}" if scope else None,
+            "statement": statement_shape(statement),
+            "plan": [],
+            "table_scans": [],
+            "explain_error": None,
+        }
+        explain = EXPLAINERS.get(conn.dialect.name)
+        if explain is None or executemany or not _EXPLAINABLE.match(statement):
+            return entry
+        dbapi_connection = conn.connection.dbapi_connection
+        # En PostgreSQL un error deja abortada la transacción del request: el EXPLAIN va dentro de
+        # un SAVEPOINT para poder deshacer solo su error (sin transacción abierta no hace falta)
+        savepoint = conn.dialect.name in SAVEPOINT_DIALECTS and not getattr(dbapi_connection, "autocommit", False)
+        cursor = dbapi_connection.cursor()
+        try:
+            if savepoint:
+                cursor.execute(f"SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+            try:
+                entry["plan"], entry["table_scans"] = explain(cursor, statement, parameters)
+            except Exception:
+                if savepoint:
+                    cursor.execute(f"ROLLBACK TO SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+                raise
+            finally:
+                if savepoint:
+                    cursor.execute(f"RELEASE SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+        except Exception as e:
+            # El registro nunca debe hacer fallar la consulta que se está midiendo
+            entry["explain_error"] = str(e)
+        finally:
+            cursor.close()
+        return entry
+
+    def record(self, entry: Dict[str, Any]):
+        if self._handler is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes, backupCount=self.backups, encoding="utf-8", delay=True)
+        # handle() toma el lock del handler, por lo que los hilos del threadpool no mezclan líneas
+        self._handler.handle(logging.makeLogRecord({"msg": orjson.dumps(entry).decode()}))
+        logger.warning("Consulta lenta (%.1f ms) en %s: %s", entry["duration_ms"], entry["route"] or "-", entry["statement"][:200])
+
+    def read(self, limit: int = 100, table_scans_only: bool = False) -> List[Dict[str, Any]]:
+        """Últimas `limit` entradas, de la más reciente a la más antigua, incluyendo los archivos rotados."""
+        entries: List[Dict[str, Any]] = []
+        files = [self.path] + [f"{self.path}.{index}" for index in range(1, self.backups + 1)]
+        for path in files:
+            try:
+                with open(path, "rb") as file:
+                    lines = deque(file, maxlen=None if table_scans_only else limit - len(entries))
+            except FileNotFoundError:
+                continue
+            for line in reversed(lines):
+                try:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue  # línea cortada por una rotación en curso
+                if table_scans_only and not entry.get("table_scans"):
+                    continue
+                entries.append(entry)
+                if len(entries) >= limit:
+                    return entries
+        return entries
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
+
+
+slow_query_log: Optional[SlowQueryLog] = SlowQueryLog() if SLOW_QUERY_LOG_ENABLED else None
@@ -0,0 +1,121 @@
+import contextvars
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Modo depuración: agrega a cada respuesta las cabeceras X-DB-* con las consultas del request
+SQL_DEBUG_HEADERS = os.getenv("SQL_DEBUG_HEADERS", "false").strip().lower() in ("1", "true", "yes", "on")
+# Ejecuciones de una misma forma de sentencia en un request a partir de las cuales se sospecha un N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+# Listas de parámetros de IN (...) expandidas: "(?, ?, ?)" y "(%(p_1)s, %(p_2)s)" cuentan como la misma forma
+_IN_LIST = re.compile(r"\(\s*(\?|%\([^)]+\)s|:\w+)(\s*,\s*(\?|%\([^)]+\)s|:\w+))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Forma normalizada de una sentencia SQL: sin saltos de línea y con las listas de IN colapsadas."""
+    return _IN_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class RequestStats:
+    """Acumula lo que hizo la base de datos durante un request (o un bloque capturado en un test)."""
+
+    __slots__ = ("queries", "db_time", "statements", "scope")
+
+    def __init__(self, scope: Optional[dict] = None):
+        # Scope ASGI del request (FastAPI agrega la ruta al resolverla), para saber qué endpoint consulta
+        self.scope = scope
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements: Dict[str, int] = {}
+
+    def record(self, statement: str, elapsed: float):
+        self.queries += 1
+        self.db_time += elapsed
+        # El texto de la sentencia viene del caché de compilación, así que contarlo es un hash ya calculado
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def repeated_shapes(self, threshold: int = None) -> List[Tuple[str, int]]:
+        """Formas de sentencia ejecutadas al menos `threshold` veces: probables consultas N+1."""
+        threshold = threshold or N_PLUS_ONE_THRESHOLD
+        if self.queries < threshold:
+            return []
+        shapes: Dict[str, int] = {}
+        for statement, count in self.statements.items():
+            shape = statement_shape(statement)
+            shapes[shape] = shapes.get(shape, 0) + count
+        return sorted(((shape, count) for shape, count in shapes.items() if count >= threshold), key=lambda item: -item[1])
+
+    def describe(self) -> str:
+        return "\n".join(f"{count:>4}x {statement_shape(statement)}" for statement, count in self.statements.items())
+
+
+# Estadísticas del request en curso. Se propaga a los endpoints síncronos (threadpool)
+# y a los asíncronos (greenlet de SQLAlchemy), por lo que los eventos del motor la ven.
+current_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("current_request_stats", default=None)
+
+# Capturas activas de `capture_queries` (vacía salvo en tests)
+_captures: List[RequestStats] = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._monitoring_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._monitoring_start
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if _captures:
+        for capture in _captures:
+            capture.record(statement, elapsed)
+
+
+def instrument_engine(engine: Engine):
+    """Registra en el motor (síncrono, o el `sync_engine` de uno asíncrono) la medición por request."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def capture_queries() -> Iterator[RequestStats]:
+    """
+    Cuenta todas las sentencias que ejecuten los motores instrumentados dentro del bloque,
+    sin importar el hilo o la tarea que las ejecute (por ejemplo, las de un TestClient).
+    """
+    stats = RequestStats()
+    _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        _captures.remove(stats)
+
+
+def debug_headers(stats: RequestStats) -> List[Tuple[bytes, bytes]]:
+    """Cabeceras de depuración con la cantidad de consultas, el tiempo de base y las formas repetidas."""
+    headers = [
+        (b"x-db-query-count", str(stats.queries).encode()),
+        (b"x-db-time-ms", f"{stats.db_time * 1000:.2f}".encode()),
+    ]
+    repeated = stats.repeated_shapes()
+    if repeated:
+        shape, count = repeated[0]
+        headers.append((b"x-db-n-plus-one", f"{count}x {shape[:200]}".encode("latin-1", "replace")))
+    return headers
+
+
+def warn_repeated_statements(method: str, route: str, stats: RequestStats):
+    """Registra un warning por cada forma de sentencia repetida en el request (probable N+1)."""
+    for shape, count in stats.repeated_shapes():
+        logger.warning("Posible N+1 en %s %s: %d ejecuciones de %s", method, route, count, shape)
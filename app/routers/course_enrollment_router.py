@@ -1,20 +1,45 @@
 # app/routers/course_enrollment_router.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlmodel import Session, select, col, and_
-from typing import List, Optional
-from sqlalchemy.orm import selectinload # Importar selectinload para cargar relaciones
-from pydantic import parse_obj_as # Importar para compatibilidad con Pydantic V1
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, Dict, List, Optional
 
-from app.config.database import get_session
-# Importar modelos y esquemas necesarios. Se eliminó 'CourseEnrollmentReportItem'
-from app.models import CourseEnrollment, CourseEnrollmentCreate, CourseEnrollmentRead, CourseEnrollmentUpdate, User, CourseEnrollmentStatus, Person, TrafficSafetyCourse, Inspector, Judge
+from app.config.database import get_session, get_async_session
+# Importar modelos y esquemas necesarios
+from app.models import CourseEnrollment, CourseEnrollmentCreate, CourseEnrollmentRead, CourseEnrollmentUpdate, User, CourseEnrollmentStatus, CourseEnrollmentOrder, CourseEnrollmentFilter, CourseEnrollmentPage, CourseEnrollmentExportFormat, CourseEnrollmentReportPage, EnrollmentStats, CourseEnrollmentBatchRequest, CourseEnrollmentBatchResult, BulkCreateResult, Person, TrafficSafetyCourse, Inspector, Judge
 
-from app.services import course_enrollment_service
+from app.services import course_enrollment_service, write_queue
 from app.routers.user_router import get_current_user, get_current_admin_user, get_current_inspector_user, get_current_judge_user
 
 router = APIRouter(prefix="/enrollments", tags=["Course Enrollments"])
 
+def _enrollment_response(enrollment: Dict[str, Any]) -> ORJSONResponse:
+    """Respuesta de una inscripción con su versión como ETag, para enviarla luego en If-Match."""
+    if "version" not in enrollment:  # ?fields= sin version
+        return ORJSONResponse(enrollment)
+    return ORJSONResponse(enrollment, headers={"ETag": course_enrollment_service.enrollment_etag(enrollment["id"], enrollment["version"])})
+
+def _enrollment_projection(
+    fields: Optional[str] = Query(None, description="Campos de la inscripción a devolver, separados por coma (`id` siempre se incluye)"),
+    include: Optional[str] = Query(None, description="Relaciones a incluir, separadas por coma: person, course, inspector, judge"),
+) -> course_enrollment_service.EnrollmentProjection:
+    """
+    Proyección de las lecturas de inscripciones. Sin `fields` ni `include` se devuelven todos los
+    campos y relaciones; con `fields` solo se incluyen las relaciones pedidas en `include`.
+    """
+    try:
+        return course_enrollment_service.parse_enrollment_projection(fields, include)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+def _version_mismatch(if_match: Optional[str]) -> HTTPException:
+    if if_match is None:
+        # Sin If-Match: otro pedido modificó la inscripción entre la lectura y la escritura
+        return HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Enrollment was modified concurrently, retry")
+    return HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Enrollment version does not match If-Match")
+
 @router.post("/", response_model=CourseEnrollmentRead, status_code=status.HTTP_201_CREATED)
 def create_enrollment(
     enrollment_create: CourseEnrollmentCreate,
@@ -26,80 +51,145 @@ def create_enrollment(
     Requiere rol de Administrador.
     """
     try:
-        new_enrollment = course_enrollment_service.create_enrollment(enrollment_create, session)
+        new_enrollment = write_queue.run_write(session, lambda write_session: course_enrollment_service.create_enrollment(enrollment_create, write_session))
         return new_enrollment
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-@router.get("/", response_model=List[CourseEnrollmentRead])
-def read_all_enrollments(
+@router.post("/bulk", response_model=BulkCreateResult)
+def create_enrollments_bulk(
+    items: List[Dict[str, Any]],
     session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_admin_user) # Solo ADMIN puede crear
+):
+    """
+    Crea muchas inscripciones en una sola transacción.
+    Devuelve un resultado por elemento (ID creado o error: validación, persona o curso inexistente)
+    en el orden recibido.
+    Requiere rol de Administrador.
+    """
+    try:
+        return course_enrollment_service.create_enrollments_bulk(items, session)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/", response_model=CourseEnrollmentPage)
+async def read_all_enrollments(
+    filters: CourseEnrollmentFilter = Depends(),
+    order_by: CourseEnrollmentOrder = CourseEnrollmentOrder.ID,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    projection: course_enrollment_service.EnrollmentProjection = Depends(_enrollment_projection),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user) # Cualquier user autenticado puede leer
 ):
     """
-    Obtiene una lista de todas las inscripciones a cursos de seguridad vial.
+    Obtiene una página de inscripciones a cursos de seguridad vial.
+    Admite filtros por estado, curso, persona, inspector, juez y rangos de fechas,
+    ordenadas por `id` o por `expiration_date`. Para pedir la página siguiente se
+    envía el `next_cursor` de la respuesta en el parámetro `cursor`.
+    Con `fields` e `include` (p. ej. `?fields=status,expiration_date&include=person`) se leen y
+    devuelven solo esos campos y relaciones.
     Requiere autenticación.
     """
-    # Usar `options(selectinload(...))` para cargar relaciones si se necesitan en CourseEnrollmentRead
-    # Esta es una buena práctica para evitar N+1 queries.
-    enrollments = session.exec(
-        select(CourseEnrollment)
-        .options(selectinload(CourseEnrollment.person))
-        .options(selectinload(CourseEnrollment.course))
-        .options(selectinload(CourseEnrollment.inspector))
-        .options(selectinload(CourseEnrollment.judge))
-    ).all()
-    # Convertir los objetos SQLModel (ORM) a los esquemas de lectura de Pydantic
-    # parse_obj_as es la forma de Pydantic V1 de hacer lo que model_validate hace en V2.
-    return parse_obj_as(List[CourseEnrollmentRead], enrollments)
+    try:
+        return ORJSONResponse(await course_enrollment_service.get_enrollments_page_async(session, filters, order_by, cursor, limit, projection))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/export")
+def export_enrollments(
+    filters: CourseEnrollmentFilter = Depends(),
+    export_format: CourseEnrollmentExportFormat = Query(CourseEnrollmentExportFormat.NDJSON, alias="format"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_admin_user) # Solo ADMIN puede exportar
+):
+    """
+    Exporta las inscripciones (con nombre/DNI de la persona y nombre del curso) en NDJSON o CSV.
+    La respuesta se transmite por bloques a medida que se leen de la base de datos.
+    Admite los mismos filtros que el listado. Requiere rol de Administrador.
+    """
+    if export_format == CourseEnrollmentExportFormat.CSV:
+        media_type = "text/csv"
+    else:
+        media_type = "application/x-ndjson"
+    return StreamingResponse(
+        course_enrollment_service.stream_enrollment_export(session, filters, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="enrollments.{export_format.value}"'},
+    )
+
+@router.get("/reports/expiring-or-expired", response_model=CourseEnrollmentReportPage)
+async def expiring_or_expired_report(
+    days_until_expiration: int = Query(30, ge=0),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_inspector_user) # ADMIN o INSPECTOR
+):
+    """
+    Reporte de inscripciones vencidas o próximas a vencer (dentro de `days_until_expiration` días),
+    con la persona y el curso anidados y los campos calculados `days_until_expiration` e `is_expired`.
+    Los resultados se paginan con `cursor`/`next_cursor`.
+    Requiere rol de Inspector o Administrador.
+    """
+    try:
+        return ORJSONResponse(await course_enrollment_service.get_expiring_or_expired_report_async(session, days_until_expiration, cursor, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/stats", response_model=EnrollmentStats)
+async def enrollment_stats(
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Cantidad de inscripciones en total, por estado, por curso y por estado y curso.
+    Se lee de contadores que se actualizan con cada alta, cambio y baja, sin recorrer las inscripciones.
+    Requiere autenticación.
+    """
+    return ORJSONResponse(await course_enrollment_service.get_enrollment_stats_async(session))
 
 @router.get("/{enrollment_id}", response_model=CourseEnrollmentRead)
-def read_enrollment(
+async def read_enrollment(
     enrollment_id: int,
-    session: Session = Depends(get_session),
+    projection: course_enrollment_service.EnrollmentProjection = Depends(_enrollment_projection),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
     """
     Obtiene una inscripción a curso de seguridad vial por su ID.
+    El encabezado ETag identifica su versión actual. Admite `fields` e `include` como el listado.
     Requiere autenticación.
     """
-    enrollment = session.exec(
-        select(CourseEnrollment)
-        .where(CourseEnrollment.id == enrollment_id)
-        .options(selectinload(CourseEnrollment.person))
-        .options(selectinload(CourseEnrollment.course))
-        .options(selectinload(CourseEnrollment.inspector))
-        .options(selectinload(CourseEnrollment.judge))
-    ).first()
+    enrollment = await course_enrollment_service.get_enrollment_read_async(enrollment_id, session, projection)
     if not enrollment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Enrollment not found")
-    return parse_obj_as(CourseEnrollmentRead, enrollment)
+    return _enrollment_response(enrollment)
 
 @router.put("/{enrollment_id}", response_model=CourseEnrollmentRead)
 def update_enrollment(
     enrollment_id: int,
     updated_data: CourseEnrollmentUpdate,
+    if_match: Optional[str] = Header(None),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_admin_user) # Solo ADMIN puede actualizar
 ):
     """
     Actualiza una inscripción a curso de seguridad vial existente por su ID.
+    Con `If-Match` (el ETag de una lectura anterior) solo se aplica si la inscripción no cambió desde entonces (412 si cambió).
     Requiere rol de Administrador.
     """
-    enrollment = course_enrollment_service.update_enrollment(enrollment_id, updated_data, session)
+    expected_versions = course_enrollment_service.if_match_versions(if_match, enrollment_id)
+    try:
+        enrollment = write_queue.run_write(
+            session, lambda write_session: course_enrollment_service.update_enrollment(enrollment_id, updated_data, write_session, expected_versions)
+        )
+    except course_enrollment_service.EnrollmentVersionMismatch:
+        raise _version_mismatch(if_match)
     if not enrollment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Enrollment not found")
-    
-    # Después de actualizar, cargar las relaciones para la respuesta
-    updated_enrollment_with_relations = session.exec(
-        select(CourseEnrollment)
-        .where(CourseEnrollment.id == enrollment.id)
-        .options(selectinload(CourseEnrollment.person))
-        .options(selectinload(CourseEnrollment.course))
-        .options(selectinload(CourseEnrollment.inspector))
-        .options(selectinload(CourseEnrollment.judge))
-    ).first()
-    return parse_obj_as(CourseEnrollmentRead, updated_enrollment_with_relations)
+    return _enrollment_response(enrollment)
 
 
 @router.delete("/{enrollment_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -121,108 +211,117 @@ def delete_enrollment(
 @router.post("/{enrollment_id}/complete", response_model=CourseEnrollmentRead)
 def complete_enrollment(
     enrollment_id: int,
+    if_match: Optional[str] = Header(None),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_inspector_user) # Solo Inspector puede marcar como completado
 ):
     """
     Marca una inscripción como 'completed'.
+    Admite `If-Match` con el ETag de una lectura anterior (412 si la inscripción cambió).
     Requiere rol de Inspector.
     """
-    enrollment = course_enrollment_service.complete_enrollment(enrollment_id, current_user.id, session)
+    expected_versions = course_enrollment_service.if_match_versions(if_match, enrollment_id)
+    try:
+        enrollment = write_queue.run_write(
+            session, lambda write_session: course_enrollment_service.complete_enrollment(enrollment_id, current_user.id, write_session, expected_versions)
+        )
+    except course_enrollment_service.EnrollmentVersionMismatch:
+        raise _version_mismatch(if_match)
     if not enrollment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Enrollment not found or already completed")
-    
-    # Cargar relaciones para la respuesta
-    completed_enrollment_with_relations = session.exec(
-        select(CourseEnrollment)
-        .where(CourseEnrollment.id == enrollment.id)
-        .options(selectinload(CourseEnrollment.person))
-        .options(selectinload(CourseEnrollment.course))
-        .options(selectinload(CourseEnrollment.inspector))
-        .options(selectinload(CourseEnrollment.judge))
-    ).first()
-    return parse_obj_as(CourseEnrollmentRead, completed_enrollment_with_relations)
+    return _enrollment_response(enrollment)
 
 
 @router.post("/{enrollment_id}/use", response_model=CourseEnrollmentRead)
 def use_enrollment(
     enrollment_id: int,
+    if_match: Optional[str] = Header(None),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_judge_user) # Solo Juez puede marcar como usado
 ):
     """
     Marca una inscripción como 'used'.
+    Admite `If-Match` con el ETag de una lectura anterior (412 si la inscripción cambió).
     Requiere rol de Juez.
     """
-    enrollment = course_enrollment_service.use_enrollment(enrollment_id, current_user.id, session)
+    expected_versions = course_enrollment_service.if_match_versions(if_match, enrollment_id)
+    try:
+        enrollment = write_queue.run_write(
+            session, lambda write_session: course_enrollment_service.use_enrollment(enrollment_id, current_user.id, write_session, expected_versions)
+        )
+    except course_enrollment_service.EnrollmentVersionMismatch:
+        raise _version_mismatch(if_match)
     if not enrollment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Enrollment not found or not in a 'completed' state")
-    
-    # Cargar relaciones para la respuesta
-    used_enrollment_with_relations = session.exec(
-        select(CourseEnrollment)
-        .where(CourseEnrollment.id == enrollment.id)
-        .options(selectinload(CourseEnrollment.person))
-        .options(selectinload(CourseEnrollment.course))
-        .options(selectinload(CourseEnrollment.inspector))
-        .options(selectinload(CourseEnrollment.judge))
-    ).first()
-    return parse_obj_as(CourseEnrollmentRead, used_enrollment_with_relations)
+    return _enrollment_response(enrollment)
+
+
+@router.post("/complete-batch", response_model=CourseEnrollmentBatchResult)
+def complete_enrollments_batch(
+    batch: CourseEnrollmentBatchRequest,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_inspector_user) # Solo Inspector puede marcar como completado
+):
+    """
+    Marca como 'completed' todas las inscripciones 'pending' de `ids`, en una sola transacción.
+    Devuelve por ID si cambió (`transitioned`), si no estaba pendiente (`wrong_state`) o si no existe (`not_found`).
+    Requiere rol de Inspector.
+    """
+    try:
+        return ORJSONResponse(course_enrollment_service.complete_enrollments_batch(batch.ids, current_user.id, session))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/use-batch", response_model=CourseEnrollmentBatchResult)
+def use_enrollments_batch(
+    batch: CourseEnrollmentBatchRequest,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_judge_user) # Solo Juez puede marcar como usado
+):
+    """
+    Marca como 'used' todas las inscripciones 'completed' de `ids`, en una sola transacción.
+    Devuelve por ID si cambió (`transitioned`), si no estaba completada (`wrong_state`) o si no existe (`not_found`).
+    Requiere rol de Juez.
+    """
+    try:
+        return ORJSONResponse(course_enrollment_service.use_enrollments_batch(batch.ids, current_user.id, session))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.get("/person/{person_id}", response_model=List[CourseEnrollmentRead])
-def get_enrollments_by_person(
+async def get_enrollments_by_person(
     person_id: int,
-    session: Session = Depends(get_session),
+    projection: course_enrollment_service.EnrollmentProjection = Depends(_enrollment_projection),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
     """
     Obtiene todas las inscripciones de una persona específica.
     """
-    enrollments = session.exec(
-        select(CourseEnrollment)
-        .where(CourseEnrollment.person_id == person_id)
-        .options(selectinload(CourseEnrollment.person))
-        .options(selectinload(CourseEnrollment.course))
-        .options(selectinload(CourseEnrollment.inspector))
-        .options(selectinload(CourseEnrollment.judge))
-    ).all()
-    return parse_obj_as(List[CourseEnrollmentRead], enrollments)
+    return ORJSONResponse(await course_enrollment_service.get_enrollments_read_async(CourseEnrollmentFilter(person_id=person_id), session, projection))
 
 @router.get("/course/{course_id}", response_model=List[CourseEnrollmentRead])
-def get_enrollments_by_course(
+async def get_enrollments_by_course(
     course_id: int,
-    session: Session = Depends(get_session),
+    projection: course_enrollment_service.EnrollmentProjection = Depends(_enrollment_projection),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
     """
     Obtiene todas las inscripciones para un curso específico.
     """
-    enrollments = session.exec(
-        select(CourseEnrollment)
-        .where(CourseEnrollment.course_id == course_id)
-        .options(selectinload(CourseEnrollment.person))
-        .options(selectinload(CourseEnrollment.course))
-        .options(selectinload(CourseEnrollment.inspector))
-        .options(selectinload(CourseEnrollment.judge))
-    ).all()
-    return parse_obj_as(List[CourseEnrollmentRead], enrollments)
+    return ORJSONResponse(await course_enrollment_service.get_enrollments_read_async(CourseEnrollmentFilter(course_id=course_id), session, projection))
 
 @router.get("/status/{status_value}", response_model=List[CourseEnrollmentRead])
-def get_enrollments_by_status(
+async def get_enrollments_by_status(
     status_value: CourseEnrollmentStatus,
-    session: Session = Depends(get_session),
+    projection: course_enrollment_service.EnrollmentProjection = Depends(_enrollment_projection),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
     """
     Obtiene todas las inscripciones con un estado específico.
     """
-    enrollments = session.exec(
-        select(CourseEnrollment)
-        .where(CourseEnrollment.status == status_value)
-        .options(selectinload(CourseEnrollment.person))
-        .options(selectinload(CourseEnrollment.course))
-        .options(selectinload(CourseEnrollment.inspector))
-        .options(selectinload(CourseEnrollment.judge))
-    ).all()
-    return parse_obj_as(List[CourseEnrollmentRead], enrollments)
+    return ORJSONResponse(await course_enrollment_service.get_enrollments_read_async(CourseEnrollmentFilter(status=status_value), session, projection))
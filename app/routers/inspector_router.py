@@ -1,10 +1,11 @@
 # app/routers/inspector_router.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Optional
 
-from app.config.database import get_session
+from app.config.database import get_session, get_async_session
 from app.models import Inspector, InspectorCreate, InspectorRead, InspectorUpdate, User
 
 from app.services import inspector_service
@@ -29,15 +30,17 @@ def create_inspector(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.get("/", response_model=List[InspectorRead])
-def read_all_inspectors(
-    session: Session = Depends(get_session),
+async def read_all_inspectors(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
     """
     Obtiene una lista de todos los inspectores.
+    Responde con ETag y Last-Modified; con `If-None-Match` vigente devuelve 304 sin cuerpo.
     Requiere autenticación.
     """
-    return inspector_service.get_all_inspectors(session)
+    return await inspector_service.INSPECTOR_CATALOG.response(request, session)
 
 @router.get("/{inspector_id}", response_model=InspectorRead)
 def read_inspector(
@@ -1,10 +1,11 @@
 # app/routers/judge_router.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Optional
 
-from app.config.database import get_session
+from app.config.database import get_session, get_async_session
 from app.models import Judge, JudgeCreate, JudgeRead, JudgeUpdate, User
 
 from app.services import judge_service
@@ -29,15 +30,17 @@ def create_judge(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.get("/", response_model=List[JudgeRead])
-def read_all_judges(
-    session: Session = Depends(get_session),
+async def read_all_judges(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
     """
     Obtiene una lista de todos los jueces.
+    Responde con ETag y Last-Modified; con `If-None-Match` vigente devuelve 304 sin cuerpo.
     Requiere autenticación.
     """
-    return judge_service.get_all_judges(session)
+    return await judge_service.JUDGE_CATALOG.response(request, session)
 
 @router.get("/{judge_id}", response_model=JudgeRead)
 def read_judge(
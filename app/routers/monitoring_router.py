@@ -0,0 +1,26 @@
+# app/routers/monitoring_router.py
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List
+
+from app.models import SlowQueryEntry, User
+from app.monitoring import slow_queries
+from app.routers.user_router import get_current_admin_user
+
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
+
+@router.get("/slow-queries", response_model=List[SlowQueryEntry])
+def read_slow_queries(
+    limit: int = Query(100, ge=1, le=1000),
+    table_scans_only: bool = False,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Últimas consultas lentas registradas (SLOW_QUERY_LOG_ENABLED), de la más reciente a la más antigua,
+    con su duración, el endpoint que las ejecutó y su plan de ejecución.
+    Con `table_scans_only` solo se devuelven las que recorren alguna tabla completa.
+    Requiere rol de Administrador.
+    """
+    if slow_queries.slow_query_log is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Slow query log is disabled")
+    return slow_queries.slow_query_log.read(limit, table_scans_only)
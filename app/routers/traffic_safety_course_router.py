@@ -1,11 +1,12 @@
 # app/routers/traffic_safety_course_router.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Optional
 from pydantic import parse_obj_as # Importar para compatibilidad con Pydantic V1
 
-from app.config.database import get_session
+from app.config.database import get_session, get_async_session
 from app.models import TrafficSafetyCourse, TrafficSafetyCourseCreate, TrafficSafetyCourseRead, TrafficSafetyCourseUpdate, User
 
 from app.services import traffic_safety_course_service
@@ -30,29 +31,29 @@ def create_course(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.get("/", response_model=List[TrafficSafetyCourseRead])
-def read_all_courses(
-    session: Session = Depends(get_session),
+async def read_all_courses(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user) # Cualquier usuario autenticado puede leer
 ):
     """
     Obtiene una lista de todos los cursos de seguridad vial.
+    Responde con ETag y Last-Modified; con `If-None-Match` vigente devuelve 304 sin cuerpo.
     Requiere autenticación.
     """
-    courses = traffic_safety_course_service.get_all_courses(session)
-    # Convertir los objetos SQLModel (ORM) a los esquemas de lectura de Pydantic
-    return parse_obj_as(List[TrafficSafetyCourseRead], courses)
+    return await traffic_safety_course_service.COURSE_CATALOG.response(request, session)
 
 @router.get("/{course_id}", response_model=TrafficSafetyCourseRead)
-def read_course(
+async def read_course(
     course_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user) # Cualquier usuario autenticado puede leer
 ):
     """
     Obtiene un curso de seguridad vial por su ID.
     Requiere autenticación.
     """
-    course = traffic_safety_course_service.get_course_by_id(course_id, session)
+    course = await traffic_safety_course_service.get_course_by_id_async(course_id, session)
     if not course:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
     return course
@@ -3,12 +3,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 
-from app.config.database import get_session
+from app.config.database import get_async_session, get_session
 from app.models import User, UserRole, UserCreate, UserRead, UserUpdate
 
 from app.security import security
+from app.security.password_hashing import PasswordHasherBusy
+from app.security.principal_cache import principal_cache
+from app.security.token_revocation import AUTH_STATELESS, principal_from_claims, token_denylist
 from app.services import user_service
 
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -18,8 +22,16 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/token")
 def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> User:
     """
     Dependencia para obtener el usuario actual autenticado.
-    Verifica el token de acceso.
+    Verifica el token de acceso. Con AUTH_STATELESS, el usuario se arma con los claims firmados
+    del token (sub, role, uid) y solo se consulta la deny-list en memoria. Si no, los usuarios
+    ya resueltos se toman de la caché de principales, sin volver a decodificar el token ni
+    consultar la base de datos.
     """
+    if not AUTH_STATELESS:
+        cached_user = principal_cache.get(token)
+        if cached_user is not None:
+            return cached_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -32,9 +44,22 @@ def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Dep
             raise credentials_exception
     except Exception:
         raise credentials_exception
+
+    if AUTH_STATELESS:
+        principal = principal_from_claims(payload)
+        if principal is not None:
+            if token_denylist.is_revoked(principal.id, float(payload["iat"])):
+                raise credentials_exception
+            return principal
+        # Token emitido antes de incluir `uid`: se resuelve con la base de datos
+        cached_user = principal_cache.get(token)
+        if cached_user is not None:
+            return cached_user
+
     user = user_service.get_user_by_username(username, session)
     if user is None:
         raise credentials_exception
+    principal_cache.put(token, user, payload.get("exp"))
     return user
 
 def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
@@ -42,14 +67,6 @@ def get_current_admin_user(current_user: User = Depends(get_current_user)) -> Us
     Dependencia para obtener el usuario actual que es ADMIN.
     """
     current_user_role_str = current_user.role.value if isinstance(current_user.role, UserRole) else current_user.role
-    
-    # --- LÍNEAS DE DEBUGGING AÑADIDAS ---
-    print(f"DEBUG (get_current_admin_user): current_user.username: {current_user.username}")
-    print(f"DEBUG (get_current_admin_user): current_user.role (raw): {current_user.role}, type: {type(current_user.role)}")
-    print(f"DEBUG (get_current_admin_user): current_user_role_str: {current_user_role_str}, type: {type(current_user_role_str)}")
-    print(f"DEBUG (get_current_admin_user): UserRole.ADMIN.value: {UserRole.ADMIN.value}, type: {type(UserRole.ADMIN.value)}")
-    # --- FIN LÍNEAS DE DEBUGGING ---
-
     if current_user_role_str != UserRole.ADMIN.value:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not an admin user")
     return current_user
@@ -72,15 +89,26 @@ def get_current_judge_user(current_user: User = Depends(get_current_user)) -> Us
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a judge or admin user")
     return current_user
 
+def password_hasher_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent password operations, retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/token")
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Endpoint para que los usuarios obtengan un token de acceso OAuth2.
+    La contraseña se verifica en el pool de hashing; si su cola está llena responde 503.
     """
-    user = user_service.authenticate_user(form_data.username, form_data.password, session)
+    try:
+        user = await user_service.authenticate_user_async(form_data.username, form_data.password, session)
+    except PasswordHasherBusy:
+        raise password_hasher_busy_exception()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -92,7 +120,7 @@ def login_for_access_token(
     role_to_encode = user.role.value if isinstance(user.role, UserRole) else user.role
 
     access_token = security.create_access_token(
-        data={"sub": user.username, "role": role_to_encode},
+        data={"sub": user.username, "role": role_to_encode, "uid": user.id},
         expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
@@ -110,7 +138,10 @@ def create_user_endpoint(
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already registered")
     
-    new_user = user_service.create_user(user_create, session)
+    try:
+        new_user = user_service.create_user(user_create, session)
+    except PasswordHasherBusy:
+        raise password_hasher_busy_exception()
     return new_user
 
 @router.get("/", response_model=List[UserRead])
@@ -150,8 +181,10 @@ def update_user_endpoint(
     if current_user_role_str != UserRole.ADMIN.value and current_user.id != user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this user")
 
-    user_data = user_update.dict(exclude_unset=True)
-    updated_user = user_service.update_user(user_id, user_data, session)
+    try:
+        updated_user = user_service.update_user(user_id, user_update, session)
+    except PasswordHasherBusy:
+        raise password_hasher_busy_exception()
     if not updated_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return updated_user
@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from app.monitoring import metrics
+from app.security import security
+
+# Configuración del pool de hashing de contraseñas
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Operaciones que pueden esperar un worker; con la cola llena se rechazan (503) en lugar de acumularse
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "64"))
+# Caché de verificaciones exitosas recientes (0 la desactiva)
+PASSWORD_VERIFY_CACHE_SIZE = int(os.getenv("PASSWORD_VERIFY_CACHE_SIZE", "1024"))
+PASSWORD_VERIFY_CACHE_TTL_SECONDS = float(os.getenv("PASSWORD_VERIFY_CACHE_TTL_SECONDS", "300"))
+
+
+class PasswordHasherBusy(Exception):
+    """La cola del pool de hashing está llena; el cliente debe reintentar más tarde."""
+
+
+class VerificationCache:
+    """
+    Recuerda por `ttl_seconds` las verificaciones exitosas, para que un usuario que vuelve a
+    iniciar sesión (o un cliente que repite el login) no pague otra vez el costo de pbkdf2.
+
+    La clave es un HMAC de la contraseña y del hash guardado con una clave aleatoria del proceso:
+    la contraseña no queda en memoria, la entrada no sirve fuera de este proceso y cambiar la
+    contraseña (otro hash) invalida la entrada sin avisar a la caché. Los intentos fallidos
+    no se guardan.
+    """
+
+    def __init__(self, max_size: int = PASSWORD_VERIFY_CACHE_SIZE, ttl_seconds: float = PASSWORD_VERIFY_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._key = secrets.token_bytes(32)
+        self._entries: "OrderedDict[bytes, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry_key(self, password: str, hashed_password: str) -> bytes:
+        message = password.encode("utf-8") + b"\0" + hashed_password.encode("utf-8")
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def contains(self, password: str, hashed_password: str) -> bool:
+        if self.max_size <= 0:
+            return False
+        key = self._entry_key(password, hashed_password)
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, password: str, hashed_password: str):
+        if self.max_size <= 0:
+            return
+        key = self._entry_key(password, hashed_password)
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl_seconds
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PasswordHasher:
+    """
+    Pool acotado de hilos dedicado a hashear y verificar contraseñas.
+
+    pbkdf2 (hashlib) libera el GIL, así que los workers usan varios núcleos sin ocupar el
+    threadpool de los endpoints síncronos: una ráfaga de logins espera aquí y el resto de la API
+    sigue atendiendo. Con `workers` ocupados y `queue_size` operaciones esperando, las nuevas
+    se rechazan con PasswordHasherBusy en lugar de acumular latencia.
+    Publica en /metrics la profundidad de la cola, las operaciones en curso, la espera en cola
+    y los rechazos.
+    """
+
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASH_WORKERS,
+        queue_size: int = PASSWORD_HASH_QUEUE_SIZE,
+        cache: Optional[VerificationCache] = None,
+    ):
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.cache = cache if cache is not None else VerificationCache()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _submit(self, operation: str, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.workers + self.queue_size:
+                metrics.PASSWORD_HASH_REJECTED.inc((operation,))
+                raise PasswordHasherBusy(f"Password hashing queue is full ({self.queue_size} waiting)")
+            self._pending += 1
+            metrics.PASSWORD_HASH_QUEUE_DEPTH.inc()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            # Copia local: un shutdown() concurrente puede dejar self._executor en None
+            executor = self._executor
+        submitted_at = time.perf_counter()
+
+        def run():
+            with self._lock:
+                metrics.PASSWORD_HASH_QUEUE_DEPTH.dec()
+                metrics.PASSWORD_HASH_IN_PROGRESS.inc()
+                metrics.PASSWORD_HASH_WAIT.observe((operation,), time.perf_counter() - submitted_at)
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    metrics.PASSWORD_HASH_IN_PROGRESS.dec()
+                    self._pending -= 1
+
+        try:
+            return executor.submit(run)
+        except BaseException:
+            # El pool se cerró mientras tanto: la operación no se encoló y no debe ocupar lugar en la cola
+            with self._lock:
+                metrics.PASSWORD_HASH_QUEUE_DEPTH.dec()
+                self._pending -= 1
+            raise
+
+    def _verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        verified, new_hash = security.verify_and_update_password(password, hashed_password)
+        if verified:
+            self.cache.add(password, new_hash or hashed_password)
+        return verified, new_hash
+
+    def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verifica la contraseña en el pool y espera el resultado. Devuelve (válida, hash_nuevo);
+        hash_nuevo no es None si el hash guardado debe regenerarse (p. ej. cambió PBKDF2_ROUNDS).
+        """
+        if self.cache.contains(password, hashed_password):
+            return True, None
+        return self._submit("verify", self._verify, password, hashed_password).result()
+
+    async def verify_async(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Variante de `verify` que espera sin bloquear el event loop."""
+        if self.cache.contains(password, hashed_password):
+            return True, None
+        return await asyncio.wrap_future(self._submit("verify", self._verify, password, hashed_password))
+
+    def hash(self, password: str) -> str:
+        return self._submit("hash", security.get_password_hash, password).result()
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit("hash", security.get_password_hash, password))
+
+    @property
+    def pending(self) -> int:
+        """Operaciones en cola o en ejecución."""
+        return self._pending
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from app.models import User
+
+# Configuración de la caché de usuarios autenticados
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+
+class PrincipalCache:
+    """
+    Caché LRU en memoria de los usuarios autenticados, indexada por token.
+    Cada entrada vence a los `ttl_seconds` o al `exp` del token, lo que ocurra primero.
+    Guarda copias desacopladas de la sesión para que un commit posterior no las expire.
+    La invalidación es local al proceso: con varios workers, el TTL acota cuánto tarda
+    en verse un cambio hecho en otro proceso.
+    """
+
+    def __init__(self, max_size: int = PRINCIPAL_CACHE_SIZE, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+        self._tokens_by_username: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(token)
+                return None
+            self._entries.move_to_end(token)
+            return user
+
+    def put(self, token: str, user: User, token_exp: Optional[float] = None):
+        if self.max_size <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, float(token_exp))
+        cached_user = User(**user.dict())
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (cached_user, expires_at)
+            self._tokens_by_username.setdefault(cached_user.username, set()).add(token)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, username: str):
+        """Descarta todas las entradas del usuario (por ejemplo, tras modificarlo o eliminarlo)."""
+        with self._lock:
+            for token in self._tokens_by_username.pop(username, set()):
+                self._entries.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_username.clear()
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        username = entry[0].username
+        tokens = self._tokens_by_username.get(username)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_username[username]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+principal_cache = PrincipalCache()
@@ -1,12 +1,36 @@
+import os
+import time
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import Optional, Tuple
 
 
 # Módulo de seguridad para manejo de contraseñas y JWT
 # DEBE USAR pbkdf2_sha256
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Iteraciones de pbkdf2: más iteraciones encarecen un ataque de fuerza bruta, pero también cada login.
+# Los hashes guardados con otra cantidad siguen siendo válidos y se regeneran en el siguiente login.
+PBKDF2_ROUNDS = int(os.getenv("PBKDF2_ROUNDS", "29000"))
+
+# passlib y jose (con su backend de cryptography) tardan decenas de milisegundos en importarse:
+# se cargan en el primer uso, o en segundo plano al arrancar (ver `load_backends`), y no al importar la app.
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """Contexto de passlib con pbkdf2_sha256, creado en el primer uso."""
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=PBKDF2_ROUNDS,
+        pbkdf2_sha256__min_rounds=PBKDF2_ROUNDS,
+        pbkdf2_sha256__max_rounds=PBKDF2_ROUNDS,
+    )
+
+def load_backends():
+    """Importa los backends de hashing y JWT; al arrancar se llama en un hilo para no demorar el primer request."""
+    get_pwd_context()
+    import jose.jwt  # noqa: F401
 
 # Configuración de JWT
 
@@ -16,25 +40,39 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 120
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica si una contraseña en texto plano coincide con una contraseña hasheada."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica la contraseña y, si el hash usa otra configuración (p. ej. otra cantidad de
+    iteraciones), devuelve también el hash nuevo que debe guardarse.
+    """
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hashea una contraseña en texto plano."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Crea un token de acceso JWT."""
+    """
+    Crea un token de acceso JWT. `iat` lleva milisegundos para poder compararlo con el
+    momento de una revocación (ver app.security.token_revocation).
+    """
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": round(time.time(), 3)})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def decode_access_token(token: str):
     """Decodifica un token de acceso JWT."""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
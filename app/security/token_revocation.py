@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.models import User, UserRole, UserTokenRevocation
+from app.security import security
+
+logger = logging.getLogger(__name__)
+
+# Modo sin estado: los guards de rol confían en los claims firmados del token (sub, role, uid, iat)
+# y no consultan la base de datos. Los tokens sin `uid` (emitidos antes) siguen el camino con base.
+AUTH_STATELESS = os.getenv("AUTH_STATELESS", "false").strip().lower() in ("1", "true", "yes", "on")
+# Cada cuántos segundos cada worker relee las revocaciones hechas por los demás
+AUTH_DENYLIST_REFRESH_SECONDS = float(os.getenv("AUTH_DENYLIST_REFRESH_SECONDS", "5"))
+
+# Cambios de usuario que alteran los claims del token o su validez y por eso revocan los tokens emitidos
+REVOKING_FIELDS = {"username", "role", "password", "is_active"}
+
+
+class TokenDenyList:
+    """
+    Deny-list en memoria de los tokens revocados: por usuario, el instante a partir del cual sus
+    tokens dejan de valer. Un token se rechaza si su `iat` es anterior a la revocación de su `uid`.
+    Ocupa una entrada por usuario modificado o eliminado en la última vida de un token
+    (ACCESS_TOKEN_EXPIRE_MINUTES): las revocaciones más viejas ya no afectan a ningún token vigente.
+    """
+
+    def __init__(self, max_token_age_seconds: float = security.ACCESS_TOKEN_EXPIRE_MINUTES * 60):
+        self.max_token_age_seconds = max_token_age_seconds
+        self._revoked: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def revoke_user(self, user_id: int, revoked_at: Optional[float] = None):
+        self.merge([(user_id, revoked_at if revoked_at is not None else time.time())])
+
+    def merge(self, revocations: Iterable[Tuple[int, float]]):
+        """Incorpora revocaciones (user_id, revoked_at), conservando la más reciente de cada usuario."""
+        with self._lock:
+            for user_id, revoked_at in revocations:
+                if revoked_at > self._revoked.get(user_id, 0.0):
+                    self._revoked[user_id] = revoked_at
+            horizon = time.time() - self.max_token_age_seconds
+            for user_id in [user_id for user_id, revoked_at in self._revoked.items() if revoked_at < horizon]:
+                del self._revoked[user_id]
+
+    def is_revoked(self, user_id: int, issued_at: float) -> bool:
+        revoked_at = self._revoked.get(user_id)
+        return revoked_at is not None and issued_at < revoked_at
+
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+token_denylist = TokenDenyList()
+
+
+def principal_from_claims(payload: Dict[str, Any]) -> Optional[User]:
+    """
+    Usuario autenticado armado solo con los claims firmados del token, o None si al token le
+    falta alguno (tokens emitidos antes de incluir `uid`). No está asociado a ninguna sesión:
+    tiene `id`, `username` y `role`, que es lo que usan los guards y los endpoints.
+    """
+    try:
+        user_id, username, role, issued_at = payload["uid"], payload["sub"], payload["role"], payload["iat"]
+    except (KeyError, TypeError):
+        return None
+    if user_id is None or username is None or issued_at is None:
+        return None
+    try:
+        role = UserRole(role)
+    except ValueError:
+        return None
+    return User(id=int(user_id), username=username, role=role, is_active=True)
+
+
+def record_revocation(user_id: int, session: Session) -> float:
+    """
+    Guarda en la sesión (se confirma con el commit del cambio del usuario) la revocación de los
+    tokens del usuario, para que los demás workers la tomen en su próxima sincronización.
+    """
+    revoked_at = time.time()
+    session.merge(UserTokenRevocation(user_id=user_id, revoked_at=revoked_at))
+    return revoked_at
+
+
+def sync_from_database(engine: Engine, denylist: TokenDenyList = token_denylist):
+    """Carga las revocaciones que todavía pueden afectar a tokens vigentes."""
+    horizon = time.time() - denylist.max_token_age_seconds
+    with Session(engine) as session:
+        rows = session.exec(
+            select(UserTokenRevocation.user_id, UserTokenRevocation.revoked_at).where(UserTokenRevocation.revoked_at >= horizon)
+        ).all()
+    denylist.merge(rows)
+
+
+async def sync_periodically(engine: Engine, interval: float = AUTH_DENYLIST_REFRESH_SECONDS, denylist: TokenDenyList = token_denylist):
+    """Tarea de fondo de cada worker: una consulta cada `interval` segundos, ninguna por request."""
+    while True:
+        try:
+            await asyncio.to_thread(sync_from_database, engine, denylist)
+        except Exception:
+            logger.exception("Falló la sincronización de tokens revocados; se reintenta en el próximo intervalo")
+        await asyncio.sleep(interval)
@@ -0,0 +1,135 @@
+# app/services/catalog_cache.py
+
+import os
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response, status
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SASession
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import CatalogVersion
+from app.services import upsert
+
+# Cada cuántos segundos cada worker relee las versiones de los catálogos, para ver los cambios
+# hechos por otros workers; los propios se ven en el request siguiente.
+CATALOG_VERSION_REFRESH_SECONDS = float(os.getenv("CATALOG_VERSION_REFRESH_SECONDS", "2"))
+
+COURSES = "courses"
+INSPECTORS = "inspectors"
+JUDGES = "judges"
+
+# Marca en `session.info` de que la transacción modificó algún catálogo
+_CHANGED_KEY = "catalog_changed"
+
+
+def bump_version(name: str, session: Session):
+    """
+    Incrementa la versión del catálogo `name` en la transacción de `session`. Se llama en cada
+    alta, modificación o baja, antes del commit; al confirmarse, los listados cacheados se regeneran.
+    """
+    # Upsert: el primer cambio concurrente de un catálogo sin fila no choca por clave duplicada
+    upsert.increment_row(session, CatalogVersion, ("name",), {"version": 1}, {"name": name, "updated_at": datetime.utcnow()})
+    session.info[_CHANGED_KEY] = True
+
+
+class CatalogVersions:
+    """
+    Copia local de la tabla catalogversion. Se relee con una sola consulta como mucho cada
+    `refresh_seconds`, o en el request siguiente a un cambio hecho en este proceso.
+    """
+
+    def __init__(self, refresh_seconds: float = CATALOG_VERSION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._versions: Dict[str, Tuple[int, Optional[datetime]]] = {}
+        self._synced_at: Optional[float] = None
+
+    def invalidate(self):
+        self._synced_at = None
+
+    async def get(self, name: str, session: AsyncSession) -> Tuple[int, Optional[datetime]]:
+        """(versión, momento del último cambio) del catálogo; (0, None) si nunca se modificó."""
+        now = time.monotonic()
+        if self._synced_at is None or now - self._synced_at >= self.refresh_seconds:
+            rows = (await session.exec(select(CatalogVersion.name, CatalogVersion.version, CatalogVersion.updated_at))).all()
+            self._versions = {row_name: (version, updated_at) for row_name, version, updated_at in rows}
+            self._synced_at = now
+        return self._versions.get(name, (0, None))
+
+
+catalog_versions = CatalogVersions()
+
+
+@event.listens_for(SASession, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop(_CHANGED_KEY, False):
+        catalog_versions.invalidate()
+
+
+@event.listens_for(SASession, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop(_CHANGED_KEY, None)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110): ignora el prefijo W/ y acepta "*"."""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def not_modified_since(if_modified_since: str, updated_at: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return updated_at.replace(microsecond=0) <= since
+
+
+class CatalogCache:
+    """
+    Respuestas HTTP cacheables del listado de un catálogo.
+    El ETag es la versión del catálogo, así que un `If-None-Match` vigente se responde con 304
+    sin consultar la tabla; el JSON del listado se serializa una vez por versión y se guarda
+    en memoria como bytes.
+    """
+
+    def __init__(self, name: str, loader: Callable[[AsyncSession], Awaitable[List[Dict[str, Any]]]], versions: CatalogVersions = catalog_versions):
+        self.name = name
+        self.loader = loader
+        self.versions = versions
+        self._body: Optional[Tuple[int, bytes]] = None
+
+    def clear(self):
+        self._body = None
+
+    async def response(self, request: Request, session: AsyncSession) -> Response:
+        version, updated_at = await self.versions.get(self.name, session)
+        etag = f'"{self.name}-{version}"'
+        # private: el listado requiere autenticación; no-cache: revalidar siempre con el ETag
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        last_modified = updated_at.replace(tzinfo=timezone.utc) if updated_at else None
+        if last_modified:
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        elif if_modified_since and last_modified and not_modified_since(if_modified_since, last_modified):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        cached = self._body
+        if cached is None or cached[0] != version:
+            cached = self._body = (version, orjson.dumps(await self.loader(session)))
+        return Response(cached[1], media_type="application/json", headers=headers)
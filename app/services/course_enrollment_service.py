@@ -1,11 +1,20 @@
 # app/services/course_enrollment_service.py
 
 from sqlmodel import Session, select
-from typing import List, Optional
-from datetime import date
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import Integer, cast, func, tuple_, update
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from collections import Counter
+from functools import lru_cache
+from datetime import date, timedelta
+from enum import Enum
+import base64
+import csv
+import io
+import json
 
-# Se eliminó 'CourseEnrollmentReportItem' de la importación
-from app.models import CourseEnrollment, CourseEnrollmentCreate, CourseEnrollmentRead, CourseEnrollmentUpdate, CourseEnrollmentStatus, Person, TrafficSafetyCourse, Inspector, Judge
+from app.models import CourseEnrollment, CourseEnrollmentCreate, CourseEnrollmentRead, CourseEnrollmentUpdate, CourseEnrollmentStatus, CourseEnrollmentOrder, CourseEnrollmentFilter, CourseEnrollmentExportFormat, CourseEnrollmentReportItem, CourseEnrollmentBatchOutcome, BulkItemResult, BulkCreateResult, Person, PersonRead, TrafficSafetyCourse, TrafficSafetyCourseRead, User, UserSummary
+from app.services import bulk_service, enrollment_stats_service, serialization
 
 def create_enrollment(enrollment_create: CourseEnrollmentCreate, session: Session) -> CourseEnrollment:
     """
@@ -19,10 +28,38 @@ def create_enrollment(enrollment_create: CourseEnrollmentCreate, session: Sessio
 
     new_enrollment = CourseEnrollment.from_orm(enrollment_create) # Usar from_orm para Pydantic V1
     session.add(new_enrollment)
+    enrollment_stats_service.record_change(session, None, enrollment_stats_service.counter_key(new_enrollment.course_id, new_enrollment.status))
     session.commit()
     session.refresh(new_enrollment)
     return new_enrollment
 
+def create_enrollments_bulk(items: List[Dict[str, Any]], session: Session) -> BulkCreateResult:
+    """
+    Crea muchas inscripciones en una sola transacción.
+    Cada elemento se valida por separado y se verifica que la persona y el curso existan
+    (una consulta por tabla para todo el lote); los válidos se insertan por bloques con executemany.
+    """
+    valid, errors = bulk_service.validate_items(items, CourseEnrollmentCreate)
+
+    person_ids = {enrollment["person_id"] for _, enrollment in valid}
+    course_ids = {enrollment["course_id"] for _, enrollment in valid}
+    existing_persons = set(session.exec(select(Person.id).where(Person.id.in_(person_ids))).all()) if person_ids else set()
+    existing_courses = set(session.exec(select(TrafficSafetyCourse.id).where(TrafficSafetyCourse.id.in_(course_ids))).all()) if course_ids else set()
+
+    to_insert = []
+    for index, enrollment in valid:
+        if enrollment["person_id"] not in existing_persons:
+            errors.append(BulkItemResult(index=index, error=f"person_id {enrollment['person_id']} not found"))
+        elif enrollment["course_id"] not in existing_courses:
+            errors.append(BulkItemResult(index=index, error=f"course_id {enrollment['course_id']} not found"))
+        else:
+            to_insert.append((index, enrollment))
+
+    ids = bulk_service.insert_rows(session, CourseEnrollment, [enrollment for _, enrollment in to_insert])
+    enrollment_stats_service.record_inserted_rows(session, [enrollment for _, enrollment in to_insert])
+    session.commit()
+    return bulk_service.build_result([(index, new_id) for (index, _), new_id in zip(to_insert, ids)], errors)
+
 def get_enrollment_by_id(enrollment_id: int, session: Session) -> Optional[CourseEnrollment]:
     """
     Obtiene una inscripción a curso de seguridad vial por su ID.
@@ -35,21 +72,468 @@ def get_all_enrollments(session: Session) -> List[CourseEnrollment]:
     """
     return session.exec(select(CourseEnrollment)).all()
 
-def update_enrollment(enrollment_id: int, enrollment_update_data: CourseEnrollmentUpdate, session: Session) -> Optional[CourseEnrollment]:
+# Campos de cada inscripción y de sus relaciones en las respuestas, tomados de los esquemas de lectura
+ENROLLMENT_FIELDS = serialization.read_fields(CourseEnrollmentRead, CourseEnrollment)
+# El inspector y el juez son usuarios: cada uno se une con su propio alias de la tabla user
+USER_SUMMARY_FIELDS = serialization.read_fields(UserSummary, User)
+ENROLLMENT_RELATIONS = (
+    ("person", Person.__table__, serialization.read_fields(PersonRead, Person), CourseEnrollment.person_id),
+    ("course", TrafficSafetyCourse.__table__, serialization.read_fields(TrafficSafetyCourseRead, TrafficSafetyCourse), CourseEnrollment.course_id),
+    ("inspector", User.__table__.alias("inspector_user"), USER_SUMMARY_FIELDS, CourseEnrollment.inspector_id),
+    ("judge", User.__table__.alias("judge_user"), USER_SUMMARY_FIELDS, CourseEnrollment.judge_id),
+)
+ENROLLMENT_ROW_SHAPE = serialization.RowShape(ENROLLMENT_FIELDS, [(name, fields) for name, _, fields, _ in ENROLLMENT_RELATIONS])
+
+def select_enrollment_rows(fields: Tuple[str, ...] = ENROLLMENT_FIELDS, relations: tuple = ENROLLMENT_RELATIONS, extra_columns: tuple = ()):
+    """
+    Construye un SELECT plano de inscripciones unido (LEFT JOIN) a sus relaciones.
+    Cada fila trae las columnas `fields` de la inscripción, luego `extra_columns` y luego las
+    columnas de cada relación etiquetadas `<relación>__<campo>`, en una sola consulta.
+    Las filas se convierten con un RowShape equivalente, sin pasar por el ORM ni por Pydantic.
+    """
+    columns = serialization.read_columns(CourseEnrollment, fields) + list(extra_columns)
+    for name, table, model_fields, _ in relations:
+        columns += serialization.read_columns(table, model_fields, name)
+    statement = select(*columns).select_from(CourseEnrollment)
+    for _, table, _, foreign_key in relations:
+        statement = statement.outerjoin(table, table.c.id == foreign_key)
+    return statement
+
+class EnrollmentProjection(NamedTuple):
+    """Campos y relaciones de las inscripciones que pidió el cliente (?fields=, ?include=) y la forma de sus filas."""
+    fields: Tuple[str, ...]
+    relations: tuple
+    shape: serialization.RowShape
+
+    def select(self):
+        """SELECT con solo las columnas de `fields` y un LEFT JOIN por cada relación incluida."""
+        return select_enrollment_rows(self.fields, self.relations)
+
+@lru_cache(maxsize=256)
+def _build_projection(fields: Tuple[str, ...], relation_names: Tuple[str, ...]) -> EnrollmentProjection:
+    relations = tuple(relation for relation in ENROLLMENT_RELATIONS if relation[0] in relation_names)
+    return EnrollmentProjection(fields, relations, serialization.RowShape(fields, [(name, model_fields) for name, _, model_fields, _ in relations]))
+
+ENROLLMENT_RELATION_NAMES = tuple(name for name, *_ in ENROLLMENT_RELATIONS)
+FULL_ENROLLMENT_PROJECTION = _build_projection(ENROLLMENT_FIELDS, ENROLLMENT_RELATION_NAMES)
+
+def _parse_names(value: str, valid: Tuple[str, ...], kind: str) -> List[str]:
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in valid]
+    if unknown:
+        raise ValueError(f"Unknown {kind}: {', '.join(unknown)} (valid: {', '.join(valid)})")
+    return names
+
+def parse_enrollment_projection(fields: Optional[str] = None, include: Optional[str] = None) -> EnrollmentProjection:
+    """
+    Proyección de los parámetros `fields` (campos de la inscripción separados por coma) e
+    `include` (relaciones: person, course, inspector, judge). `id` siempre se incluye.
+    Sin ninguno de los dos se devuelve todo, como antes; con `fields` y sin `include` no se
+    incluye ninguna relación (ni se hace su JOIN).
+    Lanza ValueError si se pide un campo o una relación que no existe.
+    """
+    if fields is None and include is None:
+        return FULL_ENROLLMENT_PROJECTION
+    selected = ENROLLMENT_FIELDS
+    if fields is not None:
+        names = set(_parse_names(fields, ENROLLMENT_FIELDS, "fields")) | {"id"}
+        selected = tuple(name for name in ENROLLMENT_FIELDS if name in names)
+    relation_names: Tuple[str, ...] = ()
+    if include is not None:
+        relation_names = tuple(_parse_names(include, ENROLLMENT_RELATION_NAMES, "include"))
+    return _build_projection(selected, tuple(name for name in ENROLLMENT_RELATION_NAMES if name in relation_names))
+
+def apply_enrollment_filters(statement, filters: CourseEnrollmentFilter):
+    """
+    Agrega al SELECT las condiciones WHERE correspondientes a los filtros informados.
+    """
+    if filters.status is not None:
+        statement = statement.where(CourseEnrollment.status == filters.status)
+    if filters.course_id is not None:
+        statement = statement.where(CourseEnrollment.course_id == filters.course_id)
+    if filters.person_id is not None:
+        statement = statement.where(CourseEnrollment.person_id == filters.person_id)
+    if filters.inspector_id is not None:
+        statement = statement.where(CourseEnrollment.inspector_id == filters.inspector_id)
+    if filters.judge_id is not None:
+        statement = statement.where(CourseEnrollment.judge_id == filters.judge_id)
+    if filters.enrollment_date_from is not None:
+        statement = statement.where(CourseEnrollment.enrollment_date >= filters.enrollment_date_from)
+    if filters.enrollment_date_to is not None:
+        statement = statement.where(CourseEnrollment.enrollment_date <= filters.enrollment_date_to)
+    if filters.expiration_date_from is not None:
+        statement = statement.where(CourseEnrollment.expiration_date >= filters.expiration_date_from)
+    if filters.expiration_date_to is not None:
+        statement = statement.where(CourseEnrollment.expiration_date <= filters.expiration_date_to)
+    return statement
+
+def encode_cursor(order_by: CourseEnrollmentOrder, enrollment: CourseEnrollment) -> str:
+    """
+    Genera un cursor opaco con la clave de la última fila de la página.
+    """
+    if order_by == CourseEnrollmentOrder.EXPIRATION_DATE:
+        key = [enrollment.expiration_date.isoformat(), enrollment.id]
+    else:
+        key = [enrollment.id]
+    raw = json.dumps({"o": order_by.value, "k": key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, order_by: CourseEnrollmentOrder) -> list:
+    """
+    Decodifica un cursor generado por `encode_cursor`.
+    Lanza ValueError si el cursor es inválido o corresponde a otro orden.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        key = data["k"]
+        if data["o"] != order_by.value:
+            raise ValueError("Cursor does not match the requested order")
+        if order_by == CourseEnrollmentOrder.EXPIRATION_DATE:
+            return [date.fromisoformat(key[0]), int(key[1])]
+        return [int(key[0])]
+    except ValueError:
+        raise
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def apply_enrollment_keyset(statement, order_by: CourseEnrollmentOrder, cursor: Optional[str] = None):
+    """
+    Ordena el SELECT según `order_by` y, si hay cursor, lo posiciona después de la última fila vista.
+    La condición sobre la clave usa el índice de la columna de orden, sin OFFSET.
+    """
+    if order_by == CourseEnrollmentOrder.EXPIRATION_DATE:
+        statement = statement.order_by(CourseEnrollment.expiration_date, CourseEnrollment.id)
+        if cursor:
+            last_expiration_date, last_id = decode_cursor(cursor, order_by)
+            statement = statement.where(
+                tuple_(CourseEnrollment.expiration_date, CourseEnrollment.id) > tuple_(last_expiration_date, last_id)
+            )
+    else:
+        statement = statement.order_by(CourseEnrollment.id)
+        if cursor:
+            (last_id,) = decode_cursor(cursor, order_by)
+            statement = statement.where(CourseEnrollment.id > last_id)
+    return statement
+
+def split_keyset_page(rows: list, order_by: CourseEnrollmentOrder, limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Recibe hasta `limit + 1` filas (con columnas `id` y `expiration_date`) y devuelve (filas, next_cursor).
+    La fila extra indica que existe una página siguiente sin necesidad de un COUNT.
+    """
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(order_by, rows[-1])
+    return rows, next_cursor
+
+def fetch_keyset_page(session: Session, statement, order_by: CourseEnrollmentOrder, limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Ejecuta un SELECT ya ordenado y devuelve la página y el cursor siguiente.
+    """
+    rows = session.exec(statement.limit(limit + 1)).all()
+    return split_keyset_page(rows, order_by, limit)
+
+async def fetch_keyset_page_async(session: AsyncSession, statement, order_by: CourseEnrollmentOrder, limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Variante asíncrona de `fetch_keyset_page`.
+    """
+    rows = (await session.exec(statement.limit(limit + 1))).all()
+    return split_keyset_page(rows, order_by, limit)
+
+# Campos que necesita el cursor de cada orden; se leen aunque el cliente no los pida, pero no se devuelven
+KEYSET_FIELDS = {
+    CourseEnrollmentOrder.ID: ("id",),
+    CourseEnrollmentOrder.EXPIRATION_DATE: ("id", "expiration_date"),
+}
+
+def build_enrollments_page_statement(
+    filters: CourseEnrollmentFilter,
+    order_by: CourseEnrollmentOrder,
+    cursor: Optional[str],
+    projection: EnrollmentProjection = FULL_ENROLLMENT_PROJECTION,
+):
+    """
+    Construye el SELECT filtrado y posicionado de una página del listado de inscripciones,
+    con las columnas y JOINs de `projection`. Las claves del cursor que la proyección no incluye
+    van al final de cada fila, después de las columnas que lee `projection.shape`, que las ignora.
+    """
+    keys = [name for name in KEYSET_FIELDS[order_by] if name not in projection.fields]
+    statement = projection.select().add_columns(*serialization.read_columns(CourseEnrollment, keys))
+    return apply_enrollment_keyset(apply_enrollment_filters(statement, filters), order_by, cursor)
+
+def get_enrollments_page(
+    session: Session,
+    filters: CourseEnrollmentFilter,
+    order_by: CourseEnrollmentOrder = CourseEnrollmentOrder.ID,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    projection: EnrollmentProjection = FULL_ENROLLMENT_PROJECTION,
+) -> Dict[str, Any]:
+    """
+    Obtiene una página de inscripciones usando paginación por clave (keyset).
+    Los filtros y el orden se resuelven en SQL; el cursor apunta a la última fila devuelta,
+    por lo que el costo de cada página no depende de su profundidad.
+    Devuelve un diccionario con la forma de CourseEnrollmentPage (solo con los campos y
+    relaciones de `projection`), listo para serializar.
+    """
+    statement = build_enrollments_page_statement(filters, order_by, cursor, projection)
+    rows, next_cursor = fetch_keyset_page(session, statement, order_by, limit)
+    return {"items": projection.shape.to_dicts(rows), "next_cursor": next_cursor}
+
+async def get_enrollments_page_async(
+    session: AsyncSession,
+    filters: CourseEnrollmentFilter,
+    order_by: CourseEnrollmentOrder = CourseEnrollmentOrder.ID,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    projection: EnrollmentProjection = FULL_ENROLLMENT_PROJECTION,
+) -> Dict[str, Any]:
+    """
+    Variante asíncrona de `get_enrollments_page`.
+    """
+    statement = build_enrollments_page_statement(filters, order_by, cursor, projection)
+    rows, next_cursor = await fetch_keyset_page_async(session, statement, order_by, limit)
+    return {"items": projection.shape.to_dicts(rows), "next_cursor": next_cursor}
+
+def get_enrollment_read(enrollment_id: int, session: Session) -> Optional[Dict[str, Any]]:
+    """
+    Obtiene una inscripción por su ID con sus relaciones, en una sola consulta,
+    como diccionario con la forma de CourseEnrollmentRead.
+    """
+    row = session.exec(select_enrollment_rows().where(CourseEnrollment.id == enrollment_id)).first()
+    return ENROLLMENT_ROW_SHAPE.to_dict(row) if row else None
+
+async def get_enrollment_read_async(
+    enrollment_id: int,
+    session: AsyncSession,
+    projection: EnrollmentProjection = FULL_ENROLLMENT_PROJECTION,
+) -> Optional[Dict[str, Any]]:
+    """
+    Variante asíncrona de `get_enrollment_read`, con los campos y relaciones de `projection`.
+    """
+    row = (await session.exec(projection.select().where(CourseEnrollment.id == enrollment_id))).first()
+    return projection.shape.to_dict(row) if row else None
+
+async def get_enrollments_read_async(
+    filters: CourseEnrollmentFilter,
+    session: AsyncSession,
+    projection: EnrollmentProjection = FULL_ENROLLMENT_PROJECTION,
+) -> List[Dict[str, Any]]:
+    """
+    Obtiene todas las inscripciones que cumplen los filtros, ordenadas por ID, con los campos
+    y relaciones de `projection` (por defecto, todos).
+    """
+    statement = apply_enrollment_filters(projection.select(), filters).order_by(CourseEnrollment.id)
+    rows = (await session.exec(statement)).all()
+    return projection.shape.to_dicts(rows)
+
+def days_until_expression(column, today: date, dialect_name: str):
+    """
+    Expresión SQL con los días que faltan desde `today` hasta la fecha de `column` (negativo si ya pasó).
+    """
+    if dialect_name == "sqlite":
+        return cast(func.julianday(column) - func.julianday(today), Integer)
+    # En PostgreSQL la resta de dos fechas ya devuelve la cantidad de días
+    return cast(column - today, Integer)
+
+REPORT_FIELDS = serialization.read_fields(CourseEnrollmentReportItem, CourseEnrollment)
+REPORT_RELATIONS = ENROLLMENT_RELATIONS[:2]  # persona y curso
+REPORT_ROW_SHAPE = serialization.RowShape(
+    REPORT_FIELDS + ("days_until_expiration", "is_expired"),
+    [(name, fields) for name, _, fields, _ in REPORT_RELATIONS],
+)
+
+def build_report_statement(today: date, days_until_expiration: int, dialect_name: str, cursor: Optional[str]):
+    """
+    Construye el SELECT del reporte: rango sobre el índice de `expiration_date`, JOIN a persona y curso,
+    y los campos `days_until_expiration` e `is_expired` calculados en SQL.
+    """
+    statement = select_enrollment_rows(
+        REPORT_FIELDS,
+        REPORT_RELATIONS,
+        extra_columns=(
+            days_until_expression(CourseEnrollment.expiration_date, today, dialect_name).label("days_until_expiration"),
+            (CourseEnrollment.expiration_date < today).label("is_expired"),
+        ),
+    ).where(CourseEnrollment.expiration_date <= today + timedelta(days=days_until_expiration))
+    return apply_enrollment_keyset(statement, CourseEnrollmentOrder.EXPIRATION_DATE, cursor)
+
+def get_expiring_or_expired_report(
+    session: Session,
+    days_until_expiration: int = 30,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    today: Optional[date] = None,
+) -> Dict[str, Any]:
+    """
+    Reporte de inscripciones vencidas o que vencen dentro de `days_until_expiration` días.
+    Se resuelve con un rango sobre el índice de `expiration_date`, con JOIN a persona y curso,
+    y calcula `days_until_expiration` e `is_expired` en SQL. Los resultados se paginan por
+    (expiration_date, id), empezando por las inscripciones vencidas hace más tiempo.
+    Devuelve un diccionario con la forma de CourseEnrollmentReportPage.
+    """
+    statement = build_report_statement(today or date.today(), days_until_expiration, session.get_bind().dialect.name, cursor)
+    rows, next_cursor = fetch_keyset_page(session, statement, CourseEnrollmentOrder.EXPIRATION_DATE, limit)
+    return {"items": REPORT_ROW_SHAPE.to_dicts(rows), "next_cursor": next_cursor}
+
+async def get_expiring_or_expired_report_async(
+    session: AsyncSession,
+    days_until_expiration: int = 30,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    today: Optional[date] = None,
+) -> Dict[str, Any]:
+    """
+    Variante asíncrona de `get_expiring_or_expired_report`.
+    """
+    statement = build_report_statement(today or date.today(), days_until_expiration, session.get_bind().dialect.name, cursor)
+    rows, next_cursor = await fetch_keyset_page_async(session, statement, CourseEnrollmentOrder.EXPIRATION_DATE, limit)
+    return {"items": REPORT_ROW_SHAPE.to_dicts(rows), "next_cursor": next_cursor}
+
+# Cantidad de filas que se leen del cursor del servidor y se envían por cada bloque de la exportación
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    "id", "person_id", "person_name", "person_dni", "course_id", "course_name",
+    "enrollment_date", "completion_date", "deadline_date", "expiration_date",
+    "status", "inspector_id", "judge_id",
+)
+
+def select_enrollment_export():
+    """
+    Construye el SELECT plano de la exportación: columnas de la inscripción más
+    nombre/DNI de la persona y nombre del curso, resueltos con JOIN en SQL.
+    """
+    return (
+        select(
+            CourseEnrollment.id,
+            CourseEnrollment.person_id,
+            Person.name.label("person_name"),
+            Person.dni.label("person_dni"),
+            CourseEnrollment.course_id,
+            TrafficSafetyCourse.name.label("course_name"),
+            CourseEnrollment.enrollment_date,
+            CourseEnrollment.completion_date,
+            CourseEnrollment.deadline_date,
+            CourseEnrollment.expiration_date,
+            CourseEnrollment.status,
+            CourseEnrollment.inspector_id,
+            CourseEnrollment.judge_id,
+        )
+        .outerjoin(Person, Person.id == CourseEnrollment.person_id)
+        .outerjoin(TrafficSafetyCourse, TrafficSafetyCourse.id == CourseEnrollment.course_id)
+        .order_by(CourseEnrollment.id)
+    )
+
+def _export_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+def iter_enrollment_export_batches(session: Session, filters: CourseEnrollmentFilter, batch_size: Optional[int] = None) -> Iterator[List[tuple]]:
+    """
+    Recorre las inscripciones a exportar en bloques de `batch_size` filas (por defecto EXPORT_BATCH_SIZE).
+    Usa `yield_per` para que el driver lea del cursor del servidor por partes,
+    por lo que la memoria usada no depende del total de filas.
+    """
+    statement = apply_enrollment_filters(select_enrollment_export(), filters)
+    result = session.exec(statement.execution_options(yield_per=batch_size or EXPORT_BATCH_SIZE))
+    for batch in result.partitions():
+        yield [tuple(_export_value(value) for value in row) for row in batch]
+
+def stream_enrollment_export(
+    session: Session,
+    filters: CourseEnrollmentFilter,
+    export_format: CourseEnrollmentExportFormat,
+    batch_size: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Genera la exportación de inscripciones en NDJSON (un objeto por línea) o CSV con encabezado.
+    Cada bloque de filas se emite como un único fragmento de texto.
+    """
+    if export_format == CourseEnrollmentExportFormat.CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+        for batch in iter_enrollment_export_batches(session, filters, batch_size):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(batch)
+            yield buffer.getvalue()
+    else:
+        for batch in iter_enrollment_export_batches(session, filters, batch_size):
+            yield "".join(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n" for row in batch)
+
+async def get_enrollment_stats_async(session: AsyncSession) -> Dict[str, Any]:
+    """Conteos de inscripciones por estado, por curso y por estado y curso (ver enrollment_stats_service)."""
+    return await enrollment_stats_service.get_enrollment_stats_async(session)
+
+class EnrollmentVersionMismatch(Exception):
+    """La inscripción no está en la versión esperada (If-Match) o cambió mientras se modificaba."""
+
+def enrollment_etag(enrollment_id: int, version: int) -> str:
+    """ETag fuerte de una inscripción: cambia con cada modificación de la fila."""
+    return f'"enrollment-{enrollment_id}-{version}"'
+
+def if_match_versions(if_match: Optional[str], enrollment_id: int) -> Optional[List[int]]:
+    """
+    Versiones que acepta un encabezado If-Match, o None si no impone condición (ausente o "*").
+    Los ETags débiles, mal formados o de otra inscripción no aceptan ninguna versión.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    prefix = f'"enrollment-{enrollment_id}-'
+    versions = []
+    for candidate in if_match.split(","):
+        candidate = candidate.strip()
+        number = candidate[len(prefix):-1]
+        if candidate.startswith(prefix) and candidate.endswith('"') and number.isdigit():
+            versions.append(int(number))
+    return versions
+
+def update_enrollment(
+    enrollment_id: int,
+    enrollment_update_data: CourseEnrollmentUpdate,
+    session: Session,
+    expected_versions: Optional[List[int]] = None,
+) -> Optional[Dict[str, Any]]:
     """
     Actualiza una inscripción a curso de seguridad vial existente por su ID.
+    La escritura exige que la versión siga siendo la leída, así que no pisa una transición
+    concurrente: en ese caso, o si la versión no es una de `expected_versions` (If-Match),
+    lanza EnrollmentVersionMismatch. Devuelve la inscripción con sus relaciones.
     """
-    enrollment = session.get(CourseEnrollment, enrollment_id)
-    if not enrollment:
+    current = session.exec(
+        select(CourseEnrollment.course_id, CourseEnrollment.status, CourseEnrollment.version).where(CourseEnrollment.id == enrollment_id)
+    ).first()
+    if not current:
         return None
-    
+    course_id, current_status, version = current
+    if expected_versions is not None and version not in expected_versions:
+        raise EnrollmentVersionMismatch()
+
     # Usar .dict(exclude_unset=True) para Pydantic V1
-    for key, value in enrollment_update_data.dict(exclude_unset=True).items():
-        setattr(enrollment, key, value)
-    
-    session.add(enrollment)
+    changes = enrollment_update_data.dict(exclude_unset=True)
+    result = session.execute(
+        update(CourseEnrollment)
+        .where(CourseEnrollment.id == enrollment_id, CourseEnrollment.version == version)
+        .values(**changes, version=version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        session.rollback()
+        raise EnrollmentVersionMismatch()
+    enrollment_stats_service.record_change(
+        session,
+        enrollment_stats_service.counter_key(course_id, current_status),
+        enrollment_stats_service.counter_key(course_id, changes.get("status", current_status)),
+    )
+    enrollment = get_enrollment_read(enrollment_id, session)
     session.commit()
-    session.refresh(enrollment)
     return enrollment
 
 def delete_enrollment(enrollment_id: int, session: Session) -> bool:
@@ -60,42 +544,165 @@ def delete_enrollment(enrollment_id: int, session: Session) -> bool:
     if not enrollment:
         return False
     session.delete(enrollment)
+    enrollment_stats_service.record_change(session, enrollment_stats_service.counter_key(enrollment.course_id, enrollment.status), None)
     session.commit()
     return True
 
-def complete_enrollment(enrollment_id: int, inspector_id: int, session: Session) -> Optional[CourseEnrollment]:
+def transition_enrollment(
+    enrollment_id: int,
+    from_status: CourseEnrollmentStatus,
+    to_status: CourseEnrollmentStatus,
+    values: Dict[str, Any],
+    session: Session,
+    expected_versions: Optional[List[int]] = None,
+) -> Optional[Dict[str, Any]]:
     """
-    Marca una inscripción como 'completed' y asigna un inspector.
+    Pasa una inscripción de `from_status` a `to_status` (y guarda `values`) con un único UPDATE
+    condicional, `WHERE id = ? AND status = ?` (más `AND version IN (...)` con If-Match), sin leerla
+    antes: de dos pedidos concurrentes sobre la misma inscripción solo uno aplica la transición.
+
+    Devuelve la inscripción actualizada con sus relaciones, o None si no existe o no estaba en
+    `from_status`. Lanza EnrollmentVersionMismatch si solo falló la versión.
     """
-    enrollment = session.get(CourseEnrollment, enrollment_id)
-    if not enrollment or enrollment.status != CourseEnrollmentStatus.PENDING:
+    conditions = [CourseEnrollment.id == enrollment_id, CourseEnrollment.status == from_status]
+    if expected_versions is not None:
+        conditions.append(CourseEnrollment.version.in_(expected_versions))
+    course_id = session.execute(
+        update(CourseEnrollment)
+        .where(*conditions)
+        .values(**values, status=to_status, version=CourseEnrollment.version + 1)
+        .returning(CourseEnrollment.course_id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if course_id is None:
+        session.rollback()
+        # Solo en el camino de error: distingue el 412 de If-Match del 404
+        if expected_versions is not None:
+            current_status = session.exec(select(CourseEnrollment.status).where(CourseEnrollment.id == enrollment_id)).first()
+            if current_status == from_status:
+                raise EnrollmentVersionMismatch()
         return None
-    
-    enrollment.status = CourseEnrollmentStatus.COMPLETED
-    enrollment.completion_date = date.today()
-    enrollment.inspector_id = inspector_id
-    
-    session.add(enrollment)
+
+    enrollment_stats_service.record_change(session, (course_id, from_status), (course_id, to_status))
+    enrollment = get_enrollment_read(enrollment_id, session)
     session.commit()
-    session.refresh(enrollment)
     return enrollment
 
-def use_enrollment(enrollment_id: int, judge_id: int, session: Session) -> Optional[CourseEnrollment]:
+def complete_enrollment(enrollment_id: int, inspector_id: int, session: Session, expected_versions: Optional[List[int]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Marca una inscripción 'pending' como 'completed' y asigna un inspector.
+    """
+    return transition_enrollment(
+        enrollment_id,
+        CourseEnrollmentStatus.PENDING,
+        CourseEnrollmentStatus.COMPLETED,
+        {"completion_date": date.today(), "inspector_id": inspector_id},
+        session,
+        expected_versions,
+    )
+
+def use_enrollment(enrollment_id: int, judge_id: int, session: Session, expected_versions: Optional[List[int]] = None) -> Optional[Dict[str, Any]]:
     """
     Marca una inscripción como 'used'.
     Solo si el estado es 'completed'.
     """
-    enrollment = session.get(CourseEnrollment, enrollment_id)
-    if not enrollment or enrollment.status != CourseEnrollmentStatus.COMPLETED:
-        return None
-    
-    enrollment.status = CourseEnrollmentStatus.USED
-    enrollment.judge_id = judge_id
-    
-    session.add(enrollment)
+    return transition_enrollment(
+        enrollment_id,
+        CourseEnrollmentStatus.COMPLETED,
+        CourseEnrollmentStatus.USED,
+        {"judge_id": judge_id},
+        session,
+        expected_versions,
+    )
+
+def transition_enrollments_batch(
+    enrollment_ids: List[int],
+    from_status: CourseEnrollmentStatus,
+    to_status: CourseEnrollmentStatus,
+    values: Dict[str, Any],
+    session: Session,
+) -> Dict[str, Any]:
+    """
+    Aplica la transición de `transition_enrollment` a muchas inscripciones en una sola transacción:
+    un UPDATE condicional `WHERE id IN (...) AND status = ?` por cada bloque de BULK_CHUNK_SIZE IDs,
+    los contadores de todo el lote juntos y una sola consulta para clasificar las que no cambiaron.
+
+    Devuelve un resultado por ID (sin repetir, en el orden recibido): `transitioned`, `wrong_state`
+    (con su estado actual) o `not_found`, con la forma de CourseEnrollmentBatchResult.
+    Lanza ValueError si la lista supera BULK_MAX_ITEMS.
+    """
+    if len(enrollment_ids) > bulk_service.BULK_MAX_ITEMS:
+        raise ValueError(f"Too many items: {len(enrollment_ids)} (max {bulk_service.BULK_MAX_ITEMS})")
+    ids = list(dict.fromkeys(enrollment_ids))
+
+    transitioned: Dict[int, int] = {}
+    deltas: Dict[Any, int] = Counter()
+    for start in range(0, len(ids), bulk_service.BULK_CHUNK_SIZE):
+        rows = session.execute(
+            update(CourseEnrollment)
+            .where(CourseEnrollment.id.in_(ids[start:start + bulk_service.BULK_CHUNK_SIZE]), CourseEnrollment.status == from_status)
+            .values(**values, status=to_status, version=CourseEnrollment.version + 1)
+            .returning(CourseEnrollment.id, CourseEnrollment.course_id, CourseEnrollment.version)
+            .execution_options(synchronize_session=False)
+        ).all()
+        for enrollment_id, course_id, version in rows:
+            transitioned[enrollment_id] = version
+            deltas[(course_id, from_status)] -= 1
+            deltas[(course_id, to_status)] += 1
+    enrollment_stats_service.apply_deltas(session, deltas)
+
+    # Dentro de la misma transacción: el estado informado es el que dejó el lote
+    unchanged = [enrollment_id for enrollment_id in ids if enrollment_id not in transitioned]
+    current = {}
+    for start in range(0, len(unchanged), bulk_service.BULK_CHUNK_SIZE):
+        current.update(
+            (enrollment_id, (enrollment_status, version))
+            for enrollment_id, enrollment_status, version in session.exec(
+                select(CourseEnrollment.id, CourseEnrollment.status, CourseEnrollment.version)
+                .where(CourseEnrollment.id.in_(unchanged[start:start + bulk_service.BULK_CHUNK_SIZE]))
+            )
+        )
     session.commit()
-    session.refresh(enrollment)
-    return enrollment
+
+    results = []
+    for enrollment_id in ids:
+        if enrollment_id in transitioned:
+            results.append({"id": enrollment_id, "outcome": CourseEnrollmentBatchOutcome.TRANSITIONED.value, "status": to_status.value, "version": transitioned[enrollment_id]})
+        elif enrollment_id in current:
+            enrollment_status, version = current[enrollment_id]
+            results.append({"id": enrollment_id, "outcome": CourseEnrollmentBatchOutcome.WRONG_STATE.value, "status": enrollment_status.value, "version": version})
+        else:
+            results.append({"id": enrollment_id, "outcome": CourseEnrollmentBatchOutcome.NOT_FOUND.value, "status": None, "version": None})
+    return {
+        "transitioned": len(transitioned),
+        "wrong_state": len(current),
+        "not_found": len(ids) - len(transitioned) - len(current),
+        "results": results,
+    }
+
+def complete_enrollments_batch(enrollment_ids: List[int], inspector_id: int, session: Session) -> Dict[str, Any]:
+    """
+    Variante por lotes de `complete_enrollment` (p. ej. al cerrar una clase).
+    """
+    return transition_enrollments_batch(
+        enrollment_ids,
+        CourseEnrollmentStatus.PENDING,
+        CourseEnrollmentStatus.COMPLETED,
+        {"completion_date": date.today(), "inspector_id": inspector_id},
+        session,
+    )
+
+def use_enrollments_batch(enrollment_ids: List[int], judge_id: int, session: Session) -> Dict[str, Any]:
+    """
+    Variante por lotes de `use_enrollment`.
+    """
+    return transition_enrollments_batch(
+        enrollment_ids,
+        CourseEnrollmentStatus.COMPLETED,
+        CourseEnrollmentStatus.USED,
+        {"judge_id": judge_id},
+        session,
+    )
 
 def get_enrollments_by_person_id(person_id: int, session: Session) -> List[CourseEnrollment]:
     """
@@ -0,0 +1,128 @@
+# app/services/enrollment_stats_service.py
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, text
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import CourseEnrollment, CourseEnrollmentStatus, EnrollmentCounter
+from app.services import upsert
+
+# (course_id, status) de un contador
+CounterKey = Tuple[int, CourseEnrollmentStatus]
+
+_STATUS_ORDER = {enrollment_status: position for position, enrollment_status in enumerate(CourseEnrollmentStatus)}
+
+
+def counter_key(course_id: int, enrollment_status: Any) -> CounterKey:
+    """Clave de contador; acepta el estado como enum o como su valor ("pending")."""
+    return course_id, CourseEnrollmentStatus(enrollment_status or CourseEnrollmentStatus.PENDING)
+
+
+def apply_deltas(session: Session, deltas: Dict[CounterKey, int]):
+    """
+    Suma `deltas` a los contadores dentro de la transacción de la sesión (no hace commit).
+    Cada contador se crea o incrementa con un upsert, así que dos transacciones que agregan
+    el primer contador de un curso a la vez no chocan por clave duplicada.
+    Los contadores se actualizan siempre en el mismo orden para que dos transacciones
+    concurrentes no se bloqueen mutuamente.
+    """
+    for (course_id, enrollment_status), delta in sorted(deltas.items(), key=lambda item: (item[0][0], _STATUS_ORDER[item[0][1]])):
+        if delta == 0:
+            continue
+        upsert.increment_row(
+            session, EnrollmentCounter, ("course_id", "status"), {"count": delta},
+            {"course_id": course_id, "status": enrollment_status},
+        )
+
+
+def record_change(session: Session, before: Optional[CounterKey], after: Optional[CounterKey]):
+    """
+    Registra que una inscripción pasó de `before` a `after` (None en un alta o una baja).
+    Se llama antes del commit del cambio, para que la inscripción y los contadores se
+    confirmen juntos.
+    """
+    if before == after:
+        return
+    deltas: Dict[CounterKey, int] = Counter()
+    if before is not None:
+        deltas[before] -= 1
+    if after is not None:
+        deltas[after] += 1
+    apply_deltas(session, deltas)
+
+
+def record_inserted_rows(session: Session, rows: Iterable[Dict[str, Any]]):
+    """Registra las inscripciones de un alta masiva (filas ya validadas de CourseEnrollmentCreate)."""
+    apply_deltas(session, Counter(counter_key(row["course_id"], row.get("status")) for row in rows))
+
+
+async def get_enrollment_stats_async(session: AsyncSession) -> Dict[str, Any]:
+    """
+    Cantidad de inscripciones en total, por estado, por curso y por estado y curso.
+    Lee solo la tabla de contadores: el costo depende de la cantidad de combinaciones
+    curso × estado, no de la cantidad de inscripciones.
+    """
+    rows = (await session.exec(
+        select(EnrollmentCounter.course_id, EnrollmentCounter.status, EnrollmentCounter.count).where(EnrollmentCounter.count != 0)
+    )).all()
+    rows = sorted(rows, key=lambda row: (row[0], _STATUS_ORDER[row[1]]))
+
+    by_status = {enrollment_status.value: 0 for enrollment_status in CourseEnrollmentStatus}
+    by_course: Dict[int, int] = {}
+    by_status_course = []
+    for course_id, enrollment_status, count in rows:
+        by_status[enrollment_status.value] += count
+        by_course[course_id] = by_course.get(course_id, 0) + count
+        by_status_course.append({"course_id": course_id, "status": enrollment_status.value, "count": count})
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_course": [{"course_id": course_id, "count": count} for course_id, count in by_course.items()],
+        "by_status_course": by_status_course,
+    }
+
+
+def rebuild_counters(session: Session) -> List[Tuple[int, CourseEnrollmentStatus, int, int]]:
+    """
+    Recalcula los contadores desde courseenrollment y los reemplaza en una sola transacción.
+    Devuelve las diferencias corregidas como (course_id, status, guardado, real).
+
+    Primero se toma el bloqueo de escritura (en SQLite, el DELETE; en PostgreSQL, LOCK TABLE),
+    así las escrituras concurrentes esperan y sus deltas se aplican después sobre los valores
+    recalculados, sin perderse ni contarse dos veces.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(text(f"LOCK TABLE {EnrollmentCounter.__tablename__} IN EXCLUSIVE MODE"))
+    stored = {
+        (course_id, enrollment_status): count
+        for course_id, enrollment_status, count in session.execute(
+            delete(EnrollmentCounter).returning(EnrollmentCounter.course_id, EnrollmentCounter.status, EnrollmentCounter.count)
+        )
+    }
+    actual = {
+        (course_id, enrollment_status): count
+        for course_id, enrollment_status, count in session.execute(
+            select(CourseEnrollment.course_id, CourseEnrollment.status, func.count()).group_by(CourseEnrollment.course_id, CourseEnrollment.status)
+        )
+    }
+    if actual:
+        session.execute(
+            insert(EnrollmentCounter),
+            [{"course_id": course_id, "status": enrollment_status, "count": count} for (course_id, enrollment_status), count in actual.items()],
+        )
+    session.commit()
+
+    drift = []
+    for key in sorted(stored.keys() | actual.keys(), key=lambda key: (key[0], _STATUS_ORDER[key[1]])):
+        if stored.get(key, 0) != actual.get(key, 0):
+            drift.append((key[0], key[1], stored.get(key, 0), actual.get(key, 0)))
+    return drift
+
+
+def counters_missing(session: Session) -> bool:
+    """True si hay inscripciones pero ningún contador (base creada antes de la tabla de contadores)."""
+    has_counters = session.exec(select(EnrollmentCounter.course_id).limit(1)).first() is not None
+    return not has_counters and session.exec(select(CourseEnrollment.id).limit(1)).first() is not None
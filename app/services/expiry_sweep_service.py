@@ -0,0 +1,139 @@
+# app/services/expiry_sweep_service.py
+
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy import update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.models import CourseEnrollment, CourseEnrollmentStatus, ExpirySweepWatermark
+from app.monitoring import metrics
+from app.services import enrollment_stats_service
+
+logger = logging.getLogger(__name__)
+
+# Inscripciones que cambia cada transacción del barrido: lotes chicos mantienen cortos los
+# bloqueos de escritura para que los endpoints no esperen
+EXPIRY_SWEEP_BATCH_SIZE = int(os.getenv("EXPIRY_SWEEP_BATCH_SIZE", "500"))
+# Pausa entre lotes, para dejar pasar a las demás escrituras
+EXPIRY_SWEEP_PAUSE_SECONDS = float(os.getenv("EXPIRY_SWEEP_PAUSE_SECONDS", "0.05"))
+# Cada cuántos segundos barre la propia API; 0 (por defecto) lo deja a sweep_expired_enrollments.py
+EXPIRY_SWEEP_INTERVAL_SECONDS = float(os.getenv("EXPIRY_SWEEP_INTERVAL_SECONDS", "0"))
+
+
+class SweepRule(NamedTuple):
+    """Las inscripciones en `from_status` cuya fecha `date_field` ya pasó pasan a `to_status`."""
+    name: str
+    from_status: CourseEnrollmentStatus
+    to_status: CourseEnrollmentStatus
+    date_field: str
+
+
+SWEEP_RULES = (
+    # Plazo para completar el curso vencido
+    SweepRule("pending_deadline", CourseEnrollmentStatus.PENDING, CourseEnrollmentStatus.INCOMPLETE, "deadline_date"),
+    # Certificado completado y no usado cuyo vencimiento pasó
+    SweepRule("completed_expiration", CourseEnrollmentStatus.COMPLETED, CourseEnrollmentStatus.EXPIRED, "expiration_date"),
+)
+
+
+def get_watermark(session: Session, rule: SweepRule) -> Optional[date]:
+    watermark = session.get(ExpirySweepWatermark, rule.name)
+    return watermark.swept_through if watermark else None
+
+
+def _advance_watermark(session: Session, rule: SweepRule, swept_through: date):
+    watermark = session.get(ExpirySweepWatermark, rule.name)
+    if watermark is None:
+        session.add(ExpirySweepWatermark(rule=rule.name, swept_through=swept_through))
+    elif swept_through > watermark.swept_through:
+        watermark.swept_through = swept_through
+        watermark.updated_at = datetime.utcnow()
+        session.add(watermark)
+
+
+def due_enrollments_statement(rule: SweepRule, cutoff: date, watermark: Optional[date], limit: int):
+    """(id, fecha) de las próximas `limit` inscripciones vencidas, en orden de fecha; usa el índice (status, fecha)."""
+    column = getattr(CourseEnrollment, rule.date_field)
+    statement = select(CourseEnrollment.id, column).where(CourseEnrollment.status == rule.from_status, column <= cutoff)
+    if watermark is not None:
+        statement = statement.where(column > watermark)
+    return statement.order_by(column, CourseEnrollment.id).limit(limit)
+
+
+def sweep_rule(
+    engine: Engine,
+    rule: SweepRule,
+    today: Optional[date] = None,
+    batch_size: int = EXPIRY_SWEEP_BATCH_SIZE,
+    pause_seconds: float = EXPIRY_SWEEP_PAUSE_SECONDS,
+    full: bool = False,
+) -> int:
+    """
+    Aplica una regla en lotes de `batch_size`, cada uno en su propia transacción, y devuelve
+    cuántas inscripciones cambió.
+
+    Solo busca fechas posteriores a la marca de agua de la regla (todas, con `full`), por el
+    índice (status, fecha). Cada lote cambia el estado con la condición `status = from_status`,
+    así que una inscripción modificada mientras tanto por la API queda como la dejó la API;
+    los contadores de /enrollments/stats y la marca de agua se actualizan en la misma transacción,
+    por lo que un barrido interrumpido sigue desde el último lote confirmado.
+    """
+    today = today or date.today()
+    cutoff = today - timedelta(days=1)  # vence al terminar el día de la fecha
+    with Session(engine) as session:
+        watermark = None if full else get_watermark(session, rule)
+
+    updated = 0
+    while True:
+        with Session(engine) as session:
+            rows = session.exec(due_enrollments_statement(rule, cutoff, watermark, batch_size)).all()
+            if rows:
+                course_ids = session.execute(
+                    update(CourseEnrollment)
+                    .where(CourseEnrollment.id.in_([enrollment_id for enrollment_id, _ in rows]), CourseEnrollment.status == rule.from_status)
+                    .values(status=rule.to_status, version=CourseEnrollment.version + 1)
+                    .returning(CourseEnrollment.course_id)
+                    .execution_options(synchronize_session=False)
+                ).scalars().all()
+                deltas = Counter()
+                for course_id in course_ids:
+                    deltas[(course_id, rule.from_status)] -= 1
+                    deltas[(course_id, rule.to_status)] += 1
+                enrollment_stats_service.apply_deltas(session, deltas)
+                updated += len(course_ids)
+
+            finished = len(rows) < batch_size
+            # Con el lote lleno puede quedar otra inscripción con la misma fecha que la última
+            _advance_watermark(session, rule, cutoff if finished else rows[-1][1] - timedelta(days=1))
+            session.commit()
+
+        if rows:
+            metrics.ENROLLMENT_SWEEP_TRANSITIONS.inc((rule.to_status.value,), len(course_ids))
+        if finished:
+            return updated
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+
+def sweep_expired_enrollments(engine: Engine, today: Optional[date] = None, **options) -> Dict[str, int]:
+    """Aplica todas las reglas de vencimiento; devuelve, por regla, cuántas inscripciones cambió."""
+    return {rule.name: sweep_rule(engine, rule, today, **options) for rule in SWEEP_RULES}
+
+
+async def sweep_periodically(engine: Engine, interval: float = EXPIRY_SWEEP_INTERVAL_SECONDS):
+    """Tarea de fondo de la API: barre cada `interval` segundos en un hilo, sin bloquear el event loop."""
+    while True:
+        try:
+            result = await asyncio.to_thread(sweep_expired_enrollments, engine)
+            if any(result.values()):
+                logger.info("Barrido de vencimientos: %s", result)
+        except Exception:
+            logger.exception("Falló el barrido de vencimientos; se reintenta en el próximo intervalo")
+        await asyncio.sleep(interval)
@@ -0,0 +1,204 @@
+# app/services/import_service.py
+
+from sqlmodel import Session, select
+from sqlalchemy.engine import Engine
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from datetime import datetime
+from itertools import islice
+from pydantic import ValidationError
+import csv
+import json
+import os
+
+from app.models import Person, PersonCreate, TrafficSafetyCourse, TrafficSafetyCourseCreate, CourseEnrollment, CourseEnrollmentCreate, ImportKind, ImportFileFormat, ImportCheckpoint
+from app.services import bulk_service, catalog_cache, enrollment_stats_service
+
+# Filas por transacción (cada lote se confirma junto con el checkpoint)
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+# Filas leídas por vez al construir los índices en memoria
+INDEX_FETCH_SIZE = 50_000
+
+def detect_format(path: str) -> ImportFileFormat:
+    """Deduce el formato por la extensión del archivo (.csv, .jsonl/.ndjson)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return ImportFileFormat.CSV
+    if extension in (".jsonl", ".ndjson"):
+        return ImportFileFormat.JSONL
+    raise ValueError(f"Cannot detect the format of {path}; use .csv or .jsonl")
+
+def iter_records(path: str, file_format: ImportFileFormat) -> Iterator[Union[Dict[str, Any], str]]:
+    """
+    Recorre el archivo registro por registro sin cargarlo en memoria.
+    En CSV devuelve diccionarios por encabezado; en JSONL devuelve cada línea sin decodificar,
+    para que una línea inválida se rechace sin cortar la importación.
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if file_format == ImportFileFormat.CSV:
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield line
+
+def _clean(record: Union[Dict[str, Any], str]) -> Dict[str, Any]:
+    """Decodifica el registro y descarta los valores vacíos para que apliquen los valores por defecto."""
+    if isinstance(record, str):
+        record = json.loads(record)
+        if not isinstance(record, dict):
+            raise ValueError("Expected a JSON object")
+    return {key: value for key, value in record.items() if value not in ("", None)}
+
+def build_person_index(session: Session) -> Dict[str, int]:
+    """Índice DNI -> id de todas las personas, leído de la base por partes una sola vez."""
+    statement = select(Person.dni, Person.id).execution_options(yield_per=INDEX_FETCH_SIZE)
+    index = {}
+    for dni, person_id in session.exec(statement):
+        index.setdefault(dni, person_id)
+    return index
+
+def build_course_index(session: Session) -> Dict[str, int]:
+    """Índice nombre -> id de los cursos."""
+    index = {}
+    for name, course_id in session.exec(select(TrafficSafetyCourse.name, TrafficSafetyCourse.id)):
+        index.setdefault(name, course_id)
+    return index
+
+def _person_row(data: Dict[str, Any], indexes: Dict[str, Any]) -> Dict[str, Any]:
+    person = bulk_service.validate_row(data, PersonCreate)
+    if person["dni"] in indexes["persons"]:
+        raise ValueError(f"dni {person['dni']} already exists")
+    # Se reserva el DNI para rechazar duplicados dentro del mismo archivo; el id se completa al insertar
+    indexes["persons"][person["dni"]] = None
+    return person
+
+def _course_row(data: Dict[str, Any], indexes: Dict[str, Any]) -> Dict[str, Any]:
+    return bulk_service.validate_row(data, TrafficSafetyCourseCreate)
+
+def _enrollment_row(data: Dict[str, Any], indexes: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Acepta `person_dni` en lugar de `person_id` y `course_name` en lugar de `course_id`,
+    resueltos con los índices en memoria.
+    """
+    if "person_dni" in data:
+        dni = str(data.pop("person_dni"))
+        if indexes["persons"].get(dni) is None:
+            raise ValueError(f"person_dni {dni} not found")
+        data["person_id"] = indexes["persons"][dni]
+    if "course_name" in data:
+        name = data.pop("course_name")
+        if name not in indexes["courses"]:
+            raise ValueError(f"course_name {name} not found")
+        data["course_id"] = indexes["courses"][name]
+
+    enrollment = bulk_service.validate_row(data, CourseEnrollmentCreate)
+    if enrollment["person_id"] not in indexes["person_ids"]:
+        raise ValueError(f"person_id {enrollment['person_id']} not found")
+    if enrollment["course_id"] not in indexes["course_ids"]:
+        raise ValueError(f"course_id {enrollment['course_id']} not found")
+    return enrollment
+
+def _build_indexes(session: Session, kind: ImportKind) -> Dict[str, Any]:
+    if kind == ImportKind.PERSONS:
+        return {"persons": build_person_index(session)}
+    if kind == ImportKind.ENROLLMENTS:
+        persons = build_person_index(session)
+        courses = build_course_index(session)
+        return {
+            "persons": persons,
+            "person_ids": set(persons.values()),
+            "courses": courses,
+            "course_ids": set(session.exec(select(TrafficSafetyCourse.id)).all()),
+        }
+    return {}
+
+def _after_insert(kind: ImportKind, rows: List[Dict[str, Any]], ids: List[int], indexes: Dict[str, Any]):
+    if kind == ImportKind.PERSONS:
+        for row, new_id in zip(rows, ids):
+            indexes["persons"][row["dni"]] = new_id
+
+IMPORTERS: Dict[ImportKind, Tuple[type, Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]]] = {
+    ImportKind.PERSONS: (Person, _person_row),
+    ImportKind.COURSES: (TrafficSafetyCourse, _course_row),
+    ImportKind.ENROLLMENTS: (CourseEnrollment, _enrollment_row),
+}
+
+def _error_message(error: ValueError) -> str:
+    if isinstance(error, ValidationError):
+        return bulk_service.format_validation_error(error)
+    return str(error)
+
+def import_file(
+    engine: Engine,
+    kind: ImportKind,
+    path: str,
+    file_format: Optional[ImportFileFormat] = None,
+    batch_size: Optional[int] = None,
+    restart: bool = False,
+    rejects=None,
+    on_progress: Optional[Callable[[ImportCheckpoint, int], None]] = None,
+) -> ImportCheckpoint:
+    """
+    Importa un archivo CSV o JSONL de personas, cursos o inscripciones.
+
+    Lee el archivo en streaming y confirma un lote cada `batch_size` registros, en la misma
+    transacción que actualiza el ImportCheckpoint del archivo. Si la importación se interrumpe,
+    volver a ejecutarla continúa después del último lote confirmado; `restart=True` empieza
+    de nuevo (no borra lo ya importado).
+    Los registros inválidos se cuentan en `failed` y, si se pasa `rejects` (un archivo de texto
+    abierto), se escriben como JSONL con su número de registro y el error.
+    `on_progress` se llama tras cada lote con el checkpoint y los registros leídos en esta ejecución.
+    """
+    path = os.path.abspath(path)
+    file_format = file_format or detect_format(path)
+    batch_size = batch_size or IMPORT_BATCH_SIZE
+    model, build_row = IMPORTERS[kind]
+    source = f"{kind.value}:{path}"
+
+    ImportCheckpoint.__table__.create(engine, checkfirst=True)
+    with Session(engine, expire_on_commit=False) as session:
+        checkpoint = session.get(ImportCheckpoint, source)
+        if checkpoint is None:
+            checkpoint = ImportCheckpoint(source=source, kind=kind)
+        elif restart:
+            checkpoint.rows_done = checkpoint.inserted = checkpoint.failed = 0
+            checkpoint.finished = False
+        if checkpoint.finished:
+            return checkpoint
+
+        indexes = _build_indexes(session, kind)
+        rows, batch_rejects = [], []
+        resumed_from = position = checkpoint.rows_done
+
+        def flush(finished: bool = False):
+            ids = bulk_service.insert_rows(session, model, rows)
+            _after_insert(kind, rows, ids, indexes)
+            if kind is ImportKind.COURSES and ids:
+                catalog_cache.bump_version(catalog_cache.COURSES, session)
+            elif kind is ImportKind.ENROLLMENTS:
+                enrollment_stats_service.record_inserted_rows(session, rows)
+            checkpoint.rows_done = position
+            checkpoint.inserted += len(ids)
+            checkpoint.failed += len(batch_rejects)
+            checkpoint.finished = finished
+            checkpoint.updated_at = datetime.utcnow()
+            session.add(checkpoint)
+            session.commit()
+            if rejects is not None:
+                for reject in batch_rejects:
+                    rejects.write(json.dumps(reject, ensure_ascii=False) + "\n")
+            rows.clear()
+            batch_rejects.clear()
+            if on_progress:
+                on_progress(checkpoint, position - resumed_from)
+
+        for record in islice(iter_records(path, file_format), checkpoint.rows_done, None):
+            position += 1
+            try:
+                rows.append(build_row(_clean(record), indexes))
+            except ValueError as e:
+                batch_rejects.append({"row": position, "error": _error_message(e)})
+            if position - checkpoint.rows_done >= batch_size:
+                flush()
+        flush(finished=True)
+        return checkpoint
@@ -1,9 +1,14 @@
 # app/services/inspector_service.py
 
 from sqlmodel import Session, select
-from typing import List, Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, Dict, List, Optional
 
 from app.models import Inspector, InspectorCreate, InspectorRead, InspectorUpdate
+from app.services import catalog_cache, serialization
+
+INSPECTOR_FIELDS = serialization.read_fields(InspectorRead, Inspector)
+INSPECTOR_ROW_SHAPE = serialization.RowShape(INSPECTOR_FIELDS)
 
 def create_inspector(inspector_create: InspectorCreate, session: Session) -> Inspector:
     """
@@ -11,6 +16,7 @@ def create_inspector(inspector_create: InspectorCreate, session: Session) -> Ins
     """
     new_inspector = Inspector.from_orm(inspector_create) # Usar from_orm para Pydantic V1
     session.add(new_inspector)
+    catalog_cache.bump_version(catalog_cache.INSPECTORS, session)
     session.commit()
     session.refresh(new_inspector)
     return new_inspector
@@ -27,6 +33,14 @@ def get_all_inspectors(session: Session) -> List[Inspector]:
     """
     return session.exec(select(Inspector)).all()
 
+async def get_all_inspectors_async(session: AsyncSession) -> List[Dict[str, Any]]:
+    """
+    Variante asíncrona de `get_all_inspectors`.
+    Lee solo las columnas de InspectorRead, ordenadas por id, y devuelve diccionarios listos para serializar.
+    """
+    statement = select(*serialization.read_columns(Inspector, INSPECTOR_FIELDS)).order_by(Inspector.id)
+    return INSPECTOR_ROW_SHAPE.to_dicts((await session.exec(statement)).all())
+
 def update_inspector(inspector_id: int, inspector_update_data: InspectorUpdate, session: Session) -> Optional[Inspector]:
     """
     Actualiza un inspector existente por su ID.
@@ -40,6 +54,7 @@ def update_inspector(inspector_id: int, inspector_update_data: InspectorUpdate,
         setattr(inspector, key, value)
     
     session.add(inspector)
+    catalog_cache.bump_version(catalog_cache.INSPECTORS, session)
     session.commit()
     session.refresh(inspector)
     return inspector
@@ -52,5 +67,9 @@ def delete_inspector(inspector_id: int, session: Session) -> bool:
     if not inspector:
         return False
     session.delete(inspector)
+    catalog_cache.bump_version(catalog_cache.INSPECTORS, session)
     session.commit()
     return True
+
+# Listado cacheado por versión del catálogo (ETag / If-None-Match)
+INSPECTOR_CATALOG = catalog_cache.CatalogCache(catalog_cache.INSPECTORS, get_all_inspectors_async)
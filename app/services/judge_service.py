@@ -1,7 +1,12 @@
 from sqlmodel import Session, select
-from typing import List, Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, Dict, List, Optional
 
 from app.models import Judge, JudgeCreate, JudgeRead, JudgeUpdate
+from app.services import catalog_cache, serialization
+
+JUDGE_FIELDS = serialization.read_fields(JudgeRead, Judge)
+JUDGE_ROW_SHAPE = serialization.RowShape(JUDGE_FIELDS)
 
 def create_judge(judge_create: JudgeCreate, session: Session) -> Judge:
     """
@@ -9,6 +14,7 @@ def create_judge(judge_create: JudgeCreate, session: Session) -> Judge:
     """
     new_judge = Judge.from_orm(judge_create) # Usar from_orm para Pydantic V1
     session.add(new_judge)
+    catalog_cache.bump_version(catalog_cache.JUDGES, session)
     session.commit()
     session.refresh(new_judge)
     return new_judge
@@ -25,6 +31,14 @@ def get_all_judges(session: Session) -> List[Judge]:
     """
     return session.exec(select(Judge)).all()
 
+async def get_all_judges_async(session: AsyncSession) -> List[Dict[str, Any]]:
+    """
+    Variante asíncrona de `get_all_judges`.
+    Lee solo las columnas de JudgeRead, ordenadas por id, y devuelve diccionarios listos para serializar.
+    """
+    statement = select(*serialization.read_columns(Judge, JUDGE_FIELDS)).order_by(Judge.id)
+    return JUDGE_ROW_SHAPE.to_dicts((await session.exec(statement)).all())
+
 def update_judge(judge_id: int, judge_update_data: JudgeUpdate, session: Session) -> Optional[Judge]:
     """
     Actualiza un juez existente por su ID.
@@ -38,6 +52,7 @@ def update_judge(judge_id: int, judge_update_data: JudgeUpdate, session: Session
         setattr(judge, key, value)
     
     session.add(judge)
+    catalog_cache.bump_version(catalog_cache.JUDGES, session)
     session.commit()
     session.refresh(judge)
     return judge
@@ -50,5 +65,9 @@ def delete_judge(judge_id: int, session: Session) -> bool:
     if not judge:
         return False
     session.delete(judge)
+    catalog_cache.bump_version(catalog_cache.JUDGES, session)
     session.commit()
-    return True
\ No newline at end of file
+    return True
+
+# Listado cacheado por versión del catálogo (ETag / If-None-Match)
+JUDGE_CATALOG = catalog_cache.CatalogCache(catalog_cache.JUDGES, get_all_judges_async)
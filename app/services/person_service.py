@@ -1,7 +1,29 @@
 from sqlmodel import Session, select
-from typing import List, Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import Column, Integer, MetaData, Table, func, literal_column
+from typing import Any, Dict, List, Optional
+import os
+import re
+import unicodedata
 
-from app.models import Person, PersonCreate, PersonRead, PersonUpdate
+from app.models import Person, PersonCreate, PersonRead, PersonUpdate, BulkCreateResult
+from app.models.person import PERSON_FTS_TABLE
+from app.services import bulk_service, serialization
+
+PERSON_FIELDS = serialization.read_fields(PersonRead, Person)
+PERSON_ROW_SHAPE = serialization.RowShape(PERSON_FIELDS)
+
+# Tabla FTS5 de los nombres (se crea con DDL propio, fuera de SQLModel.metadata; ver app/models/person.py)
+person_fts = Table(PERSON_FTS_TABLE, MetaData(), Column("rowid", Integer, primary_key=True))
+
+# Coincidencias por nombre que se leen y ordenan por relevancia en cada búsqueda. Ordenar todas las
+# personas con un apellido común costaría decenas de milisegundos; con esta ventana el costo queda
+# acotado, a cambio de que en nombres muy comunes la búsqueda deba afinarse con más palabras.
+PERSON_SEARCH_CANDIDATES = int(os.getenv("PERSON_SEARCH_CANDIDATES", "200"))
+
+# Separadores que se aceptan al escribir un DNI ("30.111.222", "30 111 222")
+_DNI_SEPARATORS = re.compile(r"[\s.\-]")
+_NAME_TOKENS = re.compile(r"\w+")
 
 def create_person(person_create: PersonCreate, session: Session) -> Person:
     """
@@ -13,6 +35,17 @@ def create_person(person_create: PersonCreate, session: Session) -> Person:
     session.refresh(new_person)
     return new_person
 
+def create_persons_bulk(items: List[Dict[str, Any]], session: Session) -> BulkCreateResult:
+    """
+    Crea muchas personas en una sola transacción.
+    Cada elemento se valida por separado; los válidos se insertan por bloques con executemany
+    y los inválidos se informan con su error sin afectar al resto.
+    """
+    valid, errors = bulk_service.validate_items(items, PersonCreate)
+    ids = bulk_service.insert_rows(session, Person, [person for _, person in valid])
+    session.commit()
+    return bulk_service.build_result([(index, new_id) for (index, _), new_id in zip(valid, ids)], errors)
+
 def get_person_by_id(person_id: int, session: Session) -> Optional[Person]:
     """
     Obtiene una persona por su ID.
@@ -25,6 +58,20 @@ def get_all_persons(session: Session) -> List[Person]:
     """
     return session.exec(select(Person)).all()
 
+async def get_person_by_id_async(person_id: int, session: AsyncSession) -> Optional[Person]:
+    """
+    Variante asíncrona de `get_person_by_id`.
+    """
+    return await session.get(Person, person_id)
+
+async def get_all_persons_async(session: AsyncSession) -> List[Dict[str, Any]]:
+    """
+    Variante asíncrona de `get_all_persons`.
+    Lee solo las columnas de PersonRead y devuelve diccionarios listos para serializar.
+    """
+    statement = select(*serialization.read_columns(Person, PERSON_FIELDS))
+    return PERSON_ROW_SHAPE.to_dicts((await session.exec(statement)).all())
+
 def update_person(person_id: int, person_update_data: PersonUpdate, session: Session) -> Optional[Person]:
     """
     Actualiza una persona existente por su ID.
@@ -53,3 +100,97 @@ def delete_person(person_id: int, session: Session) -> bool:
     session.delete(person)
     session.commit()
     return True
+
+def normalize_dni_query(query: str) -> Optional[str]:
+    """El DNI buscado sin puntos ni espacios, o None si la búsqueda no es un número."""
+    dni = _DNI_SEPARATORS.sub("", query)
+    return dni if dni.isdigit() else None
+
+def build_name_match(query: str, prefix: bool = True) -> Optional[str]:
+    """
+    Consulta FTS5 con cada palabra como prefijo ("jose per" -> "jose"* "per"*), o como palabra
+    completa con `prefix=False` ("jose" "per"): deben aparecer todas, en cualquier orden.
+    Las comillas evitan que la búsqueda se interprete como sintaxis FTS5.
+    """
+    tokens = _NAME_TOKENS.findall(query)
+    suffix = "*" if prefix else ""
+    return " ".join(f'"{token}"{suffix}' for token in tokens) if tokens else None
+
+def _fold(text: str) -> str:
+    """Texto en minúsculas y sin acentos, como lo compara el índice FTS5 (unicode61, remove_diacritics)."""
+    return "".join(char for char in unicodedata.normalize("NFD", text) if unicodedata.category(char) != "Mn").casefold()
+
+def name_rank(name: str, tokens: List[str]) -> tuple:
+    """
+    Clave de orden de una coincidencia por nombre: primero los nombres donde más palabras
+    buscadas aparecen completas, y entre ellos los más cortos (menos palabras que no se buscaron).
+    """
+    words = set(_NAME_TOKENS.findall(_fold(name)))
+    return -sum(_fold(token) in words for token in tokens), len(words)
+
+def _next_prefix(prefix: str) -> str:
+    """Menor cadena mayor que todas las que empiezan con `prefix` (límite superior del rango)."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+async def _fts_candidates(session: AsyncSession, columns: list, match: str, window: int) -> list:
+    """Las primeras `window` personas que cumplen la consulta FTS5 `match`."""
+    # Sin ORDER BY en la subconsulta: FTS5 corta la lista de coincidencias apenas llena la ventana
+    candidates = (
+        select(person_fts.c.rowid)
+        .where(literal_column(PERSON_FTS_TABLE).op("MATCH")(match))
+        .limit(window)
+        .subquery()
+    )
+    return list((await session.exec(select(*columns).join(candidates, candidates.c.rowid == Person.id))).all())
+
+async def search_persons_async(query: str, limit: int, session: AsyncSession) -> List[Dict[str, Any]]:
+    """
+    Busca personas por DNI (exacto o prefijo) si la búsqueda es un número, o por nombre.
+
+    - DNI: rango sobre el índice de `person.dni`; el DNI exacto queda primero por ser el menor del rango.
+    - Nombre (SQLite): índice FTS5 sin distinguir mayúsculas ni acentos; se leen hasta
+      PERSON_SEARCH_CANDIDATES coincidencias con todas las palabras completas y, si no alcanzan
+      para `limit`, otras tantas por prefijo, y se ordenan por relevancia con `name_rank`.
+      En otros motores se usa una comparación sin índice que solo ignora mayúsculas.
+
+    Devuelve como mucho `limit` resultados, cada uno con el tipo de coincidencia en `match`.
+    """
+    columns = serialization.read_columns(Person, PERSON_FIELDS)
+    dni = normalize_dni_query(query)
+    if dni is not None:
+        statement = (
+            select(*columns)
+            .where(Person.dni >= dni, Person.dni < _next_prefix(dni))
+            .order_by(Person.dni, Person.id)
+            .limit(limit)
+        )
+        persons = PERSON_ROW_SHAPE.to_dicts((await session.exec(statement)).all())
+        for person in persons:
+            person["match"] = "dni_exact" if person["dni"] == dni else "dni_prefix"
+        return persons
+
+    match = build_name_match(query)
+    if match is None:
+        return []
+    if session.bind.dialect.name == "sqlite":
+        window = max(limit, PERSON_SEARCH_CANDIDATES)
+        # Primero los nombres con todas las palabras completas, que ninguna coincidencia por prefijo
+        # supera en `name_rank`; si no alcanzan para `limit`, la ventana se completa con prefijos
+        rows = await _fts_candidates(session, columns, build_name_match(query, prefix=False), window)
+        if len(rows) < limit:
+            seen = {row.id for row in rows}
+            rows += [row for row in await _fts_candidates(session, columns, match, window) if row.id not in seen]
+        tokens = _NAME_TOKENS.findall(query)
+        persons = sorted(PERSON_ROW_SHAPE.to_dicts(rows), key=lambda person: (*name_rank(person["name"], tokens), person["id"]))[:limit]
+        for person in persons:
+            person["match"] = "name"
+        return persons
+
+    statement = select(*columns)
+    for token in _NAME_TOKENS.findall(query):
+        statement = statement.where(func.lower(Person.name).contains(token.lower(), autoescape=True))
+    statement = statement.order_by(Person.name, Person.id).limit(limit)
+    persons = PERSON_ROW_SHAPE.to_dicts((await session.exec(statement)).all())
+    for person in persons:
+        person["match"] = "name"
+    return persons
@@ -0,0 +1,52 @@
+# app/services/serialization.py
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+from sqlalchemy.sql import FromClause
+from sqlmodel import SQLModel
+
+def read_fields(schema: Type[SQLModel], model: Type[SQLModel]) -> Tuple[str, ...]:
+    """
+    Campos del esquema de lectura que son columnas de la tabla, con `id` primero.
+    Las relaciones anidadas (p. ej. `person` en CourseEnrollmentRead) quedan afuera.
+    """
+    columns = model.__table__.c
+    fields = [name for name in schema.__fields__ if name in columns and name != "id"]
+    return ("id", *fields) if "id" in schema.__fields__ else tuple(fields)
+
+def read_columns(model: Union[Type[SQLModel], FromClause], fields: Sequence[str], prefix: Optional[str] = None) -> list:
+    """
+    Columnas de `model` (un modelo o una tabla, p. ej. un alias) para un SELECT plano,
+    etiquetadas `<prefix>__<campo>` si se indica prefijo.
+    """
+    columns = getattr(model, "__table__", model).c
+    if prefix is None:
+        return [columns[name] for name in fields]
+    return [columns[name].label(f"{prefix}__{name}") for name in fields]
+
+class RowShape:
+    """
+    Convierte filas planas de un SELECT (tuplas) en diccionarios listos para serializar a JSON,
+    sin construir objetos del ORM ni modelos de Pydantic.
+
+    `fields` son las primeras columnas de la fila; cada elemento de `nested` es (nombre, campos)
+    y toma las columnas siguientes como un objeto anidado, que vale None si su primer campo
+    (el id, vacío por un LEFT JOIN sin coincidencia) es NULL.
+    """
+
+    def __init__(self, fields: Sequence[str], nested: Sequence[Tuple[str, Sequence[str]]] = ()):
+        self.fields = tuple(fields)
+        self.nested = tuple((name, tuple(nested_fields)) for name, nested_fields in nested)
+
+    def to_dict(self, row: Sequence[Any]) -> Dict[str, Any]:
+        values = tuple(row)
+        item = dict(zip(self.fields, values))
+        offset = len(self.fields)
+        for name, fields in self.nested:
+            end = offset + len(fields)
+            item[name] = dict(zip(fields, values[offset:end])) if values[offset] is not None else None
+            offset = end
+        return item
+
+    def to_dicts(self, rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+        return [self.to_dict(row) for row in rows]
@@ -1,10 +1,15 @@
 # app/services/traffic_safety_course_service.py
 
 from sqlmodel import Session, select
-from typing import List, Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, Dict, List, Optional
 
 
 from app.models import TrafficSafetyCourse, TrafficSafetyCourseCreate, TrafficSafetyCourseRead, TrafficSafetyCourseUpdate
+from app.services import catalog_cache, serialization
+
+COURSE_FIELDS = serialization.read_fields(TrafficSafetyCourseRead, TrafficSafetyCourse)
+COURSE_ROW_SHAPE = serialization.RowShape(COURSE_FIELDS)
 
 def create_course(course_create: TrafficSafetyCourseCreate, session: Session) -> TrafficSafetyCourse:
     """
@@ -12,6 +17,7 @@ def create_course(course_create: TrafficSafetyCourseCreate, session: Session) ->
     """
     new_course = TrafficSafetyCourse.model_validate(course_create) 
     session.add(new_course)
+    catalog_cache.bump_version(catalog_cache.COURSES, session)
     session.commit()
     session.refresh(new_course)
     return new_course
@@ -28,6 +34,20 @@ def get_all_courses(session: Session) -> List[TrafficSafetyCourse]:
     """
     return session.exec(select(TrafficSafetyCourse)).all()
 
+async def get_course_by_id_async(course_id: int, session: AsyncSession) -> Optional[TrafficSafetyCourse]:
+    """
+    Variante asíncrona de `get_course_by_id`.
+    """
+    return await session.get(TrafficSafetyCourse, course_id)
+
+async def get_all_courses_async(session: AsyncSession) -> List[Dict[str, Any]]:
+    """
+    Variante asíncrona de `get_all_courses`.
+    Lee solo las columnas de TrafficSafetyCourseRead y devuelve diccionarios listos para serializar.
+    """
+    statement = select(*serialization.read_columns(TrafficSafetyCourse, COURSE_FIELDS)).order_by(TrafficSafetyCourse.id)
+    return COURSE_ROW_SHAPE.to_dicts((await session.exec(statement)).all())
+
 def update_course(course_id: int, course_update_data: TrafficSafetyCourseUpdate, session: Session) -> Optional[TrafficSafetyCourse]:
     """
     Actualiza un curso de seguridad vial existente por su ID.
@@ -43,6 +63,7 @@ def update_course(course_id: int, course_update_data: TrafficSafetyCourseUpdate,
         setattr(course, key, value)
     
     session.add(course)
+    catalog_cache.bump_version(catalog_cache.COURSES, session)
     session.commit()
     session.refresh(course)
     return course
@@ -55,5 +76,9 @@ def delete_course(course_id: int, session: Session) -> bool:
     if not course:
         return False
     session.delete(course)
+    catalog_cache.bump_version(catalog_cache.COURSES, session)
     session.commit()
-    return True
\ No newline at end of file
+    return True
+
+# Listado cacheado por versión del catálogo (ETag / If-None-Match)
+COURSE_CATALOG = catalog_cache.CatalogCache(catalog_cache.COURSES, get_all_courses_async)
@@ -0,0 +1,36 @@
+# app/services/upsert.py
+
+from typing import Any, Dict, Optional, Sequence, Type
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlmodel import Session, SQLModel
+
+_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert, "mysql": mysql.insert}
+
+def increment_row(
+    session: Session,
+    model: Type[SQLModel],
+    keys: Sequence[str],
+    increments: Dict[str, int],
+    values: Optional[Dict[str, Any]] = None,
+):
+    """
+    Suma `increments` a la fila de `model` identificada por las columnas `keys` (tomadas de
+    `values`), o la crea con esos valores si no existe, en una sola sentencia (INSERT ... ON
+    CONFLICT DO UPDATE / ON DUPLICATE KEY UPDATE). A diferencia de UPDATE seguido de INSERT,
+    dos transacciones que crean la misma fila a la vez no fallan por clave duplicada.
+    Las demás columnas de `values` se sobrescriben si la fila ya existía.
+    """
+    values = dict(values or {}, **increments)
+    table = model.__table__
+    dialect = session.get_bind().dialect.name
+    statement = _INSERTS[dialect](table).values(**values)
+    if dialect == "mysql":
+        inserted = statement.inserted
+        updates = {name: (table.c[name] + inserted[name]) if name in increments else inserted[name] for name in values if name not in keys}
+        statement = statement.on_duplicate_key_update(**updates)
+    else:
+        excluded = statement.excluded
+        updates = {name: (table.c[name] + excluded[name]) if name in increments else excluded[name] for name in values if name not in keys}
+        statement = statement.on_conflict_do_update(index_elements=list(keys), set_=updates)
+    session.execute(statement)
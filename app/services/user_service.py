@@ -1,15 +1,17 @@
 # app/services/user_service.py
 
 from sqlmodel import Session, select
-from passlib.context import CryptContext
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Optional, List
 from datetime import date # Asegúrate de que date esté importado si se usa en otros métodos
 
 from app.models import User, UserRole, UserCreate, UserUpdate
+from app.security.password_hashing import password_hasher
+from app.security.principal_cache import principal_cache
+from app.security.token_revocation import REVOKING_FIELDS, record_revocation, token_denylist
 
-# Contexto para el hashing de contraseñas
-# ESTO DEBE SER pbkdf2_sha256. ¡CRÍTICO!
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# El hashing y la verificación de contraseñas (pbkdf2_sha256) se hacen en el pool acotado
+# de app.security.password_hashing; con su cola llena lanzan PasswordHasherBusy.
 
 def create_user(user_create: UserCreate, session: Session) -> User:
     """
@@ -23,7 +25,7 @@ def create_user(user_create: UserCreate, session: Session) -> User:
         apellidos=user_create.apellidos,
         is_active=user_create.is_active,
         role=user_create.role,
-        hashed_password=pwd_context.hash(user_create.password)
+        hashed_password=password_hasher.hash(user_create.password)
     )
     session.add(db_user)
     session.commit()
@@ -39,22 +41,36 @@ def get_user_by_username(username: str, session: Session) -> Optional[User]:
 def authenticate_user(username: str, password: str, session: Session) -> Optional[User]:
     """
     Autentica un usuario verificando su nombre de usuario y contraseña.
+    Si el hash guardado usa otra configuración de pbkdf2, lo regenera con la actual.
     """
     user = get_user_by_username(username, session)
     if not user:
-        print(f"DEBUG: Usuario '{username}' no encontrado.") # Depuración
         return None
-    
-    # --- LÍNEAS DE DEBUGGING CRÍTICAS ---
-    print(f"DEBUG (authenticate): Contraseña hasheada desde DB: '{user.hashed_password}'")
-    print(f"DEBUG (authenticate): Contraseña en texto plano (NO HASHEADA): '{password}'")
-    print(f"DEBUG (authenticate): pwd_context schemes: {pwd_context.schemes()}")
-    # --- FIN LÍNEAS DE DEBUGGING ---
+    verified, new_hash = password_hasher.verify(password, user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+    return user
 
-    if not pwd_context.verify(password, user.hashed_password):
-        print("DEBUG (authenticate): Verificación de contraseña fallida.") # Depuración
+async def authenticate_user_async(username: str, password: str, session: AsyncSession) -> Optional[User]:
+    """
+    Variante asíncrona de `authenticate_user`: mientras pbkdf2 corre en el pool de hashing,
+    el request no ocupa un hilo del threadpool.
+    """
+    user = (await session.exec(select(User).where(User.username == username))).first()
+    if not user:
+        return None
+    verified, new_hash = await password_hasher.verify_async(password, user.hashed_password)
+    if not verified:
         return None
-    print("DEBUG (authenticate): Verificación de contraseña exitosa.") # Depuración
+    if new_hash:
+        user.hashed_password = new_hash
+        session.add(user)
+        await session.commit()
     return user
 
 def get_user_by_id(user_id: int, session: Session) -> Optional[User]:
@@ -76,17 +92,24 @@ def update_user(user_id: int, user_update_data: UserUpdate, session: Session) ->
     user = session.get(User, user_id)
     if not user:
         return None
+    previous_username = user.username
     
     update_data = user_update_data.dict(exclude_unset=True)
     
     for key, value in update_data.items():
         if key == "password" and value is not None:
-            setattr(user, "hashed_password", pwd_context.hash(value))
+            setattr(user, "hashed_password", password_hasher.hash(value))
         else:
             setattr(user, key, value)
     
     session.add(user)
+    # Los tokens emitidos llevan usuario y rol en sus claims: si cambian, dejan de valer
+    revoked_at = record_revocation(user.id, session) if REVOKING_FIELDS & update_data.keys() else None
     session.commit()
+    if revoked_at is not None:
+        token_denylist.revoke_user(user_id, revoked_at)
+    # Los tokens ya emitidos deben volver a resolver el usuario con los datos nuevos
+    principal_cache.invalidate_user(previous_username)
     session.refresh(user)
     return user
 
@@ -97,6 +120,10 @@ def delete_user(user_id: int, session: Session) -> bool:
     user = session.get(User, user_id)
     if not user:
         return False
+    username = user.username
     session.delete(user)
+    revoked_at = record_revocation(user_id, session)
     session.commit()
+    token_denylist.revoke_user(user_id, revoked_at)
+    principal_cache.invalidate_user(username)
     return True
@@ -0,0 +1,188 @@
+# app/services/write_queue.py
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Confirmación agrupada de escrituras (opt-in): las altas y modificaciones se encolan y un único
+# hilo escritor las confirma juntas, con un COMMIT por lote en lugar de uno por request
+WRITE_QUEUE_ENABLED = os.getenv("WRITE_QUEUE_ENABLED", "false").strip().lower() in ("1", "true", "yes", "on")
+# Cuánto espera el escritor, desde la primera operación del lote, a que lleguen más
+WRITE_QUEUE_MAX_DELAY_MS = float(os.getenv("WRITE_QUEUE_MAX_DELAY_MS", "2"))
+# Operaciones por lote como máximo: acota la espera de las primeras y la duración del bloqueo de escritura
+WRITE_QUEUE_MAX_BATCH = int(os.getenv("WRITE_QUEUE_MAX_BATCH", "32"))
+
+_STOP = object()
+
+
+class WriteQueueClosed(Exception):
+    """La cola ya se cerró (la aplicación se está deteniendo)."""
+
+
+class GroupCommitQueue:
+    """
+    Hilo escritor que agrupa las operaciones de escritura de muchos requests en una transacción.
+
+    Cada operación es una función `operation(session)` de un servicio (p. ej. `create_person`),
+    que se ejecuta sin cambios: recibe una sesión propia unida a la transacción del lote con
+    `join_transaction_mode="create_savepoint"`, así que su `session.commit()` solo libera un
+    SAVEPOINT y un error deshace únicamente esa operación. El lote se confirma con un solo
+    COMMIT; recién entonces cada llamador recibe su resultado (o su excepción), y si el COMMIT
+    falla todas las operaciones del lote reciben el error.
+
+    El escritor junta operaciones durante `max_delay` segundos desde la primera, o hasta
+    `max_batch`, por lo que la latencia agregada queda acotada por esa espera más la duración
+    del lote.
+    """
+
+    def __init__(self, engine: Engine, max_delay_ms: float = WRITE_QUEUE_MAX_DELAY_MS, max_batch: int = WRITE_QUEUE_MAX_BATCH):
+        self.engine = engine
+        self.max_delay = max_delay_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, operation: Callable[[Session], T]) -> "Future[T]":
+        """Encola `operation`; el Future se resuelve después del COMMIT de su lote."""
+        future: "Future[T]" = Future()
+        with self._lock:
+            if self._closed:
+                raise WriteQueueClosed()
+            if self._thread is None or not self._thread.is_alive():
+                # También si el hilo terminó por un error inesperado: las operaciones encoladas no quedan esperando
+                self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+                self._thread.start()
+            self._queue.put((operation, future, time.perf_counter()))
+        return future
+
+    def run(self, operation: Callable[[Session], T]) -> T:
+        """Encola `operation` y espera su resultado."""
+        return self.submit(operation).result()
+
+    def close(self, timeout: Optional[float] = None):
+        """Deja de aceptar operaciones, confirma las pendientes y detiene el hilo escritor."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self._commit_batch(batch)
+            except BaseException as error:
+                # Un error fuera de las operaciones no debe detener al único hilo escritor
+                logger.exception("Error inesperado en un lote de %s escrituras", len(batch))
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(error)
+
+    def _commit_batch(self, batch: List[Tuple[Callable[[Session], T], Future, float]]):
+        outcomes: List[Tuple[Future, Optional[T], Optional[BaseException]]] = []
+        try:
+            with self.engine.connect() as connection:
+                with connection.begin():
+                    if self.engine.dialect.name == "sqlite":
+                        # pysqlite no abre la transacción hasta la primera escritura: sin este BEGIN
+                        # cada SAVEPOINT abriría y su RELEASE confirmaría una transacción propia.
+                        # IMMEDIATE toma el bloqueo de escritura de entrada, sin esperas a mitad del lote.
+                        connection.exec_driver_sql("BEGIN IMMEDIATE")
+                    for operation, future, queued_at in batch:
+                        if not future.set_running_or_notify_cancel():
+                            continue
+                        metrics.WRITE_QUEUE_WAIT.observe((), time.perf_counter() - queued_at)
+                        # SAVEPOINT propio: un error, aun después del commit del servicio, deshace toda la operación
+                        savepoint = connection.begin_nested()
+                        try:
+                            with Session(bind=connection, join_transaction_mode="create_savepoint") as session:
+                                result = operation(session)
+                            savepoint.commit()
+                            outcomes.append((future, result, None))
+                        except BaseException as error:
+                            # Cualquier error de la operación llega a su llamador y no afecta al resto del lote
+                            savepoint.rollback()
+                            outcomes.append((future, None, error))
+        except Exception as error:
+            # Falló el COMMIT (o la conexión): nada del lote quedó guardado
+            logger.exception("No se pudo confirmar un lote de %s escrituras", len(batch))
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+        metrics.WRITE_QUEUE_BATCH_SIZE.observe((), len(outcomes))
+
+
+_queues: Dict[Engine, GroupCommitQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def queue_for(engine: Engine) -> GroupCommitQueue:
+    """Cola del motor (una por base de datos y proceso), creada en el primer uso."""
+    with _queues_lock:
+        write_queue = _queues.get(engine)
+        if write_queue is None:
+            write_queue = _queues[engine] = GroupCommitQueue(engine)
+        return write_queue
+
+
+def run_write(session: Session, operation: Callable[[Session], T]) -> T:
+    """
+    Ejecuta una operación de escritura de un servicio. Sin WRITE_QUEUE_ENABLED la ejecuta
+    directamente con la sesión del request; si no, la confirma en la cola del motor de esa
+    sesión, junto con las que lleguen en los próximos WRITE_QUEUE_MAX_DELAY_MS.
+    En ambos casos devuelve el resultado de la operación o propaga su excepción.
+    """
+    if not WRITE_QUEUE_ENABLED:
+        return operation(session)
+    return queue_for(session.get_bind()).run(operation)
+
+
+def close_all(timeout: Optional[float] = None):
+    """Confirma las escrituras pendientes y detiene los hilos escritores (al detener la aplicación)."""
+    with _queues_lock:
+        queues = list(_queues.values())
+        _queues.clear()
+    for write_queue in queues:
+        write_queue.close(timeout)
@@ -0,0 +1,127 @@
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.main import app
+from app.config.database import get_async_session, get_session, to_async_url
+from app.monitoring.sql import capture_queries, instrument_engine
+from app.models import CourseEnrollment, CourseEnrollmentStatus, Person, TrafficSafetyCourse, UserCreate, UserRole
+from app.security import security
+from app.security.password_hashing import password_hasher
+from app.security.principal_cache import principal_cache
+from app.security.token_revocation import token_denylist
+from app.services import catalog_cache, inspector_service, judge_service, traffic_safety_course_service, user_service
+
+
+def _clear_process_caches():
+    principal_cache.clear()
+    password_hasher.cache.clear()
+    token_denylist.clear()
+    # Cada test usa una base nueva: las versiones de catálogo arrancan de cero
+    catalog_cache.catalog_versions.invalidate()
+    for catalog in (traffic_safety_course_service.COURSE_CATALOG, inspector_service.INSPECTOR_CATALOG, judge_service.JUDGE_CATALOG):
+        catalog.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    _clear_process_caches()
+    yield
+    _clear_process_caches()
+
+
+@pytest.fixture(name="db_url")
+def db_url_fixture(tmp_path):
+    # Archivo temporal para que los motores síncrono y asíncrono vean los mismos datos
+    return f"sqlite:///{tmp_path / 'test.db'}"
+
+
+@pytest.fixture(name="db_engine")
+def db_engine_fixture(db_url: str):
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    instrument_engine(engine)
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="db_session")
+def db_session_fixture(db_engine):
+    with Session(db_engine) as session:
+        yield session
+
+
+@pytest.fixture(name="enrollments")
+def enrollments_fixture(db_session: Session):
+    """Crea 2 personas, 1 curso y 10 inscripciones con vencimientos escalonados."""
+    person_a = Person(name="Ana", dni="30111222")
+    person_b = Person(name="Bruno", dni="30333444")
+    course = TrafficSafetyCourse(name="Manejo defensivo", description="Curso básico")
+    db_session.add_all([person_a, person_b, course])
+    db_session.commit()
+
+    today = date.today()
+    enrollments = []
+    for i in range(10):
+        enrollment = CourseEnrollment(
+            person_id=person_a.id if i % 2 == 0 else person_b.id,
+            course_id=course.id,
+            deadline_date=today + timedelta(days=30),
+            # Vencimientos en orden inverso al id, con repetidos, para probar el desempate por id
+            expiration_date=today + timedelta(days=(10 - i) // 2),
+            status=CourseEnrollmentStatus.COMPLETED if i < 3 else CourseEnrollmentStatus.PENDING,
+        )
+        db_session.add(enrollment)
+        enrollments.append(enrollment)
+    db_session.commit()
+    return enrollments
+
+
+@pytest.fixture(name="api_client")
+def api_client_fixture(db_session: Session, db_url: str):
+    async_engine = create_async_engine(to_async_url(db_url))
+    instrument_engine(async_engine.sync_engine)
+
+    async def get_async_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = lambda: db_session
+    app.dependency_overrides[get_async_session] = get_async_session_override
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(name="auth_headers")
+def auth_headers_fixture(db_session: Session):
+    """Devuelve una función que crea un usuario con el rol indicado y arma su cabecera Authorization."""
+    def make_headers(role: UserRole = UserRole.ADMIN, username: str = None) -> dict:
+        username = username or f"test_{role.value}"
+        user = user_service.get_user_by_username(username, db_session)
+        if user is None:
+            user = user_service.create_user(
+                UserCreate(username=username, password="password", dni="00000000", nombres="Test", apellidos="User", role=role),
+                db_session,
+            )
+        token = security.create_access_token(data={"sub": user.username, "role": role.value})
+        return {"Authorization": f"Bearer {token}"}
+    return make_headers
+
+
+@pytest.fixture(name="assert_max_queries")
+def assert_max_queries_fixture():
+    """
+    Context manager que falla si dentro del bloque se ejecutan más de `maximum` sentencias SQL.
+    Uso: `with assert_max_queries(2): client.get(...)`.
+    """
+    @contextmanager
+    def assert_max_queries(maximum: int):
+        with capture_queries() as stats:
+            yield stats
+        assert stats.queries <= maximum, f"Expected at most {maximum} queries, got {stats.queries}:\n{stats.describe()}"
+    return assert_max_queries
@@ -0,0 +1,42 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.models import UserRole, UserUpdate
+from app.services import user_service
+
+
+def _count_queries(engine) -> list:
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+def test_authenticated_user_is_cached(api_client: TestClient, auth_headers, db_engine):
+    headers = auth_headers(UserRole.ADMIN)
+    assert api_client.get("/inspectors/", headers=headers).status_code == 200
+
+    statements = _count_queries(db_engine)
+    assert api_client.get("/inspectors/", headers=headers).status_code == 200
+
+    assert not [statement for statement in statements if 'FROM "user"' in statement or "FROM user" in statement]
+
+
+def test_update_user_invalidates_cached_principal(api_client: TestClient, auth_headers, db_session: Session):
+    headers = auth_headers(UserRole.ADMIN, username="ana")
+    assert api_client.get("/users/", headers=headers).status_code == 200
+
+    user = user_service.get_user_by_username("ana", db_session)
+    user_service.update_user(user.id, UserUpdate(role=UserRole.NORMAL), db_session)
+
+    assert api_client.get("/users/", headers=headers).status_code == 403
+
+
+def test_deleted_user_token_is_rejected(api_client: TestClient, auth_headers, db_session: Session):
+    headers = auth_headers(UserRole.ADMIN, username="bruno")
+    assert api_client.get("/users/", headers=headers).status_code == 200
+
+    user = user_service.get_user_by_username("bruno", db_session)
+    user_service.delete_user(user.id, db_session)
+
+    assert api_client.get("/users/", headers=headers).status_code == 401
@@ -0,0 +1,54 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session, func, select
+
+from app.models import CourseEnrollment, Person, TrafficSafetyCourse, UserRole
+from app.services import bulk_service
+
+
+def test_bulk_create_persons_reports_per_item_results(api_client: TestClient, auth_headers, db_session: Session):
+    items = [
+        {"name": "Ana", "dni": "30111222"},
+        {"name": "Sin DNI"},
+        {"name": "Bruno", "dni": "30333444"},
+    ]
+    response = api_client.post("/persons/bulk", json=items, headers=auth_headers())
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["failed"]) == (2, 1)
+    assert [result["index"] for result in body["results"]] == [0, 1, 2]
+    assert "dni" in body["results"][1]["error"]
+
+    created = {person.id: person.dni for person in db_session.exec(select(Person)).all()}
+    assert created == {body["results"][0]["id"]: "30111222", body["results"][2]["id"]: "30333444"}
+
+
+def test_bulk_create_enrollments_checks_references_and_chunks(api_client: TestClient, auth_headers, db_session: Session, monkeypatch):
+    person = Person(name="Ana", dni="30111222")
+    course = TrafficSafetyCourse(name="Manejo defensivo", description="Curso básico")
+    db_session.add_all([person, course])
+    db_session.commit()
+    monkeypatch.setattr(bulk_service, "BULK_CHUNK_SIZE", 2)
+
+    valid = {"person_id": person.id, "course_id": course.id, "deadline_date": "2030-01-01", "expiration_date": "2031-01-01"}
+    items = [valid, dict(valid, person_id=999), valid, dict(valid, course_id=999), valid, dict(valid, deadline_date="mañana")]
+    response = api_client.post("/enrollments/bulk", json=items, headers=auth_headers())
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["failed"]) == (3, 3)
+    errors = {result["index"]: result["error"] for result in body["results"] if result["error"]}
+    assert errors[1] == "person_id 999 not found"
+    assert errors[3] == "course_id 999 not found"
+    assert "deadline_date" in errors[5]
+    ids = [result["id"] for result in body["results"] if result["id"]]
+    assert ids == sorted(ids)
+    assert db_session.exec(select(func.count()).select_from(CourseEnrollment)).one() == 3
+
+
+def test_bulk_create_limits(api_client: TestClient, auth_headers, monkeypatch):
+    monkeypatch.setattr(bulk_service, "BULK_MAX_ITEMS", 2)
+    items = [{"name": "Ana", "dni": str(i)} for i in range(3)]
+
+    assert api_client.post("/persons/bulk", json=items, headers=auth_headers()).status_code == 400
+    assert api_client.post("/persons/bulk", json=items[:1], headers=auth_headers(role=UserRole.JUDGE)).status_code == 403
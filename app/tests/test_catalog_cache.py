@@ -0,0 +1,77 @@
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models import CatalogVersion, Inspector, UserRole
+from app.services import catalog_cache
+
+
+def test_courses_list_is_revalidated_with_etag(api_client: TestClient, auth_headers, assert_max_queries):
+    headers = auth_headers(UserRole.ADMIN)
+    first = api_client.get("/courses/", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    # ETag vigente: 304 sin cuerpo y sin consultar la base (el usuario ya está en la caché de principals)
+    with assert_max_queries(0):
+        cached = api_client.get("/courses/", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    created = api_client.post("/courses/", json={"name": "Manejo defensivo", "description": "Curso"}, headers=headers)
+    assert created.status_code == 201
+    changed = api_client.get("/courses/", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert [course["name"] for course in changed.json()] == ["Manejo defensivo"]
+    assert "last-modified" in changed.headers
+
+
+@pytest.mark.parametrize("path,payload", [("/inspectors/", {"name": "Inspector Uno"}), ("/judges/", {"name": "Juez Uno"})])
+def test_inspector_and_judge_lists_change_etag_on_write(api_client: TestClient, auth_headers, path: str, payload: dict):
+    headers = auth_headers(UserRole.ADMIN)
+    etag = api_client.get(path, headers=headers).headers["etag"]
+
+    new_id = api_client.post(path, json=payload, headers=headers).json()["id"]
+    after_create = api_client.get(path, headers=headers)
+    assert after_create.headers["etag"] != etag
+    assert [row["id"] for row in after_create.json()] == [new_id]
+
+    assert api_client.delete(f"{path}{new_id}", headers=headers).status_code in (200, 204)
+    after_delete = api_client.get(path, headers={**headers, "If-None-Match": after_create.headers["etag"]})
+    assert after_delete.status_code == 200
+    assert after_delete.json() == []
+
+
+def test_if_modified_since_and_changes_from_other_workers(api_client: TestClient, db_session: Session, auth_headers):
+    headers = auth_headers(UserRole.ADMIN)
+    api_client.post("/inspectors/", json={"name": "Inspector Uno"}, headers=headers)
+    listed = api_client.get("/inspectors/", headers=headers)
+    last_modified = listed.headers["last-modified"]
+    assert api_client.get("/inspectors/", headers={**headers, "If-Modified-Since": last_modified}).status_code == 304
+    earlier = format_datetime(datetime.now(timezone.utc) - timedelta(days=1), usegmt=True)
+    assert api_client.get("/inspectors/", headers={**headers, "If-Modified-Since": earlier}).status_code == 200
+
+    # Un cambio hecho por otro proceso se ve al vencer el intervalo de refresco de las versiones
+    db_session.add(Inspector(name="Inspector Dos"))
+    catalog_cache.bump_version(catalog_cache.INSPECTORS, db_session)
+    db_session.commit()
+    catalog_cache.catalog_versions.invalidate()
+    refreshed = api_client.get("/inspectors/", headers={**headers, "If-None-Match": listed.headers["etag"]})
+    assert refreshed.status_code == 200
+    assert len(refreshed.json()) == 2
+    assert db_session.get(CatalogVersion, catalog_cache.INSPECTORS).version == 2
+
+
+def test_bump_version_creates_the_row_with_an_upsert(db_session: Session, assert_max_queries):
+    with assert_max_queries(1) as stats:
+        catalog_cache.bump_version(catalog_cache.JUDGES, db_session)
+    assert "ON CONFLICT" in next(iter(stats.statements))
+    catalog_cache.bump_version(catalog_cache.JUDGES, db_session)
+    db_session.commit()
+    assert db_session.get(CatalogVersion, catalog_cache.JUDGES).version == 2
@@ -0,0 +1,284 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models import CourseEnrollment, CourseEnrollmentRead, CourseEnrollmentStatus, Inspector, Judge, Person, TrafficSafetyCourse, UserRole
+from app.services import course_enrollment_service, enrollment_stats_service, user_service
+
+
+def _collect_pages(client: TestClient, headers: dict, params: dict) -> list:
+    items, cursor = [], None
+    while True:
+        page_params = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = client.get("/enrollments/", params=page_params, headers=headers)
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["items"]) <= params["limit"]
+        items.extend(body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_enrollments_keyset_pagination_by_id(api_client: TestClient, auth_headers, enrollments):
+    items = _collect_pages(api_client, auth_headers(), {"limit": 3})
+
+    assert [item["id"] for item in items] == [e.id for e in enrollments]
+    assert items[0]["person"]["name"] == "Ana"
+    assert items[0]["course"]["name"] == "Manejo defensivo"
+
+
+def test_enrollments_keyset_pagination_by_expiration_date(api_client: TestClient, auth_headers, enrollments):
+    items = _collect_pages(api_client, auth_headers(), {"limit": 4, "order_by": "expiration_date"})
+
+    expected = sorted(enrollments, key=lambda e: (e.expiration_date, e.id))
+    assert [item["id"] for item in items] == [e.id for e in expected]
+
+
+def test_enrollments_filters_are_applied(api_client: TestClient, auth_headers, enrollments):
+    params = {
+        "limit": 50,
+        "status": CourseEnrollmentStatus.PENDING.value,
+        "person_id": enrollments[0].person_id,
+        "expiration_date_to": str(date.today() + timedelta(days=2)),
+    }
+    items = _collect_pages(api_client, auth_headers(), params)
+
+    expected = [
+        e.id for e in enrollments
+        if e.status == CourseEnrollmentStatus.PENDING
+        and e.person_id == enrollments[0].person_id
+        and e.expiration_date <= date.today() + timedelta(days=2)
+    ]
+    assert [item["id"] for item in items] == expected
+
+
+def test_enrollments_invalid_cursor(api_client: TestClient, auth_headers, enrollments):
+    response = api_client.get("/enrollments/", params={"cursor": "not-a-cursor"}, headers=auth_headers())
+    assert response.status_code == 400
+
+
+def test_export_enrollments_ndjson(api_client: TestClient, auth_headers, enrollments):
+    response = api_client.get(
+        "/enrollments/export",
+        params={"status": CourseEnrollmentStatus.COMPLETED.value},
+        headers=auth_headers(),
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [e.id for e in enrollments[:3]]
+    assert rows[0]["person_name"] == "Ana"
+    assert rows[0]["person_dni"] == "30111222"
+    assert rows[0]["course_name"] == "Manejo defensivo"
+    assert rows[0]["status"] == "completed"
+
+
+def test_export_enrollments_csv_in_batches(api_client: TestClient, auth_headers, enrollments, monkeypatch):
+    monkeypatch.setattr(course_enrollment_service, "EXPORT_BATCH_SIZE", 3)
+    response = api_client.get("/enrollments/export", params={"format": "csv"}, headers=auth_headers())
+    assert response.status_code == 200
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == len(enrollments)
+    assert rows[1]["person_name"] == "Bruno"
+    assert rows[1]["expiration_date"] == enrollments[1].expiration_date.isoformat()
+
+
+def test_export_enrollments_requires_admin(api_client: TestClient, auth_headers, enrollments):
+    response = api_client.get("/enrollments/export", headers=auth_headers(UserRole.NORMAL))
+    assert response.status_code == 403
+
+
+def test_expiring_or_expired_report(api_client: TestClient, auth_headers, db_session: Session):
+    person = Person(name="Juan", dni="11111111")
+    course = TrafficSafetyCourse(name="Curso A", description="Desc A")
+    db_session.add_all([person, course])
+    db_session.commit()
+
+    today = date.today()
+    for days in (-1, 15, 60, -10):
+        db_session.add(CourseEnrollment(
+            person_id=person.id,
+            course_id=course.id,
+            deadline_date=today,
+            expiration_date=today + timedelta(days=days),
+        ))
+    db_session.commit()
+
+    headers = auth_headers(UserRole.INSPECTOR)
+    first = api_client.get(
+        "/enrollments/reports/expiring-or-expired",
+        params={"days_until_expiration": 30, "limit": 2},
+        headers=headers,
+    )
+    assert first.status_code == 200
+    second = api_client.get(
+        "/enrollments/reports/expiring-or-expired",
+        params={"days_until_expiration": 30, "limit": 2, "cursor": first.json()["next_cursor"]},
+        headers=headers,
+    )
+    items = first.json()["items"] + second.json()["items"]
+
+    assert [item["days_until_expiration"] for item in items] == [-10, -1, 15]
+    assert [item["is_expired"] for item in items] == [True, True, False]
+    assert all(isinstance(item["is_expired"], bool) for item in items)
+    assert second.json()["next_cursor"] is None
+    assert items[0]["person"]["name"] == "Juan"
+    assert items[0]["course"]["name"] == "Curso A"
+
+
+def test_expiring_or_expired_report_forbidden_for_judges(api_client: TestClient, auth_headers, enrollments):
+    response = api_client.get("/enrollments/reports/expiring-or-expired", headers=auth_headers(UserRole.JUDGE))
+    assert response.status_code == 403
+
+
+def test_read_enrollment_and_related_lists(api_client: TestClient, auth_headers, enrollments):
+    headers = auth_headers(UserRole.NORMAL)
+
+    detail = api_client.get(f"/enrollments/{enrollments[0].id}", headers=headers)
+    assert detail.status_code == 200
+    assert detail.json()["person"]["dni"] == "30111222"
+    assert api_client.get("/enrollments/999999", headers=headers).status_code == 404
+
+    by_person = api_client.get(f"/enrollments/person/{enrollments[1].person_id}", headers=headers)
+    assert [item["id"] for item in by_person.json()] == [e.id for e in enrollments[1::2]]
+
+    persons = api_client.get("/persons/", headers=headers)
+    assert [person["name"] for person in persons.json()] == ["Ana", "Bruno"]
+
+
+def test_row_serialized_responses_match_read_schema(api_client: TestClient, auth_headers, enrollments):
+    headers = auth_headers(UserRole.NORMAL)
+    item = api_client.get("/enrollments/", params={"limit": 1}, headers=headers).json()["items"][0]
+
+    assert set(item) == set(CourseEnrollmentRead.__fields__)
+    assert CourseEnrollmentRead.parse_obj(item).json() and item["status"] == "completed"
+    assert item["inspector"] is None
+    assert api_client.get("/courses/", headers=headers).json() == [
+        {"id": enrollments[0].course_id, "name": "Manejo defensivo", "description": "Curso básico"}
+    ]
+
+
+def test_complete_and_use_enrollment_return_relations(api_client: TestClient, auth_headers, enrollments):
+    pending = enrollments[5]
+
+    completed = api_client.post(f"/enrollments/{pending.id}/complete", headers=auth_headers(UserRole.INSPECTOR))
+    assert completed.status_code == 200
+    assert completed.json()["status"] == "completed"
+    assert completed.json()["person"]["name"] == "Bruno"
+
+    used = api_client.post(f"/enrollments/{pending.id}/use", headers=auth_headers(UserRole.JUDGE))
+    assert used.status_code == 200
+    assert used.json()["status"] == "used"
+    assert api_client.post(f"/enrollments/{pending.id}/use", headers=auth_headers(UserRole.JUDGE)).status_code == 404
+
+
+def test_transitions_record_and_embed_the_acting_user(api_client: TestClient, db_session: Session, auth_headers, enrollments):
+    # Filas de catálogo cuyos ids coinciden con los de los usuarios: no deben aparecer en la respuesta
+    db_session.add_all([Inspector(name="Inspector de catálogo") for _ in range(3)] + [Judge(name="Juez de catálogo") for _ in range(3)])
+    db_session.commit()
+    auth_headers(UserRole.ADMIN)
+    inspector, judge = auth_headers(UserRole.INSPECTOR), auth_headers(UserRole.JUDGE)
+    inspector_user = user_service.get_user_by_username("test_inspector", db_session)
+    judge_user = user_service.get_user_by_username("test_juez", db_session)
+    assert inspector_user.id != judge_user.id
+    pending_ids = [enrollments[5].id, enrollments[6].id]
+
+    completed = api_client.post(f"/enrollments/{pending_ids[0]}/complete", headers=inspector).json()
+    assert completed["inspector_id"] == inspector_user.id
+    assert completed["inspector"] == {"id": inspector_user.id, "nombres": "Test", "apellidos": "User"}
+    used = api_client.post(f"/enrollments/{pending_ids[0]}/use", headers=judge).json()
+    assert (used["inspector"]["id"], used["judge"]["id"]) == (inspector_user.id, judge_user.id)
+
+    assert api_client.post("/enrollments/complete-batch", json={"ids": pending_ids[1:]}, headers=inspector).status_code == 200
+    listed = api_client.get(f"/enrollments/{pending_ids[1]}", params={"fields": "inspector_id", "include": "inspector"}, headers=inspector).json()
+    assert listed == {"id": pending_ids[1], "inspector_id": inspector_user.id, "inspector": {"id": inspector_user.id, "nombres": "Test", "apellidos": "User"}}
+
+
+def test_transitions_are_conditional_updates_with_if_match(api_client: TestClient, db_session: Session, auth_headers, enrollments, assert_max_queries):
+    enrollment_stats_service.rebuild_counters(db_session)
+    pending = enrollments[5]
+    admin, inspector = auth_headers(UserRole.ADMIN), auth_headers(UserRole.INSPECTOR)
+    etag = api_client.get(f"/enrollments/{pending.id}", headers=admin).headers["etag"]
+    assert etag == f'"enrollment-{pending.id}-1"'
+
+    # Otro cliente la modifica: el ETag leído antes queda viejo
+    changed = api_client.put(f"/enrollments/{pending.id}", json={"deadline_date": "2030-01-01"}, headers=admin)
+    assert changed.json()["version"] == 2 and changed.headers["etag"] == f'"enrollment-{pending.id}-2"'
+    assert api_client.post(f"/enrollments/{pending.id}/complete", headers=dict(inspector, **{"If-Match": etag})).status_code == 412
+    assert api_client.put(f"/enrollments/{pending.id}", json={"status": "expired"}, headers=dict(admin, **{"If-Match": etag})).status_code == 412
+
+    api_client.get("/enrollments/stats", headers=inspector)  # carga el usuario en la caché de principals
+    with assert_max_queries(4):  # UPDATE condicional, dos contadores y lectura con relaciones; sin leer antes
+        completed = api_client.post(f"/enrollments/{pending.id}/complete", headers=dict(inspector, **{"If-Match": changed.headers["etag"]}))
+    assert completed.status_code == 200
+    assert (completed.json()["status"], completed.json()["version"]) == ("completed", 3)
+    # Estado incorrecto sigue siendo 404, con o sin If-Match
+    assert api_client.post(f"/enrollments/{pending.id}/complete", headers=dict(inspector, **{"If-Match": completed.headers["etag"]})).status_code == 404
+    assert api_client.post(f"/enrollments/{pending.id}/use", headers=dict(auth_headers(UserRole.JUDGE), **{"If-Match": "*"})).status_code == 200
+
+
+def test_batch_transitions_report_per_id_outcomes(api_client: TestClient, db_session: Session, auth_headers, enrollments, assert_max_queries):
+    enrollment_stats_service.rebuild_counters(db_session)
+    inspector, judge = auth_headers(UserRole.INSPECTOR), auth_headers(UserRole.JUDGE)
+    completed_id, pending_ids = enrollments[0].id, [enrollment.id for enrollment in enrollments[3:7]]
+    api_client.get("/enrollments/stats", headers=inspector)  # carga el usuario en la caché de principals
+
+    with assert_max_queries(4):  # UPDATE del lote, dos contadores y la clasificación de los que no cambiaron
+        response = api_client.post("/enrollments/complete-batch", json={"ids": [*pending_ids, completed_id, 999, pending_ids[0]]}, headers=inspector)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["transitioned"], body["wrong_state"], body["not_found"]) == (4, 1, 1)
+    assert [(item["id"], item["outcome"], item["status"]) for item in body["results"]] == [
+        *[(enrollment_id, "transitioned", "completed") for enrollment_id in pending_ids],
+        (completed_id, "wrong_state", "completed"),
+        (999, "not_found", None),
+    ]
+    assert body["results"][0]["version"] == 2
+
+    used = api_client.post("/enrollments/use-batch", json={"ids": pending_ids[:2]}, headers=judge).json()
+    assert used["transitioned"] == 2
+    assert api_client.post("/enrollments/use-batch", json={"ids": pending_ids[:2]}, headers=judge).json()["wrong_state"] == 2
+    assert api_client.post("/enrollments/complete-batch", json={"ids": pending_ids}, headers=judge).status_code == 403
+    assert enrollment_stats_service.rebuild_counters(db_session) == []
+
+
+def test_sparse_fieldsets_project_columns_and_joins(api_client: TestClient, auth_headers, enrollments, assert_max_queries):
+    headers = auth_headers(UserRole.NORMAL)
+    api_client.get("/enrollments/", params={"limit": 1}, headers=headers)  # carga el usuario en la caché de principals
+
+    with assert_max_queries(1) as stats:
+        page = api_client.get("/enrollments/", params={"fields": "status, expiration_date", "limit": 4}, headers=headers).json()
+    assert [set(item) for item in page["items"]] == [{"id", "status", "expiration_date"}] * 4
+    assert not any("JOIN" in statement for statement in stats.statements)
+    # El cursor sigue funcionando aunque sus campos no se hayan pedido
+    params = {"fields": "status", "order_by": "expiration_date", "limit": 3}
+    first = api_client.get("/enrollments/", params=params, headers=headers).json()
+    second = api_client.get("/enrollments/", params=dict(params, cursor=first["next_cursor"]), headers=headers).json()
+    assert {item["id"] for item in first["items"]}.isdisjoint(item["id"] for item in second["items"])
+    # La clave del cursor se lee pero no se devuelve si no se pidió
+    assert [set(item) for item in first["items"] + second["items"]] == [{"id", "status"}] * 6
+    with_person = api_client.get("/enrollments/", params=dict(params, include="person"), headers=headers).json()
+    assert [item["id"] for item in with_person["items"]] == [item["id"] for item in first["items"]]
+    assert all(set(item) == {"id", "status", "person"} and set(item["person"]) == {"id", "name", "dni"} for item in with_person["items"])
+    assert with_person["next_cursor"] == first["next_cursor"]
+
+    enrollment_id, person_id = enrollments[1].id, enrollments[1].person_id
+    with assert_max_queries(1) as stats:
+        by_person = api_client.get(f"/enrollments/person/{person_id}", params={"fields": "status", "include": "person"}, headers=headers).json()
+    assert by_person[0] == {"id": enrollment_id, "status": "completed", "person": {"id": person_id, "name": "Bruno", "dni": "30333444"}}
+    assert sum(statement.count("JOIN") for statement in stats.statements) == 1
+
+    only_course = api_client.get(f"/enrollments/{enrollments[0].id}", params={"include": "course"}, headers=headers)
+    assert set(only_course.json()) == set(CourseEnrollmentRead.__fields__) - {"person", "inspector", "judge"}
+    assert "etag" in only_course.headers
+    assert "etag" not in api_client.get(f"/enrollments/{enrollments[0].id}", params={"fields": "status"}, headers=headers).headers
+    assert api_client.get("/enrollments/", params={"fields": "status,password"}, headers=headers).status_code == 400
+    assert api_client.get("/enrollments/status/pending", params={"include": "persons"}, headers=headers).status_code == 400
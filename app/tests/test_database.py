@@ -0,0 +1,78 @@
+from sqlalchemy import event, inspect
+from sqlmodel import create_engine
+
+from app.config.database import apply_sqlite_pragmas, engine_options
+from app.config.migrations import upgrade_schema
+
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE person (name VARCHAR NOT NULL, dni VARCHAR NOT NULL, id INTEGER NOT NULL, PRIMARY KEY (id))",
+    "CREATE TABLE courseenrollment (person_id INTEGER NOT NULL, course_id INTEGER NOT NULL, "
+    "enrollment_date DATE NOT NULL, completion_date DATE, deadline_date DATE NOT NULL, "
+    "expiration_date DATE NOT NULL, status VARCHAR(10) NOT NULL, inspector_id INTEGER, "
+    "judge_id INTEGER, id INTEGER NOT NULL, PRIMARY KEY (id))",
+    "INSERT INTO person (id, name, dni) VALUES (1, 'Ana', '30111222')",
+    "INSERT INTO courseenrollment (id, person_id, course_id, enrollment_date, deadline_date, expiration_date, status) "
+    "VALUES (7, 1, 1, '2024-01-01', '2024-02-01', '2024-04-01', 'PENDING')",
+]
+
+
+def test_upgrade_schema_adds_indexes_and_foreign_keys(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.exec_driver_sql(statement)
+
+    actions = upgrade_schema(engine)
+
+    inspector = inspect(engine)
+    enrollment_indexes = {index["name"] for index in inspector.get_indexes("courseenrollment")}
+    assert {"ix_courseenrollment_person_id", "ix_courseenrollment_expiration_date"} <= enrollment_indexes
+    assert "ix_person_dni" in {index["name"] for index in inspector.get_indexes("person")}
+    assert "ix_user_username" in {index["name"] for index in inspector.get_indexes("user")}
+    referred = {fk["referred_table"] for fk in inspector.get_foreign_keys("courseenrollment")}
+    assert referred == {"person", "trafficsafetycourse", "user"}
+
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT id, person_id FROM courseenrollment").all() == [(7, 1)]
+    assert actions
+    assert upgrade_schema(engine) == []
+
+
+def test_upgrade_schema_repoints_inspector_and_judge_to_users(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    upgrade_schema(engine)
+    with engine.begin() as connection:
+        # Esquema anterior: inspector_id/judge_id apuntaban a las tablas inspector y judge
+        connection.exec_driver_sql("DROP TABLE courseenrollment")
+        connection.exec_driver_sql(
+            LEGACY_SCHEMA[1].replace("PRIMARY KEY (id))", "PRIMARY KEY (id), FOREIGN KEY(inspector_id) REFERENCES inspector (id), FOREIGN KEY(judge_id) REFERENCES judge (id))")
+        )
+        connection.exec_driver_sql(LEGACY_SCHEMA[3].replace("status)", "status, inspector_id)").replace("'PENDING')", "'COMPLETED', 4)"))
+
+    assert "rebuilt table courseenrollment with foreign keys" in upgrade_schema(engine)
+
+    foreign_keys = {fk["constrained_columns"][0]: fk["referred_table"] for fk in inspect(engine).get_foreign_keys("courseenrollment")}
+    assert foreign_keys["inspector_id"] == foreign_keys["judge_id"] == "user"
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT id, inspector_id FROM courseenrollment").all() == [(7, 4)]
+    assert upgrade_schema(engine) == []
+
+
+def test_sqlite_profile_applies_pragmas(tmp_path):
+    url = f"sqlite:///{tmp_path / 'tuned.db'}"
+    engine = create_engine(url, **engine_options(url))
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert connection.exec_driver_sql("PRAGMA cache_size").scalar() == -65536
+    assert engine.echo is False
+    assert engine.pool.size() == 5
+
+
+def test_engine_options_for_sqlite_memory_skip_pool_sizing():
+    options = engine_options("sqlite://")
+    assert "pool_size" not in options
+    assert options["connect_args"] == {"check_same_thread": False}
@@ -0,0 +1,81 @@
+from collections import Counter
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, func, select
+
+from app.models import CourseEnrollment, CourseEnrollmentStatus, EnrollmentCounter, UserRole
+from app.services import enrollment_stats_service
+
+
+def _expected_stats(session: Session) -> dict:
+    rows = session.exec(
+        select(CourseEnrollment.course_id, CourseEnrollment.status, func.count()).group_by(CourseEnrollment.course_id, CourseEnrollment.status)
+    ).all()
+    by_status = Counter({enrollment_status.value: 0 for enrollment_status in CourseEnrollmentStatus})
+    by_course = Counter()
+    for course_id, enrollment_status, count in rows:
+        by_status[enrollment_status.value] += count
+        by_course[course_id] += count
+    return {"total": sum(by_status.values()), "by_status": dict(by_status), "by_course": dict(by_course)}
+
+
+def test_rebuild_reports_and_corrects_drift(db_session: Session, enrollments):
+    # El fixture inserta las inscripciones sin pasar por los servicios: no hay contadores
+    assert enrollment_stats_service.counters_missing(db_session)
+    course_id = enrollments[0].course_id
+    drift = enrollment_stats_service.rebuild_counters(db_session)
+    assert drift == [(course_id, CourseEnrollmentStatus.PENDING, 0, 7), (course_id, CourseEnrollmentStatus.COMPLETED, 0, 3)]
+    assert enrollment_stats_service.rebuild_counters(db_session) == []
+    assert not enrollment_stats_service.counters_missing(db_session)
+
+
+def test_stats_follow_writes_in_the_same_transaction(api_client: TestClient, db_session: Session, enrollments, auth_headers, assert_max_queries):
+    enrollment_stats_service.rebuild_counters(db_session)
+    admin, inspector, judge = auth_headers(UserRole.ADMIN), auth_headers(UserRole.INSPECTOR), auth_headers(UserRole.JUDGE)
+    course_id = enrollments[0].course_id
+    pending_ids = [enrollment.id for enrollment in enrollments[3:6]]
+    completed_id, deleted_id = enrollments[0].id, enrollments[9].id
+    other_course = api_client.post("/courses/", json={"name": "Motos", "description": "Curso"}, headers=admin).json()["id"]
+    deadline = (date.today() + timedelta(days=30)).isoformat()
+
+    assert api_client.post(f"/enrollments/{pending_ids[0]}/complete", headers=inspector).status_code == 200
+    assert api_client.post(f"/enrollments/{completed_id}/use", headers=judge).status_code == 200
+    assert api_client.put(f"/enrollments/{pending_ids[1]}", json={"status": "incomplete"}, headers=admin).status_code == 200
+    assert api_client.delete(f"/enrollments/{deleted_id}", headers=admin).status_code == 204
+    new_enrollment = {"person_id": enrollments[0].person_id, "course_id": other_course, "deadline_date": deadline, "expiration_date": deadline}
+    assert api_client.post("/enrollments/", json=new_enrollment, headers=admin).status_code == 201
+    bulk = api_client.post("/enrollments/bulk", json=[new_enrollment, dict(new_enrollment, course_id=course_id), dict(new_enrollment, person_id=999)], headers=admin)
+    assert bulk.json()["created"] == 2
+    # Transiciones rechazadas: no deben mover los contadores
+    assert api_client.post(f"/enrollments/{pending_ids[0]}/complete", headers=inspector).status_code == 404
+
+    api_client.get("/enrollments/stats", headers=admin)  # carga el usuario en la caché de principals
+    with assert_max_queries(1):
+        response = api_client.get("/enrollments/stats", headers=admin)
+    assert response.status_code == 200
+    stats = response.json()
+    expected = _expected_stats(db_session)
+    assert stats["total"] == expected["total"] == 12
+    assert stats["by_status"] == expected["by_status"]
+    assert {row["course_id"]: row["count"] for row in stats["by_course"]} == expected["by_course"]
+    assert {"course_id": course_id, "status": "incomplete", "count": 1} in stats["by_status_course"]
+    assert sum(row["count"] for row in stats["by_status_course"]) == stats["total"]
+    assert enrollment_stats_service.rebuild_counters(db_session) == []
+
+    # Los contadores en cero no aparecen en el desglose
+    db_session.add(EnrollmentCounter(course_id=other_course, status=CourseEnrollmentStatus.EXPIRED, count=0))
+    db_session.commit()
+    assert all(row["count"] for row in api_client.get("/enrollments/stats", headers=admin).json()["by_status_course"])
+
+
+def test_deltas_create_missing_counters_with_a_single_upsert(db_session: Session, assert_max_queries):
+    pending, used = (41, CourseEnrollmentStatus.PENDING), (41, CourseEnrollmentStatus.USED)
+    with assert_max_queries(2) as stats:
+        enrollment_stats_service.apply_deltas(db_session, {pending: 3, used: -1})
+    assert stats.statements and all("ON CONFLICT" in statement for statement in stats.statements)
+    enrollment_stats_service.apply_deltas(db_session, {pending: -1})
+    db_session.commit()
+
+    counters = db_session.exec(select(EnrollmentCounter.status, EnrollmentCounter.count).where(EnrollmentCounter.course_id == 41)).all()
+    assert dict(counters) == {CourseEnrollmentStatus.PENDING: 2, CourseEnrollmentStatus.USED: -1}
@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+
+from sqlmodel import Session, select
+
+from app.models import CourseEnrollment, CourseEnrollmentStatus, Person, TrafficSafetyCourse
+from app.services import enrollment_stats_service, expiry_sweep_service
+from app.services.expiry_sweep_service import SWEEP_RULES, due_enrollments_statement, sweep_expired_enrollments
+
+TODAY = date(2024, 6, 15)
+
+
+def _add(session: Session, person_id: int, course_id: int, enrollment_status: CourseEnrollmentStatus, deadline: date, expiration: date) -> CourseEnrollment:
+    enrollment = CourseEnrollment(person_id=person_id, course_id=course_id, status=enrollment_status, deadline_date=deadline, expiration_date=expiration)
+    session.add(enrollment)
+    return enrollment
+
+
+def _statuses(session: Session) -> dict:
+    session.expire_all()
+    return {enrollment.id: enrollment.status for enrollment in session.exec(select(CourseEnrollment))}
+
+
+def test_sweep_transitions_due_rows_in_batches_and_keeps_counters(db_engine, db_session: Session):
+    person, course = Person(name="Ana", dni="30111222"), TrafficSafetyCourse(name="Motos", description="Curso")
+    db_session.add_all([person, course])
+    db_session.commit()
+    yesterday, tomorrow = TODAY - timedelta(days=1), TODAY + timedelta(days=1)
+    late = [_add(db_session, person.id, course.id, CourseEnrollmentStatus.PENDING, TODAY - timedelta(days=days), tomorrow) for days in (1, 3, 3, 9, 20)]
+    on_time = _add(db_session, person.id, course.id, CourseEnrollmentStatus.PENDING, TODAY, TODAY)
+    expired = _add(db_session, person.id, course.id, CourseEnrollmentStatus.COMPLETED, yesterday, yesterday)
+    valid = _add(db_session, person.id, course.id, CourseEnrollmentStatus.COMPLETED, yesterday, TODAY)
+    used = _add(db_session, person.id, course.id, CourseEnrollmentStatus.USED, yesterday, yesterday)
+    db_session.commit()
+    enrollment_stats_service.rebuild_counters(db_session)
+
+    assert sweep_expired_enrollments(db_engine, TODAY, batch_size=2, pause_seconds=0) == {"pending_deadline": 5, "completed_expiration": 1}
+    statuses = _statuses(db_session)
+    assert all(statuses[enrollment.id] == CourseEnrollmentStatus.INCOMPLETE for enrollment in late)
+    assert statuses[expired.id] == CourseEnrollmentStatus.EXPIRED
+    assert statuses[on_time.id] == CourseEnrollmentStatus.PENDING
+    assert statuses[valid.id] == CourseEnrollmentStatus.COMPLETED
+    assert statuses[used.id] == CourseEnrollmentStatus.USED
+    # Los contadores se movieron junto con los estados
+    assert enrollment_stats_service.rebuild_counters(db_session) == []
+    assert expiry_sweep_service.get_watermark(db_session, SWEEP_RULES[0]) == yesterday
+
+    # La corrida siguiente solo mira lo que venció desde la marca de agua
+    backdated = _add(db_session, person.id, course.id, CourseEnrollmentStatus.PENDING, TODAY - timedelta(days=30), tomorrow)
+    db_session.commit()
+    assert sweep_expired_enrollments(db_engine, TODAY, pause_seconds=0) == {"pending_deadline": 0, "completed_expiration": 0}
+    assert sweep_expired_enrollments(db_engine, TODAY + timedelta(days=2), pause_seconds=0)["pending_deadline"] == 1  # on_time
+    assert _statuses(db_session)[backdated.id] == CourseEnrollmentStatus.PENDING
+    assert sweep_expired_enrollments(db_engine, TODAY, pause_seconds=0, full=True)["pending_deadline"] == 1
+    assert _statuses(db_session)[backdated.id] == CourseEnrollmentStatus.INCOMPLETE
+    assert expiry_sweep_service.get_watermark(db_session, SWEEP_RULES[0]) == TODAY + timedelta(days=1)
+
+
+def test_due_rows_are_found_through_the_status_date_indexes(db_engine):
+    with db_engine.connect() as connection:
+        for rule, index_name in zip(SWEEP_RULES, ("ix_courseenrollment_status_deadline_date", "ix_courseenrollment_status_expiration_date")):
+            statement = due_enrollments_statement(rule, TODAY, TODAY - timedelta(days=7), 500)
+            compiled = statement.compile(connection, compile_kwargs={"literal_binds": True})
+            plan = " ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}"))
+            assert index_name in plan and "SCAN" not in plan.replace("USING INDEX", "")
@@ -0,0 +1,68 @@
+import io
+import json
+
+import pytest
+from sqlmodel import Session, select
+
+from app.models import CourseEnrollment, CourseEnrollmentStatus, ImportKind, Person, TrafficSafetyCourse
+from app.services import import_service
+
+
+def _write(path, text: str) -> str:
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_import_persons_csv_rejects_invalid_and_duplicate_dnis(db_engine, db_session: Session, tmp_path):
+    db_session.add(Person(name="Ana", dni="30111222"))
+    db_session.commit()
+    path = _write(tmp_path / "personas.csv", "name,dni\nBruno,30333444\nAna bis,30111222\nSin DNI,\nBruno bis,30333444\nCarla,30555666\n")
+    rejects = io.StringIO()
+
+    checkpoint = import_service.import_file(db_engine, ImportKind.PERSONS, path, batch_size=2, rejects=rejects)
+
+    assert (checkpoint.rows_done, checkpoint.inserted, checkpoint.failed, checkpoint.finished) == (5, 2, 3, True)
+    assert [json.loads(line)["row"] for line in rejects.getvalue().splitlines()] == [2, 3, 4]
+    assert sorted(p.dni for p in db_session.exec(select(Person)).all()) == ["30111222", "30333444", "30555666"]
+
+
+def test_import_enrollments_resolves_dni_and_course_name(db_engine, db_session: Session, tmp_path):
+    person = Person(name="Ana", dni="30111222")
+    course = TrafficSafetyCourse(name="Manejo defensivo", description="Curso básico")
+    db_session.add_all([person, course])
+    db_session.commit()
+    lines = [
+        {"person_dni": "30111222", "course_name": "Manejo defensivo", "deadline_date": "2030-01-01", "expiration_date": "2031-01-01"},
+        {"person_dni": "99999999", "course_id": course.id, "deadline_date": "2030-01-01", "expiration_date": "2031-01-01"},
+        "no es json",
+        {"person_id": person.id, "course_id": course.id, "deadline_date": "2030-01-01", "expiration_date": "2031-01-01", "status": "completed"},
+    ]
+    path = _write(tmp_path / "inscripciones.jsonl", "\n".join(l if isinstance(l, str) else json.dumps(l) for l in lines) + "\n")
+
+    checkpoint = import_service.import_file(db_engine, ImportKind.ENROLLMENTS, path)
+
+    assert (checkpoint.inserted, checkpoint.failed) == (2, 2)
+    enrollments = db_session.exec(select(CourseEnrollment).order_by(CourseEnrollment.id)).all()
+    assert [(e.person_id, e.status) for e in enrollments] == [
+        (person.id, CourseEnrollmentStatus.PENDING),
+        (person.id, CourseEnrollmentStatus.COMPLETED),
+    ]
+
+
+def test_import_resumes_after_last_committed_batch(db_engine, db_session: Session, tmp_path):
+    path = _write(tmp_path / "cursos.csv", "name,description\n" + "".join(f"Curso {i},Descripción\n" for i in range(7)))
+
+    def interrupt(checkpoint, processed):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        import_service.import_file(db_engine, ImportKind.COURSES, path, batch_size=3, on_progress=interrupt)
+
+    checkpoint = import_service.import_file(db_engine, ImportKind.COURSES, path, batch_size=3)
+    assert (checkpoint.rows_done, checkpoint.inserted) == (7, 7)
+    assert [c.name for c in db_session.exec(select(TrafficSafetyCourse).order_by(TrafficSafetyCourse.id)).all()] == [f"Curso {i}" for i in range(7)]
+
+    # Un archivo ya importado no se vuelve a procesar salvo con restart
+    assert import_service.import_file(db_engine, ImportKind.COURSES, path).inserted == 7
+    assert import_service.import_file(db_engine, ImportKind.COURSES, path, restart=True).inserted == 7
+    assert len(db_session.exec(select(TrafficSafetyCourse)).all()) == 14
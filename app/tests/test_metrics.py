@@ -0,0 +1,120 @@
+import asyncio
+import os
+import re
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models import UserRole
+from app.monitoring import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    for metric in metrics.registry.metrics.values():
+        metric.series.clear()
+    yield
+
+
+def _sample(text: str, name: str, **labels) -> float:
+    """Valor de la muestra `name` cuyas etiquetas incluyen `labels` (0 si no existe)."""
+    for line in text.splitlines():
+        match = re.match(rf"^{name}\{{(.*)\}} (\S+)$", line)
+        if match and all(f'{key}="{value}"' in match.group(1) for key, value in labels.items()):
+            return float(match.group(2))
+    return 0.0
+
+
+def test_metrics_record_latency_and_db_time_per_route(api_client: TestClient, auth_headers):
+    headers = auth_headers(UserRole.NORMAL)
+    for _ in range(3):
+        assert api_client.get("/enrollments/999", headers=headers).status_code == 404
+    api_client.get("/no-existe")
+
+    response = api_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    route = {"method": "GET", "route": "/enrollments/{enrollment_id}"}
+    assert _sample(text, "http_request_duration_seconds_count", status="404", **route) == 3
+    assert _sample(text, "http_request_duration_seconds_bucket", status="404", le="+Inf", **route) == 3
+    assert _sample(text, "http_request_db_seconds_sum", **route) > 0
+    assert _sample(text, "http_request_duration_seconds_count", route="unmatched", status="404") == 1
+    # El request de /metrics es el único en curso mientras se generan las métricas
+    assert _sample(text, "http_requests_in_flight", method="GET", router="/metrics") == 1
+    assert _sample(text, "http_requests_in_flight", method="GET", router="/enrollments") == 0
+
+
+def test_metrics_aggregate_worker_snapshots(api_client: TestClient, tmp_path, monkeypatch):
+    labels = ("GET", "/persons/", "200")
+    metrics.REQUEST_DURATION.observe(labels, 0.02)
+    metrics.REQUESTS_IN_FLIGHT.inc(("GET", "/persons"))
+    snapshot = metrics.registry.snapshot()
+    # Un worker vivo (el proceso padre) y uno terminado publicaron lo mismo que este proceso
+    metrics.write_worker_snapshot(str(tmp_path), snapshot, pid=os.getppid())
+    metrics.write_worker_snapshot(str(tmp_path), snapshot, pid=2 ** 22 + 1)
+    monkeypatch.setattr(metrics, "METRICS_MULTIPROC_DIR", str(tmp_path))
+
+    text = api_client.get("/metrics").text
+
+    assert _sample(text, "http_request_duration_seconds_count", route="/persons/", status="200") == 3
+    assert _sample(text, "http_request_duration_seconds_bucket", route="/persons/", le="0.025") == 3
+    assert _sample(text, "http_request_duration_seconds_sum", route="/persons/") == pytest.approx(0.06)
+    assert _sample(text, "http_requests_in_flight", router="/persons") == 2
+
+
+def test_threaded_metrics_lock_updates_and_snapshots():
+    histogram = metrics.Histogram("hilos_seconds", "h", (), (1.0,), threaded=True)
+    counter = metrics.Counter("hilos_total", "c", ("estado",), threaded=True)
+    registry = metrics.MetricsRegistry([histogram, counter])
+
+    def work():
+        for _ in range(5000):
+            histogram.observe((), 0.5)
+            counter.inc(("expired",))
+
+    workers = [threading.Thread(target=work) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    snapshots = [registry.snapshot() for _ in range(50)]
+    for worker in workers:
+        worker.join()
+
+    assert histogram.series[()] == [40000, 0, 20000.0]
+    assert counter.series[("expired",)] == [40000]
+    # Cada copia ve la observación completa: la suma siempre corresponde a la cuenta
+    for snapshot in snapshots:
+        for _, series in snapshot["hilos_seconds"]:
+            assert series[-1] == series[0] * 0.5
+
+    # snapshot() espera a que termine el registro en curso
+    with histogram.lock:
+        copying = threading.Thread(target=registry.snapshot)
+        copying.start()
+        copying.join(0.1)
+        assert copying.is_alive()
+    copying.join(5)
+    assert not copying.is_alive()
+
+
+def test_snapshot_publisher_survives_a_failed_write(tmp_path, monkeypatch):
+    written = []
+
+    def flaky_write(directory, snapshot):
+        if not written:
+            written.append(None)
+            raise OSError("No space left on device")
+        written.append(snapshot)
+
+    monkeypatch.setattr(metrics, "write_worker_snapshot", flaky_write)
+
+    async def run_until_published():
+        task = asyncio.create_task(metrics.publish_periodically(metrics.registry, str(tmp_path), 0.01))
+        while len(written) < 2 and not task.done():
+            await asyncio.sleep(0.01)
+        assert not task.done(), "la publicación terminó después del error"
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(run_until_published(), timeout=5))
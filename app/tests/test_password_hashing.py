@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.hash import pbkdf2_sha256
+from sqlmodel import Session
+
+from app.models import UserCreate, UserRole
+from app.monitoring import metrics
+from app.security import password_hashing, security
+from app.security.password_hashing import PasswordHasher, PasswordHasherBusy, VerificationCache
+from app.services import user_service
+
+
+@pytest.fixture(name="inspector")
+def inspector_fixture(db_session: Session):
+    return user_service.create_user(
+        UserCreate(username="inspector", password="secreta", dni="1", nombres="Ana", apellidos="Paz", role=UserRole.INSPECTOR),
+        db_session,
+    )
+
+
+def _login(client: TestClient, password: str = "secreta"):
+    return client.post("/users/token", data={"username": "inspector", "password": password})
+
+
+def test_login_verifies_in_pool_without_debug_output(api_client: TestClient, inspector, capsys):
+    response = _login(api_client)
+    assert response.status_code == 200
+    assert security.decode_access_token(response.json()["access_token"])["sub"] == "inspector"
+    assert _login(api_client, "otra").status_code == 401
+    assert api_client.post("/users/token", data={"username": "nadie", "password": "x"}).status_code == 401
+
+    # El segundo login correcto sale de la caché de verificaciones
+    assert len(password_hashing.password_hasher.cache) == 1
+    assert _login(api_client).status_code == 200
+    assert "secreta" not in capsys.readouterr().out
+
+
+def test_login_rehashes_passwords_with_other_rounds(api_client: TestClient, inspector, db_session: Session):
+    inspector.hashed_password = pbkdf2_sha256.using(rounds=1000).hash("secreta")
+    db_session.add(inspector)
+    db_session.commit()
+
+    assert _login(api_client).status_code == 200
+    db_session.refresh(inspector)
+    assert inspector.hashed_password.startswith(f"$pbkdf2-sha256${security.PBKDF2_ROUNDS}$")
+    assert security.verify_password("secreta", inspector.hashed_password)
+
+
+def test_login_returns_503_when_pool_is_full(api_client: TestClient, inspector, monkeypatch):
+    async def busy(password, hashed_password):
+        raise PasswordHasherBusy("full")
+
+    monkeypatch.setattr(password_hashing.password_hasher, "verify_async", busy)
+    response = _login(api_client)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_hasher_rejects_work_beyond_queue_and_reports_depth(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(security, "verify_and_update_password", lambda password, hashed: (release.wait(5), None))
+    hasher = PasswordHasher(workers=1, queue_size=1, cache=VerificationCache(max_size=0))
+    rejected = metrics.PASSWORD_HASH_REJECTED.labels(("verify",))[0]
+    try:
+        running = hasher._submit("verify", hasher._verify, "a", "hash-a")
+        queued = hasher._submit("verify", hasher._verify, "b", "hash-b")
+        with pytest.raises(PasswordHasherBusy):
+            hasher.verify("c", "hash-c")
+        assert hasher.pending == 2
+        assert metrics.PASSWORD_HASH_REJECTED.labels(("verify",))[0] == rejected + 1
+        assert "password_hash_queue_depth" in metrics.registry.collect()
+        release.set()
+        assert running.result(5) == (True, None) and queued.result(5) == (True, None)
+        assert hasher.pending == 0
+    finally:
+        release.set()
+        hasher.shutdown()
+
+
+def test_submit_racing_shutdown_releases_its_queue_slot():
+    hasher = PasswordHasher(workers=1, queue_size=0, cache=VerificationCache(max_size=0))
+    hasher._submit("hash", len, "a").result(5)
+    depth = metrics.PASSWORD_HASH_QUEUE_DEPTH.labels()[0]
+    # El pool se cierra después de que _submit tomó su lugar en la cola y antes de encolar
+    hasher._executor.shutdown()
+    with pytest.raises(RuntimeError):
+        hasher._submit("hash", len, "b")
+    assert hasher.pending == 0
+    assert metrics.PASSWORD_HASH_QUEUE_DEPTH.labels()[0] == depth
+    hasher.shutdown()
+    assert hasher._submit("hash", len, "c").result(5) == 1
+    hasher.shutdown()
+
+
+def test_verification_cache_is_bound_to_the_stored_hash():
+    cache = VerificationCache(max_size=2, ttl_seconds=60)
+    cache.add("secreta", "hash-1")
+    assert cache.contains("secreta", "hash-1")
+    assert not cache.contains("secreta", "hash-2")
+    assert not cache.contains("otra", "hash-1")
+    cache.add("b", "hash-b")
+    cache.add("c", "hash-c")
+    assert not cache.contains("secreta", "hash-1")
+    assert len(cache) == 2
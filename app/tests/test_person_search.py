@@ -0,0 +1,66 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models import Person, UserRole
+from app.services import person_service
+
+
+def _search(client: TestClient, headers: dict, q: str, **params) -> list:
+    response = client.get("/persons/search", params=dict(params, q=q), headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_search_by_dni_exact_and_prefix(api_client: TestClient, db_session: Session, auth_headers):
+    db_session.add_all([Person(name="Ana", dni=dni) for dni in ("30111222", "3011122", "30111229", "30112000", "29111222")])
+    db_session.commit()
+    headers = auth_headers(UserRole.ADMIN)
+
+    results = _search(api_client, headers, "30.111.222")
+    assert [(person["dni"], person["match"]) for person in results] == [("30111222", "dni_exact")]
+    results = _search(api_client, headers, "3011122")
+    assert [(person["dni"], person["match"]) for person in results] == [
+        ("3011122", "dni_exact"), ("30111222", "dni_prefix"), ("30111229", "dni_prefix"),
+    ]
+    assert len(_search(api_client, headers, "30", limit=2)) == 2
+
+
+def test_search_by_name_ignores_accents_and_case_and_follows_writes(api_client: TestClient, auth_headers):
+    headers = auth_headers(UserRole.ADMIN)
+    created = {}
+    for name, dni in (("José Pérez", "1"), ("Josefina Peralta", "2"), ("María José Núñez", "3"), ("Pedro Gómez", "4")):
+        created[name] = api_client.post("/persons/", json={"name": name, "dni": dni}, headers=headers).json()["id"]
+    api_client.post("/persons/bulk", json=[{"name": "JOSÉ PEREYRA", "dni": "5"}], headers=headers)
+
+    # Primero las palabras completas ("jose"), luego los prefijos ("Josefina")
+    assert [person["name"] for person in _search(api_client, headers, "jose per")] == ["José Pérez", "JOSÉ PEREYRA", "Josefina Peralta"]
+    assert [person["name"] for person in _search(api_client, headers, "NUNEZ")] == ["María José Núñez"]
+    assert all(person["match"] == "name" for person in _search(api_client, headers, "gomez"))
+    # Sintaxis de FTS5 en la búsqueda: se trata como texto
+    assert _search(api_client, headers, 'pedro" OR name:*') == []
+    assert _search(api_client, headers, "*") == []
+
+    api_client.put(f"/persons/{created['Pedro Gómez']}", json={"name": "Pedro Ibáñez"}, headers=headers)
+    assert _search(api_client, headers, "gomez") == []
+    assert [person["name"] for person in _search(api_client, headers, "ibanez")] == ["Pedro Ibáñez"]
+    api_client.delete(f"/persons/{created['José Pérez']}", headers=headers)
+    assert "José Pérez" not in {person["name"] for person in _search(api_client, headers, "jose")}
+
+
+def test_whole_word_matches_are_found_beyond_the_prefix_window(api_client: TestClient, db_session: Session, auth_headers, monkeypatch):
+    monkeypatch.setattr(person_service, "PERSON_SEARCH_CANDIDATES", 5)
+    # Más coincidencias por prefijo que la ventana, todas con ids menores que la coincidencia completa
+    db_session.add_all([Person(name=f"Lunardi Pérez {i}", dni=str(i)) for i in range(12)] + [Person(name="Ana Luna", dni="99")])
+    db_session.commit()
+    headers = auth_headers(UserRole.ADMIN)
+
+    assert [person["name"] for person in _search(api_client, headers, "luna", limit=3)] == ["Ana Luna", "Lunardi Pérez 0", "Lunardi Pérez 1"]
+    assert _search(api_client, headers, "luna", limit=1)[0]["name"] == "Ana Luna"
+
+
+def test_name_match_quotes_every_token():
+    assert person_service.build_name_match('José "Pérez" OR') == '"José"* "Pérez"* "OR"*'
+    assert person_service.build_name_match("jose per", prefix=False) == '"jose" "per"'
+    assert person_service.build_name_match("-- ") is None
+    assert person_service.normalize_dni_query("30 111-222") == "30111222"
+    assert person_service.name_rank("María José Núñez", ["jose", "nunez"]) < person_service.name_rank("José Núñez Peralta Ruiz", ["jose", "nu"])
@@ -0,0 +1,58 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.models import CourseEnrollment, UserRole
+from app.monitoring.middleware import MetricsMiddleware
+from app.monitoring.sql import statement_shape
+
+
+def test_enrollment_endpoints_query_budget(api_client: TestClient, auth_headers, assert_max_queries, enrollments, db_session):
+    headers = auth_headers(UserRole.ADMIN)
+    api_client.get("/enrollments/", headers=headers)  # llena la caché de usuarios autenticados
+    # Los ids se leen antes de medir: acceder a un objeto expirado de la sesión del test también consulta
+    first_id, person_id, updated_id = enrollments[0].id, enrollments[0].person_id, enrollments[3].id
+    template = enrollments[0].dict(exclude={"id"})
+
+    with assert_max_queries(1):
+        assert api_client.get("/enrollments/", params={"limit": 5}, headers=headers).status_code == 200
+    with assert_max_queries(1):
+        assert api_client.get(f"/enrollments/{first_id}", headers=headers).status_code == 200
+    with assert_max_queries(1):
+        assert api_client.get(f"/enrollments/person/{person_id}", headers=headers).status_code == 200
+    with assert_max_queries(4):
+        response = api_client.put(f"/enrollments/{updated_id}", json={"deadline_date": "2031-01-01"}, headers=headers)
+        assert response.status_code == 200
+
+    # Cien inscripciones más no cambian la cantidad de consultas del listado
+    db_session.add_all([CourseEnrollment(**template) for _ in range(100)])
+    db_session.commit()
+    with assert_max_queries(1):
+        assert len(api_client.get("/enrollments/", params={"limit": 100}, headers=headers).json()["items"]) == 100
+
+
+def test_debug_headers_flag_repeated_statements(db_engine, caplog):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, sql_debug_headers=True)
+
+    @app.get("/items")
+    def read_items():
+        with db_engine.connect() as connection:
+            for i in range(6):
+                connection.execute(text("SELECT :i"), {"i": i})
+        return {}
+
+    with caplog.at_level(logging.WARNING, logger="app.monitoring.sql"):
+        response = TestClient(app).get("/items")
+
+    assert response.headers["x-db-query-count"] == "6"
+    assert float(response.headers["x-db-time-ms"]) >= 0
+    assert response.headers["x-db-n-plus-one"] == "6x SELECT ?"
+    assert "Posible N+1 en GET /items" in caplog.text
+
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT id\n FROM person WHERE id IN (?, ?, ?)") == "SELECT id FROM person WHERE id IN (?)"
+    assert statement_shape("SELECT 1 WHERE id IN (%(id_1_1)s, %(id_1_2)s)") == "SELECT 1 WHERE id IN (?)"
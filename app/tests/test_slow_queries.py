@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.models import UserRole
+from app.monitoring import slow_queries
+from app.monitoring.slow_queries import SlowQueryLog
+
+
+@pytest.fixture(name="slow_query_log")
+def slow_query_log_fixture(db_engine, tmp_path, monkeypatch):
+    log = SlowQueryLog(path=str(tmp_path / "slow_queries.jsonl"), threshold_ms=0)
+    log.attach(db_engine)
+    monkeypatch.setattr(slow_queries, "slow_query_log", log)
+    yield log
+    log.detach(db_engine)
+    log.close()
+
+
+def test_slow_queries_record_route_and_plan(api_client: TestClient, auth_headers, enrollments, db_session: Session, slow_query_log):
+    headers = auth_headers(UserRole.ADMIN)
+    enrollment_id = enrollments[0].id
+    response = api_client.put(f"/enrollments/{enrollment_id}", json={"deadline_date": "2031-01-01"}, headers=headers)
+    assert response.status_code == 200
+
+    # Consulta sin índice: recorre la tabla completa
+    db_session.exec(text("SELECT id FROM person WHERE name = :name"), params={"name": "Ana"}).all()
+
+    response = api_client.get("/monitoring/slow-queries", headers=headers)
+    assert response.status_code == 200
+    entries = response.json()
+    assert entries[0]["statement"] == "SELECT id FROM person WHERE name = ?"
+    assert entries[0]["route"] is None
+    assert entries[0]["table_scans"] == ["person"]
+    assert entries[0]["plan"] == ["SCAN person"]
+
+    update = next(entry for entry in entries if entry["statement"].startswith("UPDATE courseenrollment"))
+    assert update["route"] == "PUT /enrollments/{enrollment_id}"
+    assert update["plan"] and update["table_scans"] == []
+    assert update["duration_ms"] >= 0
+
+    scans = api_client.get("/monitoring/slow-queries", params={"table_scans_only": True}, headers=headers).json()
+    assert scans and all(entry["table_scans"] for entry in scans)
+
+    assert api_client.get("/monitoring/slow-queries", headers=auth_headers(UserRole.INSPECTOR, "inspector")).status_code == 403
+
+
+def test_slow_query_log_reads_rotated_files(tmp_path):
+    log = SlowQueryLog(path=str(tmp_path / "slow.jsonl"), threshold_ms=0, max_bytes=500, backups=2)
+    for index in range(20):
+        log.record({"timestamp": str(index), "duration_ms": 1.0, "route": None, "statement": f"SELECT {index}", "plan": [], "table_scans": []})
+    log.close()
+
+    assert (tmp_path / "slow.jsonl.1").exists()
+    assert [entry["statement"] for entry in log.read(limit=6)] == [f"SELECT {index}" for index in range(19, 13, -1)]
+
+
+def test_slow_query_endpoint_disabled(api_client: TestClient, auth_headers, monkeypatch):
+    monkeypatch.setattr(slow_queries, "slow_query_log", None)
+    assert api_client.get("/monitoring/slow-queries", headers=auth_headers(UserRole.ADMIN)).status_code == 404
+
+
+class _PostgresCursor:
+    """Cursor que imita a PostgreSQL: después de un error, solo acepta volver a un SAVEPOINT."""
+
+    def __init__(self, executed: list):
+        self.executed = executed
+        self.aborted = False
+
+    def execute(self, sql, parameters=None):
+        self.executed.append(sql.split(" (")[0])
+        if self.aborted and not sql.startswith("ROLLBACK TO SAVEPOINT"):
+            raise RuntimeError("current transaction is aborted")
+        self.aborted = False
+        if sql.startswith("EXPLAIN"):
+            self.aborted = True
+            raise RuntimeError("permission denied for function")
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("autocommit,expected", [
+    (False, ["SAVEPOINT slow_query_explain", "EXPLAIN", "ROLLBACK TO SAVEPOINT slow_query_explain", "RELEASE SAVEPOINT slow_query_explain"]),
+    (True, ["EXPLAIN"]),
+])
+def test_failed_postgresql_explain_is_rolled_back_to_a_savepoint(autocommit, expected):
+    executed = []
+    dbapi_connection = SimpleNamespace(autocommit=autocommit, cursor=lambda: _PostgresCursor(executed))
+    conn = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"), connection=SimpleNamespace(dbapi_connection=dbapi_connection))
+
+    entry = SlowQueryLog(threshold_ms=0).build_entry(conn, "SELECT id FROM person WHERE name = %(name)s", {"name": "Ana"}, False, 0.5)
+
+    assert entry["explain_error"] == "permission denied for function"
+    assert executed == expected
+
@@ -0,0 +1,19 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def test_app_import_defers_crypto_backends(tmp_path):
+    # Proceso nuevo: en el de pytest los demás tests ya importaron jose y passlib
+    probe = (
+        "import json, sys\n"
+        "import app.main\n"
+        "print(json.dumps([name for name in ('jose', 'passlib', 'aiosqlite') if name in sys.modules]))\n"
+    )
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}", PYTHONPATH=ROOT)
+    env.pop("DB_CREATE_TABLES_ON_STARTUP", None)
+    result = subprocess.run([sys.executable, "-c", probe], env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+from app.models import UserCreate, UserRole, UserTokenRevocation
+from app.routers import user_router
+from app.security import security, token_revocation
+from app.security.token_revocation import TokenDenyList, principal_from_claims, sync_from_database
+from app.services import user_service
+
+
+@pytest.fixture(autouse=True)
+def stateless_mode(monkeypatch):
+    monkeypatch.setattr(user_router, "AUTH_STATELESS", True)
+
+
+def _create_and_login(client: TestClient, session: Session, username: str, role: UserRole) -> dict:
+    user_service.create_user(
+        UserCreate(username=username, password="secreta", dni="1", nombres="N", apellidos="A", role=role),
+        session,
+    )
+    token = client.post("/users/token", data={"username": username, "password": "secreta"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_role_guards_use_token_claims_without_user_queries(api_client: TestClient, db_session: Session, enrollments, assert_max_queries):
+    headers = _create_and_login(api_client, db_session, "inspector", UserRole.INSPECTOR)
+    payload = security.decode_access_token(headers["Authorization"].split()[1])
+    assert {"sub", "role", "uid", "iat", "exp"} <= payload.keys()
+    enrollment_id = enrollments[5].id  # pending
+
+    # Solo la consulta de la inscripción: la autenticación no toca la tabla de usuarios
+    with assert_max_queries(1):
+        assert api_client.get(f"/enrollments/{enrollment_id}", headers=headers).status_code == 200
+    with assert_max_queries(1):
+        assert api_client.get("/enrollments/reports/expiring-or-expired", headers=headers).status_code == 200
+    assert api_client.get("/users/", headers=headers).status_code == 403
+
+    completed = api_client.post(f"/enrollments/{enrollment_id}/complete", headers=headers)
+    assert completed.status_code == 200
+    assert completed.json()["inspector_id"] == payload["uid"]
+
+
+def test_user_update_and_delete_revoke_issued_tokens(api_client: TestClient, db_session: Session, auth_headers):
+    admin = auth_headers(UserRole.ADMIN)
+    headers = _create_and_login(api_client, db_session, "juez", UserRole.JUDGE)
+    user_id = security.decode_access_token(headers["Authorization"].split()[1])["uid"]
+
+    # Cambiar datos que no están en el token no revoca la sesión
+    assert api_client.put(f"/users/{user_id}", json={"nombres": "Otro"}, headers=admin).status_code == 200
+    assert api_client.get(f"/users/{user_id}", headers=headers).status_code == 200
+
+    assert api_client.put(f"/users/{user_id}", json={"role": "normal"}, headers=admin).status_code == 200
+    assert api_client.get(f"/users/{user_id}", headers=headers).status_code == 401
+    assert db_session.get(UserTokenRevocation, user_id) is not None
+
+    # Un login posterior a la revocación emite un token válido con el rol nuevo
+    token = api_client.post("/users/token", data={"username": "juez", "password": "secreta"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert security.decode_access_token(token)["role"] == "normal"
+    assert api_client.get(f"/users/{user_id}", headers=headers).status_code == 200
+
+    assert api_client.delete(f"/users/{user_id}", headers=admin).status_code == 204
+    assert api_client.get(f"/users/{user_id}", headers=headers).status_code == 401
+
+
+def test_denylist_syncs_revocations_from_other_workers(db_engine, db_session: Session):
+    db_session.add(UserTokenRevocation(user_id=7, revoked_at=time.time()))
+    db_session.add(UserTokenRevocation(user_id=8, revoked_at=time.time() - 10 * 24 * 3600))
+    db_session.commit()
+
+    denylist = TokenDenyList()
+    sync_from_database(db_engine, denylist)
+    assert len(denylist) == 1
+    assert denylist.is_revoked(7, time.time() - 60)
+    assert not denylist.is_revoked(7, time.time() + 1)
+    assert not denylist.is_revoked(8, 0)
+
+
+def test_periodic_sync_survives_a_failed_iteration(db_engine, db_session: Session, monkeypatch):
+    db_session.add(UserTokenRevocation(user_id=7, revoked_at=time.time()))
+    db_session.commit()
+    calls = []
+
+    def flaky_sync(engine, denylist):
+        calls.append(engine)
+        if len(calls) == 1:
+            raise OperationalError("SELECT", {}, Exception("database is locked"))
+        sync_from_database(engine, denylist)
+
+    monkeypatch.setattr(token_revocation, "sync_from_database", flaky_sync)
+    denylist = TokenDenyList()
+
+    async def run_until_revoked():
+        task = asyncio.create_task(token_revocation.sync_periodically(db_engine, 0.01, denylist))
+        while not denylist.is_revoked(7, 0) and not task.done():
+            await asyncio.sleep(0.01)
+        assert not task.done(), "la tarea de sincronización terminó después del error"
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(run_until_revoked(), timeout=5))
+    assert len(calls) >= 2
+
+
+def test_tokens_without_uid_are_not_trusted_statelessly():
+    assert principal_from_claims({"sub": "admin", "role": "admin", "iat": 1}) is None
+    assert principal_from_claims({"sub": "admin", "role": "superuser", "uid": 1, "iat": 1}) is None
+    principal = principal_from_claims({"sub": "admin", "role": "admin", "uid": "3", "iat": 1})
+    assert (principal.id, principal.username, principal.role) == (3, "admin", UserRole.ADMIN)
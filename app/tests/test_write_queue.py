@@ -0,0 +1,85 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from app.models import Person, PersonCreate, UserRole
+from app.services import person_service, write_queue
+
+
+def _failing_operation(session: Session):
+    person_service.create_person(PersonCreate(name="Descartada", dni="0"), session)
+    raise ValueError("dato inválido")
+
+
+def test_batch_is_committed_once_and_failures_are_isolated(db_engine):
+    commits = []
+    event.listen(db_engine, "commit", lambda connection: commits.append(connection))
+    queue = write_queue.GroupCommitQueue(db_engine, max_delay_ms=200, max_batch=10)
+    try:
+        futures = [queue.submit(lambda session, dni=dni: person_service.create_person(PersonCreate(name=f"P{dni}", dni=dni), session)) for dni in ("1", "2")]
+        failed = queue.submit(_failing_operation)
+        futures.append(queue.submit(lambda session: person_service.create_person(PersonCreate(name="P3", dni="3"), session)))
+
+        assert [future.result(timeout=5).name for future in futures] == ["P1", "P2", "P3"]
+        assert isinstance(failed.exception(timeout=5), ValueError)
+    finally:
+        queue.close(timeout=5)
+
+    assert len(commits) == 1
+    with Session(db_engine) as session:
+        assert session.exec(select(Person.dni).order_by(Person.dni)).all() == ["1", "2", "3"]
+    with pytest.raises(write_queue.WriteQueueClosed):
+        queue.submit(_failing_operation)
+
+
+class _Aborted(BaseException):
+    pass
+
+
+def _aborting_operation(session: Session):
+    person_service.create_person(PersonCreate(name="Abortada", dni="0"), session)
+    raise _Aborted()
+
+
+def test_writer_survives_unexpected_errors(db_engine, monkeypatch):
+    queue = write_queue.GroupCommitQueue(db_engine, max_delay_ms=0, max_batch=10)
+    try:
+        assert isinstance(queue.submit(_aborting_operation).exception(timeout=5), _Aborted)
+
+        # Un error al registrar métricas, después del COMMIT, no cambia el resultado ya entregado
+        def failing_observe(labels, value):
+            raise RuntimeError("métricas no disponibles")
+
+        monkeypatch.setattr(write_queue.metrics.WRITE_QUEUE_BATCH_SIZE, "observe", failing_observe)
+        assert queue.run(lambda session: person_service.create_person(PersonCreate(name="P1", dni="1"), session)).name == "P1"
+        monkeypatch.undo()
+        assert queue.submit(lambda session: person_service.create_person(PersonCreate(name="P2", dni="2"), session)).result(timeout=5).name == "P2"
+
+        # Si el hilo escritor terminó, el próximo submit lo vuelve a iniciar
+        queue._queue.put(write_queue._STOP)
+        queue._thread.join(5)
+        assert queue.submit(lambda session: person_service.create_person(PersonCreate(name="P3", dni="3"), session)).result(timeout=5).name == "P3"
+    finally:
+        queue.close(timeout=5)
+
+    with Session(db_engine) as session:
+        assert session.exec(select(Person.dni).order_by(Person.dni)).all() == ["1", "2", "3"]
+
+
+def test_endpoints_use_the_queue_when_enabled(api_client: TestClient, auth_headers, enrollments, monkeypatch):
+    monkeypatch.setattr(write_queue, "WRITE_QUEUE_ENABLED", True)
+    try:
+        admin = auth_headers(UserRole.ADMIN)
+        created = api_client.post("/persons/", json={"name": "Carla", "dni": "40111222"}, headers=admin)
+        assert created.status_code == 201 and created.json()["name"] == "Carla"
+        updated = api_client.put(f"/persons/{created.json()['id']}", json={"name": "Carla Ruiz"}, headers=admin)
+        assert updated.json()["name"] == "Carla Ruiz"
+
+        completed = api_client.post(f"/enrollments/{enrollments[5].id}/complete", headers=auth_headers(UserRole.INSPECTOR))
+        assert completed.status_code == 200 and completed.json()["person"]["name"] == "Bruno"
+        # Los errores de la operación llegan al endpoint como sin la cola
+        assert api_client.post(f"/enrollments/{enrollments[5].id}/complete", headers=auth_headers(UserRole.INSPECTOR)).status_code == 404
+        assert api_client.put(f"/enrollments/{enrollments[6].id}", json={"status": "used"}, headers=dict(admin, **{"If-Match": '"enrollment-0-0"'})).status_code == 412
+    finally:
+        write_queue.close_all(timeout=5)
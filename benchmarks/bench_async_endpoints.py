@@ -0,0 +1,144 @@
+"""
+Benchmark de endpoints síncronos (threadpool) vs asíncronos (event loop).
+
+Levanta un servidor uvicorn en un subproceso con dos rutas que devuelven la misma página de
+inscripciones: /sync/enrollments usa Session y get_enrollments_page; /async/enrollments usa
+AsyncSession y get_enrollments_page_async. Luego las carga con N clientes concurrentes y reporta
+requests/seg, p50 y p99 de cada una.
+
+--db-latency-ms agrega una espera por request que simula una base lenta (time.sleep en la ruta
+síncrona, asyncio.sleep en la asíncrona), que es el caso donde el threadpool limita el throughput.
+
+Uso:
+    python benchmarks/bench_async_endpoints.py --concurrency 500 --duration 15 --db-latency-ms 20
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from fastapi import Depends, FastAPI
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config.database import dispose_async_engine, get_async_session, get_session
+from app.models import CourseEnrollmentFilter, CourseEnrollmentStatus
+from app.services import course_enrollment_service
+
+DB_LATENCY_SECONDS = float(os.getenv("BENCH_DB_LATENCY_MS", "0")) / 1000
+PAGE_FILTER = CourseEnrollmentFilter(status=CourseEnrollmentStatus.PENDING)
+
+bench_app = FastAPI()
+bench_app.add_event_handler("shutdown", dispose_async_engine)
+
+
+@bench_app.get("/sync/enrollments")
+def sync_enrollments(session: Session = Depends(get_session)):
+    if DB_LATENCY_SECONDS:
+        time.sleep(DB_LATENCY_SECONDS)
+    return course_enrollment_service.get_enrollments_page(session, PAGE_FILTER, limit=20)
+
+
+@bench_app.get("/async/enrollments")
+async def async_enrollments(session: AsyncSession = Depends(get_async_session)):
+    if DB_LATENCY_SECONDS:
+        await asyncio.sleep(DB_LATENCY_SECONDS)
+    return await course_enrollment_service.get_enrollments_page_async(session, PAGE_FILTER, limit=20)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _load(url: str, concurrency: int, duration: float) -> dict:
+    import httpx
+
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    if response.status_code != 200:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else float("nan")
+    return {"rps": len(latencies) / elapsed, "p50": percentile(0.50), "p99": percentile(0.99), "errors": errors}
+
+
+def _wait_for_server(port: int, timeout: float = 20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("El servidor de benchmark no arrancó")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=15, help="Segundos de carga por ruta")
+    parser.add_argument("--rows", type=int, default=100_000, help="Inscripciones sembradas")
+    parser.add_argument("--db-latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    from sqlmodel import create_engine
+    from bench_index_lookups import seed
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        seed(create_engine(database_url), args.rows, with_indexes=True)
+
+        port = _free_port()
+        env = dict(
+            os.environ,
+            DATABASE_URL=database_url,
+            BENCH_DB_LATENCY_MS=str(args.db_latency_ms),
+            PYTHONPATH=os.pathsep.join([ROOT, os.path.dirname(__file__)]),
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "bench_async_endpoints:bench_app", "--port", str(port), "--log-level", "warning"],
+            env=env,
+        )
+        try:
+            _wait_for_server(port)
+            print(f"{'route':<20}{'req/s':>10}{'p50 (ms)':>12}{'p99 (ms)':>12}{'errors':>8}")
+            for route in ("/sync/enrollments", "/async/enrollments"):
+                stats = asyncio.run(_load(f"http://127.0.0.1:{port}{route}", args.concurrency, args.duration))
+                print(f"{route:<20}{stats['rps']:>10.1f}{stats['p50']:>12.1f}{stats['p99']:>12.1f}{stats['errors']:>8}")
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark de alta masiva de personas: un POST /persons por elemento vs un POST /persons/bulk.
+
+Usa una base SQLite temporal y el TestClient de FastAPI (sin red), de modo que la diferencia
+refleja el costo por request y por commit que el endpoint masivo evita.
+
+Uso:
+    python benchmarks/bench_bulk_create.py --items 10000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.config.database import get_session
+from app.main import app
+from app.models import UserCreate, UserRole
+from app.security import security
+from app.services import user_service
+
+
+def _client(database_url: str) -> TestClient:
+    engine = create_engine(database_url, connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+
+    def override_session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    with Session(engine) as session:
+        user_service.create_user(UserCreate(username="bench", password="bench", dni="0", nombres="Bench", apellidos="Admin", role=UserRole.ADMIN), session)
+    token = security.create_access_token({"sub": "bench", "role": UserRole.ADMIN.value})
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {token}"
+    return client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10_000)
+    args = parser.parse_args()
+
+    items = [{"name": f"Persona {i}", "dni": f"{20_000_000 + i}"} for i in range(args.items)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        client = _client(f"sqlite:///{os.path.join(directory, 'single.db')}")
+        start = time.perf_counter()
+        for item in items:
+            assert client.post("/persons/", json=item).status_code == 201
+        single = time.perf_counter() - start
+
+        client = _client(f"sqlite:///{os.path.join(directory, 'bulk.db')}")
+        start = time.perf_counter()
+        response = client.post("/persons/bulk", json=items)
+        bulk = time.perf_counter() - start
+        assert response.status_code == 200 and response.json()["created"] == args.items
+
+    print(f"{'mode':<10}{'seconds':>10}{'rows/s':>12}")
+    print(f"{'single':<10}{single:>10.2f}{args.items / single:>12.0f}")
+    print(f"{'bulk':<10}{bulk:>10.2f}{args.items / bulk:>12.0f}")
+    print(f"speedup: {single / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark de búsquedas indexadas a medida que crecen las tablas.
+
+Para cada tamaño crea una base SQLite temporal con el esquema de app.models, la llena con
+N usuarios, N personas y N inscripciones, y mide la latencia de las búsquedas que hace la API:
+usuario por username, persona por DNI, inscripciones por persona y una página filtrada por estado.
+
+Uso:
+    python benchmarks/bench_index_lookups.py --sizes 10000,100000,1000000,10000000
+    python benchmarks/bench_index_lookups.py --sizes 10000,100000 --no-indexes   # para comparar
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models import CourseEnrollmentFilter, CourseEnrollmentStatus, Person
+from app.services import course_enrollment_service, user_service
+
+CHUNK_SIZE = 50_000
+STATUSES = [status.name for status in CourseEnrollmentStatus]
+
+
+def _chunks(rows, size=CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def seed(engine, size: int, with_indexes: bool):
+    import app.models  # noqa: F401  (registra las tablas)
+    SQLModel.metadata.create_all(engine)
+    today = date.today()
+    with engine.begin() as connection:
+        if not with_indexes:
+            for table in SQLModel.metadata.sorted_tables:
+                for index in table.indexes:
+                    connection.exec_driver_sql(f'DROP INDEX IF EXISTS "{index.name}"')
+        for chunk in _chunks((f"user{i}", str(20_000_000 + i), "N", "A", 1, "NORMAL", i, "x") for i in range(1, size + 1)):
+            connection.exec_driver_sql(
+                'INSERT INTO "user" (username, dni, nombres, apellidos, is_active, role, id, hashed_password) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                chunk,
+            )
+        for chunk in _chunks((f"Persona {i}", str(30_000_000 + i), i) for i in range(1, size + 1)):
+            connection.exec_driver_sql("INSERT INTO person (name, dni, id) VALUES (?, ?, ?)", chunk)
+        connection.exec_driver_sql("INSERT INTO trafficsafetycourse (name, description, id) VALUES ('Curso', 'Desc', 1)")
+        rng = random.Random(size)
+        enrollments = (
+            (
+                rng.randint(1, size), 1, today.isoformat(), today.isoformat(),
+                (today + timedelta(days=rng.randint(-365, 365))).isoformat(), rng.choice(STATUSES), i,
+            )
+            for i in range(1, size + 1)
+        )
+        for chunk in _chunks(enrollments):
+            connection.exec_driver_sql(
+                "INSERT INTO courseenrollment (person_id, course_id, enrollment_date, deadline_date, expiration_date, status, id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                chunk,
+            )
+        connection.exec_driver_sql("ANALYZE")
+
+
+def measure(fn, keys) -> dict:
+    samples = []
+    for key in keys:
+        start = time.perf_counter()
+        fn(key)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    samples.sort()
+    return {"p50": statistics.median(samples), "p95": samples[int(len(samples) * 0.95) - 1]}
+
+
+def run(size: int, lookups: int, with_indexes: bool):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        start = time.perf_counter()
+        seed(engine, size, with_indexes)
+        seed_seconds = time.perf_counter() - start
+
+        rng = random.Random(0)
+        keys = [rng.randint(1, size) for _ in range(lookups)]
+        results = {}
+        with Session(engine) as session:
+            results["user by username"] = measure(lambda i: user_service.get_user_by_username(f"user{i}", session), keys)
+            results["person by dni"] = measure(
+                lambda i: session.exec(select(Person).where(Person.dni == str(30_000_000 + i))).first(), keys
+            )
+            results["enrollments by person"] = measure(
+                lambda i: course_enrollment_service.get_enrollments_by_person_id(i, session), keys
+            )
+            results["page by status"] = measure(
+                lambda i: course_enrollment_service.get_enrollments_page(
+                    session, CourseEnrollmentFilter(status=CourseEnrollmentStatus.EXPIRED), limit=20
+                ),
+                keys[: max(1, lookups // 10)],
+            )
+        engine.dispose()
+    return seed_seconds, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Tamaños de tabla separados por coma")
+    parser.add_argument("--lookups", type=int, default=2000, help="Búsquedas por operación y tamaño")
+    parser.add_argument("--no-indexes", action="store_true", help="Elimina los índices secundarios antes de medir")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}  {'operation':<24}{'p50 (µs)':>10}{'p95 (µs)':>10}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        seed_seconds, results = run(size, args.lookups, not args.no_indexes)
+        for name, stats in results.items():
+            print(f"{size:>10}  {name:<24}{stats['p50']:>10.1f}{stats['p95']:>10.1f}")
+        print(f"{size:>10}  {'(seed time)':<24}{seed_seconds:>9.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Micro-benchmark del armado de respuestas JSON de listas de inscripciones.
+
+Compara, para listas de 1k/10k/100k inscripciones, el tiempo de CPU de:
+  * antes:   objetos del ORM -> parse_obj_as(List[CourseEnrollmentRead]) -> validación contra
+             response_model y jsonable_encoder de FastAPI -> json de la biblioteca estándar;
+  * ahora:   filas planas del SELECT -> diccionarios (RowShape) -> orjson (ORJSONResponse).
+
+Ambos caminos incluyen la consulta, que se reporta aparte para ver cuánto es serialización.
+Después compara la respuesta completa con una proyección (`?fields=` / `?include=` del listado):
+tiempo de CPU total y tamaño del JSON.
+
+Uso:
+    python benchmarks/bench_json_responses.py --sizes 1000,10000,100000
+    python benchmarks/bench_json_responses.py --fields status,expiration_date --include person
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import parse_obj_as
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, create_engine, select
+
+from app.models import CourseEnrollment, CourseEnrollmentRead, Person, TrafficSafetyCourse, User
+from app.services import course_enrollment_service
+from bench_index_lookups import seed
+
+RESPONSE_FIELD = create_response_field(name="response", type_=List[CourseEnrollmentRead])
+InspectorUser = aliased(User, name="inspector_user")
+JudgeUser = aliased(User, name="judge_user")
+
+
+def old_query(session: Session, size: int):
+    statement = (
+        select(CourseEnrollment, Person, TrafficSafetyCourse, InspectorUser, JudgeUser)
+        .outerjoin(Person, Person.id == CourseEnrollment.person_id)
+        .outerjoin(TrafficSafetyCourse, TrafficSafetyCourse.id == CourseEnrollment.course_id)
+        .outerjoin(InspectorUser, InspectorUser.id == CourseEnrollment.inspector_id)
+        .outerjoin(JudgeUser, JudgeUser.id == CourseEnrollment.judge_id)
+        .order_by(CourseEnrollment.id)
+        .limit(size)
+    )
+    return session.exec(statement).all()
+
+
+def old_render(rows) -> bytes:
+    items = parse_obj_as(List[CourseEnrollmentRead], [
+        dict(enrollment.dict(), person=person, course=course, inspector=inspector, judge=judge)
+        for enrollment, person, course, inspector, judge in rows
+    ])
+    content = asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=items))
+    return JSONResponse(content).body
+
+
+def new_query(session: Session, size: int):
+    statement = course_enrollment_service.select_enrollment_rows().order_by(CourseEnrollment.id).limit(size)
+    return session.exec(statement).all()
+
+
+def new_render(rows) -> bytes:
+    return ORJSONResponse(course_enrollment_service.ENROLLMENT_ROW_SHAPE.to_dicts(rows)).body
+
+
+def projected_body(session: Session, size: int, projection) -> bytes:
+    rows = session.exec(projection.select().order_by(CourseEnrollment.id).limit(size)).all()
+    return ORJSONResponse(projection.shape.to_dicts(rows)).body
+
+
+def cpu_ms(fn, repeat: int = 3) -> float:
+    """Mejor tiempo de CPU (ms) de `repeat` ejecuciones."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        best = min(best, (time.process_time() - start) * 1000)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fields", default="status,expiration_date", help="Campos de la proyección (?fields=)")
+    parser.add_argument("--include", default=None, help="Relaciones de la proyección (?include=)")
+    args = parser.parse_args()
+    projection = course_enrollment_service.parse_enrollment_projection(args.fields, args.include)
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        seed(engine, max(sizes), with_indexes=True)
+
+        print(f"{'rows':>8}{'old query':>12}{'old total':>12}{'new query':>12}{'new total':>12}{'CPU saved':>11}")
+        with Session(engine) as session:
+            for size in sizes:
+                old_rows, new_rows = old_query(session, size), new_query(session, size)
+                assert len(old_render(old_rows)) > 0 and len(new_render(new_rows)) > 0
+                session.expunge_all()
+                old_q = cpu_ms(lambda: old_query(session, size), args.repeat)
+                old_t = cpu_ms(lambda: (old_render(old_query(session, size)), session.expunge_all()), args.repeat)
+                new_q = cpu_ms(lambda: new_query(session, size), args.repeat)
+                new_t = cpu_ms(lambda: new_render(new_query(session, size)), args.repeat)
+                print(f"{size:>8}{old_q:>12.1f}{old_t:>12.1f}{new_q:>12.1f}{new_t:>12.1f}{1 - new_t / old_t:>11.0%}")
+
+            full = course_enrollment_service.FULL_ENROLLMENT_PROJECTION
+            print(f"\nProyección fields={args.fields} include={args.include}")
+            print(f"{'rows':>8}{'full ms':>10}{'full KiB':>10}{'proj ms':>10}{'proj KiB':>10}")
+            for size in sizes:
+                full_ms = cpu_ms(lambda: projected_body(session, size, full), args.repeat)
+                projected_ms = cpu_ms(lambda: projected_body(session, size, projection), args.repeat)
+                full_kib = len(projected_body(session, size, full)) / 1024
+                projected_kib = len(projected_body(session, size, projection)) / 1024
+                print(f"{size:>8}{full_ms:>10.1f}{full_kib:>10.0f}{projected_ms:>10.1f}{projected_kib:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Costo por request del middleware de métricas.
+
+Invoca directamente (sin red ni servidor) una aplicación ASGI mínima, con y sin
+MetricsMiddleware, y reporta la diferencia en microsegundos por request.
+
+Uso:
+    python benchmarks/bench_metrics_overhead.py --requests 200000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.monitoring.middleware import MetricsMiddleware
+
+
+class _Route:
+    path = "/enrollments/{enrollment_id}"
+
+
+class _App:
+    routes = [_Route()]
+
+    async def __call__(self, scope, receive, send):
+        scope["route"] = _Route
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _run(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for i in range(requests):
+        scope = {"type": "http", "method": "GET", "path": f"/enrollments/{i}", "app": _App}
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    bare = min(asyncio.run(_run(_App(), args.requests)) for _ in range(3))
+    instrumented = min(asyncio.run(_run(MetricsMiddleware(_App()), args.requests)) for _ in range(3))
+    print(f"sin middleware:   {bare:.2f} µs/request")
+    print(f"con middleware:   {instrumented:.2f} µs/request")
+    print(f"costo de medir:   {instrumented - bare:.2f} µs/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Latencia de GET /persons/search (person_service.search_persons_async) con millones de personas.
+
+Genera una base SQLite temporal con nombres y apellidos hispanos (con acentos) y DNI aleatorios,
+indexada como la de la aplicación (índice de person.dni y FTS5 de los nombres), y mide por tipo
+de búsqueda la latencia p50/p99 de consultas al azar:
+
+    dni_exact    DNI completo existente
+    dni_prefix   primeros 5 dígitos de un DNI
+    name         un apellido completo, escrito sin acentos ("nunez")
+    name_prefix  nombre y prefijo de apellido ("maria gonz")
+    name_rare    nombre y apellido completos, que identifican a pocas personas
+
+Uso:
+    python benchmarks/bench_person_search.py --persons 3000000 --queries 500
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import unicodedata
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import app.models  # noqa: F401  (registra las tablas)
+from app.config.database import to_async_url
+from app.services import person_service
+
+FIRST_NAMES = [
+    "José", "María", "Juan", "Ana", "Luis", "Lucía", "Martín", "Sofía", "Andrés", "Valentina", "Joaquín", "Inés",
+    "Tomás", "Julián", "Belén", "Ramón", "Verónica", "Nicolás", "Camila", "Agustín", "Florencia", "Matías", "Mónica", "Sebastián",
+]
+LAST_NAMES = [
+    "González", "Rodríguez", "Gómez", "Fernández", "López", "Díaz", "Martínez", "Pérez", "García", "Sánchez", "Romero", "Sosa",
+    "Álvarez", "Torres", "Ruiz", "Ramírez", "Flores", "Benítez", "Acosta", "Medina", "Herrera", "Suárez", "Aguirre", "Giménez",
+    "Gutiérrez", "Pereyra", "Rojas", "Molina", "Castro", "Ortiz", "Silva", "Núñez", "Luna", "Juárez", "Cabrera", "Ríos",
+    "Ferreyra", "Godoy", "Morales", "Domínguez", "Moreno", "Peralta", "Vega", "Carrizo", "Quiroga", "Castillo", "Ledesma", "Muñoz",
+]
+CHUNK_SIZE = 50_000
+
+
+def _strip_accents(text: str) -> str:
+    return "".join(char for char in unicodedata.normalize("NFD", text) if unicodedata.category(char) != "Mn")
+
+
+def seed(path: str, persons: int, seed_value: int) -> list:
+    """Crea la base y devuelve una muestra de (nombre, dni) para armar las búsquedas."""
+    rng = random.Random(seed_value)
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    dnis = rng.sample(range(5_000_000, 5_000_000 + persons * 10), persons)
+    sample = []
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        connection.exec_driver_sql("PRAGMA journal_mode=OFF")
+        connection.exec_driver_sql("PRAGMA synchronous=OFF")
+        for start in range(0, persons, CHUNK_SIZE):
+            rows = []
+            for dni in dnis[start:start + CHUNK_SIZE]:
+                name = f"{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+                rows.append((name, str(dni)))
+            connection.exec_driver_sql("INSERT INTO person (name, dni) VALUES (?, ?)", rows)
+            sample.extend(rng.sample(rows, 20))
+        connection.exec_driver_sql("INSERT INTO person_fts(person_fts) VALUES ('optimize')")
+        connection.exec_driver_sql("ANALYZE")
+    engine.dispose()
+    print(f"{persons:,} personas generadas en {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return sample
+
+
+def build_queries(sample: list, count: int, rng: random.Random) -> dict:
+    def pick():
+        return rng.choice(sample)
+
+    def name_rare():
+        first, _, last, _ = pick()[0].split()
+        return _strip_accents(f"{first} {last}").lower()
+
+    return {
+        "dni_exact": [pick()[1] for _ in range(count)],
+        "dni_prefix": [pick()[1][:5] for _ in range(count)],
+        "name": [_strip_accents(pick()[0].split()[2]).lower() for _ in range(count)],
+        "name_prefix": [f"{pick()[0].split()[0]} {pick()[0].split()[2][:4]}" for _ in range(count)],
+        "name_rare": [name_rare() for _ in range(count)],
+    }
+
+
+async def measure(path: str, queries: dict, limit: int) -> dict:
+    engine = create_async_engine(to_async_url(f"sqlite:///{path}"))
+    results = {}
+    try:
+        async with AsyncSession(engine) as session:
+            for kind, texts in queries.items():
+                await person_service.search_persons_async(texts[0], limit, session)  # calienta la caché de páginas
+                latencies = []
+                for text in texts:
+                    start = time.perf_counter()
+                    await person_service.search_persons_async(text, limit, session)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                latencies.sort()
+                results[kind] = {
+                    "p50_ms": statistics.median(latencies),
+                    "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+                }
+    finally:
+        await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--persons", type=int, default=3_000_000)
+    parser.add_argument("--queries", type=int, default=500, help="Búsquedas por tipo")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "search.db")
+        sample = seed(path, args.persons, args.seed)
+        queries = build_queries(sample, args.queries, random.Random(args.seed))
+        results = asyncio.run(measure(path, queries, args.limit))
+
+    print(f"{'búsqueda':<14}{'p50 ms':>10}{'p99 ms':>10}")
+    for kind, row in results.items():
+        print(f"{kind:<14}{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
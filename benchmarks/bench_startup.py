@@ -0,0 +1,175 @@
+"""
+Tiempo de arranque de la API: importación de app.main y tiempo hasta el primer request.
+
+Cada medición usa un proceso nuevo, como un worker recién creado por el autoescalado:
+
+    import         segundos de `import app.main` (modelos, routers, motor de la base)
+    first_request  desde lanzar uvicorn hasta la primera respuesta 200 de GET /healthcheck
+
+El esquema de la base temporal se crea antes con migrate_db.py y no entra en la medición.
+Además verifica que los módulos que se cargan de forma diferida (DEFERRED_MODULES) no se
+importen junto con la app.
+
+Termina con código 1 si algo retrocede: un módulo diferido vuelve a importarse al arrancar,
+la mediana supera --max-import-ms / --max-first-request-ms, o supera en más de --tolerance
+la de un resultado anterior (--baseline). Con --profile muestra los módulos que más tardan
+en importarse (python -X importtime).
+
+Uso:
+    python benchmarks/bench_startup.py --runs 7 --output arranque.json
+    python benchmarks/bench_startup.py --baseline arranque.json --tolerance 0.2
+    python benchmarks/bench_startup.py --profile 25 --runs 0
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Módulos que no deben cargarse al importar la app (se importan en el primer uso)
+DEFERRED_MODULES = ["jose", "passlib", "aiosqlite", "httpx"]
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [name for name in %r if name in sys.modules]}))
+""" % (DEFERRED_MODULES,)
+
+
+def _env(database_path: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database_path}", PYTHONPATH=ROOT)
+    env.pop("ASYNC_DATABASE_URL", None)
+    env.pop("DB_CREATE_TABLES_ON_STARTUP", None)
+    return env
+
+
+def measure_import(env: dict) -> dict:
+    result = subprocess.run([sys.executable, "-c", _IMPORT_PROBE], env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_request(env: dict, timeout: float = 60) -> float:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/healthcheck"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        cwd=ROOT,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn terminó antes de responder")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+        raise RuntimeError("El servidor no respondió a tiempo")
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def import_profile(env: dict, top: int) -> List[dict]:
+    """Módulos con mayor tiempo acumulado de importación según `python -X importtime`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+        if match:
+            rows.append({"module": match.group(4), "self_ms": int(match.group(1)) / 1000, "cumulative_ms": int(match.group(2)) / 1000, "depth": len(match.group(3)) // 2})
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+
+def _summary(samples: List[float]) -> Optional[dict]:
+    if not samples:
+        return None
+    return {"median_ms": round(statistics.median(samples) * 1000, 1), "min_ms": round(min(samples) * 1000, 1), "runs": len(samples)}
+
+
+def check_regressions(result: dict, args, baseline: Optional[dict]) -> List[str]:
+    failures = [f"{name} se importa al arrancar (debe cargarse en el primer uso)" for name in result["deferred_loaded"]]
+    budgets = {"import": args.max_import_ms, "first_request": args.max_first_request_ms}
+    for metric, budget in budgets.items():
+        current = result.get(metric)
+        if current is None:
+            continue
+        if budget is not None and current["median_ms"] > budget:
+            failures.append(f"{metric}: {current['median_ms']} ms supera el máximo de {budget} ms")
+        previous = (baseline or {}).get(metric)
+        if previous and current["median_ms"] > previous["median_ms"] * (1 + args.tolerance):
+            failures.append(f"{metric}: {current['median_ms']} ms contra {previous['median_ms']} ms del baseline (+{args.tolerance:.0%} permitido)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Procesos medidos por métrica")
+    parser.add_argument("--skip-server", action="store_true", help="Mide solo la importación")
+    parser.add_argument("--profile", type=int, default=0, metavar="N", help="Muestra los N módulos más lentos de importar")
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-first-request-ms", type=float)
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Aumento relativo permitido respecto del baseline")
+    parser.add_argument("--output", help="Archivo JSON donde guardar el resultado")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = _env(os.path.join(directory, "startup.db"))
+        subprocess.run([sys.executable, "migrate_db.py"], env=env, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+
+        if args.profile:
+            print(f"{'módulo':<60}{'propio ms':>12}{'acumulado ms':>14}", file=sys.stderr)
+            for row in import_profile(env, args.profile):
+                print(f"{'  ' * row['depth'] + row['module']:<60}{row['self_ms']:>12.1f}{row['cumulative_ms']:>14.1f}", file=sys.stderr)
+
+        imports = [measure_import(env) for _ in range(args.runs)]
+        first_requests = [] if args.skip_server else [measure_first_request(env) for _ in range(args.runs)]
+
+    result: Dict[str, object] = {
+        "python": sys.version.split()[0],
+        "import": _summary([sample["seconds"] for sample in imports]),
+        "first_request": _summary(first_requests),
+        "deferred_loaded": sorted({name for sample in imports for name in sample["loaded"]}),
+    }
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2, ensure_ascii=False)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    failures = check_regressions(result, args, baseline)
+    for failure in failures:
+        print(f"REGRESIÓN: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
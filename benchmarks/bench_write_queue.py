@@ -0,0 +1,112 @@
+"""
+Escrituras chicas concurrentes con un COMMIT cada una vs la cola de confirmación agrupada
+(app/services/write_queue.py, WRITE_QUEUE_ENABLED).
+
+Cada modo usa una base SQLite temporal con el perfil de la aplicación (WAL, busy_timeout) y
+`--threads` hilos, como el threadpool de los endpoints síncronos, que crean personas con
+person_service.create_person. Informa escrituras por segundo, latencia p50/p99 por escritura
+y, con la cola, el tamaño medio de lote. `--synchronous FULL` hace un fsync por COMMIT (el
+perfil por defecto, NORMAL con WAL, lo evita en la mayoría); en discos con caché de escritura
+el fsync casi no cuesta, y `--fsync-ms` agrega esa demora a cada COMMIT, con el bloqueo de
+escritura tomado, para medir el caso de un disco que sí la tiene.
+
+Uso:
+    python benchmarks/bench_write_queue.py --threads 32 --writes 5000 --synchronous FULL
+    python benchmarks/bench_write_queue.py --threads 32 --writes 5000 --fsync-ms 2
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+
+import app.models  # noqa: F401  (registra las tablas)
+from app.config import database
+from app.models import PersonCreate
+from app.services import person_service, write_queue
+
+
+def _engine(path: str, synchronous: str, fsync_ms: float = 0):
+    database.SQLITE_SYNCHRONOUS = synchronous
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, **database.engine_options(url))
+    event.listen(engine, "connect", database.apply_sqlite_pragmas)
+    if fsync_ms:
+        event.listen(engine, "commit", lambda connection: time.sleep(fsync_ms / 1000))
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def run(engine, threads: int, writes: int, use_queue: bool, max_delay_ms: float, max_batch: int) -> dict:
+    queue = write_queue.GroupCommitQueue(engine, max_delay_ms, max_batch) if use_queue else None
+    batches = []
+    if queue is not None:
+        event.listen(engine, "commit", lambda connection: batches.append(1))
+    latencies = []
+    lock = threading.Lock()
+    per_thread = writes // threads
+
+    def worker(worker_id: int):
+        own = []
+        for i in range(per_thread):
+            person = PersonCreate(name=f"Persona {worker_id}-{i}", dni=f"{worker_id:03d}{i:07d}")
+            start = time.perf_counter()
+            if queue is not None:
+                queue.run(lambda session: person_service.create_person(person, session))
+            else:
+                with Session(engine) as session:
+                    person_service.create_person(person, session)
+            own.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(own)
+
+    workers = [threading.Thread(target=worker, args=(worker_id,)) for worker_id in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if queue is not None:
+        queue.close()
+
+    latencies.sort()
+    return {
+        "writes_per_second": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "mean_batch": len(latencies) / len(batches) if batches else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--writes", type=int, default=5000, help="Escrituras en total por modo")
+    parser.add_argument("--synchronous", default="NORMAL", choices=["OFF", "NORMAL", "FULL"])
+    parser.add_argument("--fsync-ms", type=float, default=0, help="Demora agregada a cada COMMIT")
+    parser.add_argument("--max-delay-ms", type=float, default=write_queue.WRITE_QUEUE_MAX_DELAY_MS)
+    parser.add_argument("--max-batch", type=int, default=write_queue.WRITE_QUEUE_MAX_BATCH)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for mode, use_queue in (("commit_each", False), ("write_queue", True)):
+            engine = _engine(os.path.join(directory, f"{mode}.db"), args.synchronous, args.fsync_ms)
+            results[mode] = run(engine, args.threads, args.writes, use_queue, args.max_delay_ms, args.max_batch)
+            engine.dispose()
+
+    print(f"{'modo':<14}{'escrituras/s':>14}{'p50 ms':>10}{'p99 ms':>10}{'lote medio':>12}")
+    for mode, row in results.items():
+        print(f"{mode:<14}{row['writes_per_second']:>14.0f}{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['mean_batch']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
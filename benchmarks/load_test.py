@@ -0,0 +1,351 @@
+"""
+Prueba de carga reproducible de la API real (app.main:app).
+
+Genera (o reutiliza) una base sintética con seed_data.py, trabaja sobre una copia y la carga con
+N clientes concurrentes que eligen cada operación según una mezcla configurable:
+
+    login       POST /users/token
+    list        GET  /enrollments/?status=...&limit=20      (filtro por estado, curso o ninguno)
+    detail      GET  /enrollments/{id}
+    by_person   GET  /enrollments/person/{person_id}
+    report      GET  /enrollments/reports/expiring-or-expired
+    stats       GET  /enrollments/stats
+    complete    POST /enrollments/{id}/complete               (inscripciones pending, como inspector)
+    use         POST /enrollments/{id}/use                    (inscripciones completed, como juez)
+
+--mode inprocess llama a la aplicación ASGI directamente (sin red, mide la aplicación);
+--mode uvicorn la levanta con uvicorn en un puerto local (mide también HTTP y los workers).
+
+El resultado es un JSON con la configuración, el commit y, por operación y en total, requests,
+errores, throughput y latencias p50/p95/p99, para comparar entre commits con --baseline.
+
+Uso:
+    python benchmarks/load_test.py --persons 1000000 --enrollments 5000000 --concurrency 64 --duration 60 --output resultados.json
+    python benchmarks/load_test.py --mode uvicorn --workers 4 --mix "list=50,detail=50" --baseline resultados.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from seed_data import BENCH_PASSWORD, BENCH_USERS, COURSES, STATUS_WEIGHTS, ensure_dataset
+
+DEFAULT_MIX = "login=1,list=25,detail=35,by_person=15,report=4,complete=10,use=10"
+OPERATIONS = {
+    "login": ("POST", "/users/token"),
+    "list": ("GET", "/enrollments/"),
+    "detail": ("GET", "/enrollments/{enrollment_id}"),
+    "by_person": ("GET", "/enrollments/person/{person_id}"),
+    "report": ("GET", "/enrollments/reports/expiring-or-expired"),
+    "stats": ("GET", "/enrollments/stats"),
+    "complete": ("POST", "/enrollments/{enrollment_id}/complete"),
+    "use": ("POST", "/enrollments/{enrollment_id}/use"),
+}
+# Ids de inscripciones pending/completed que se reservan para las transiciones de estado
+TRANSITION_POOL_SIZE = 200_000
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Operación desconocida '{name}'. Opciones: {', '.join(OPERATIONS)}")
+        weights[name] = float(weight or 1)
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+
+def percentile(samples: List[float], fraction: float) -> Optional[float]:
+    """Percentil por rango más cercano, en milisegundos, de latencias ordenadas en segundos."""
+    if not samples:
+        return None
+    return round(samples[max(0, math.ceil(len(samples) * fraction) - 1)] * 1000, 3)
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+    }
+
+
+class Workload:
+    """
+    Arma los requests de cada operación. Las transiciones consumen ids de inscripciones
+    pending (complete) y completed (use); las que completa `complete` pasan a estar disponibles
+    para `use`. Si un pool se agota, la operación se omite y se cuenta como `skipped`.
+    """
+
+    def __init__(self, database_path: str, seed: int):
+        rng = random.Random(seed)
+        with sqlite3.connect(database_path) as connection:
+            self.max_enrollment_id = connection.execute("SELECT max(id) FROM courseenrollment").fetchone()[0]
+            self.max_person_id = connection.execute("SELECT max(id) FROM person").fetchone()[0]
+            pools = {}
+            for status in ("PENDING", "COMPLETED"):
+                ids = [row[0] for row in connection.execute("SELECT id FROM courseenrollment WHERE status = ? ORDER BY id", (status,))]
+                pools[status] = deque(rng.sample(ids, min(len(ids), TRANSITION_POOL_SIZE)))
+        self.pending, self.completed = pools["PENDING"], pools["COMPLETED"]
+        self.tokens: Dict[str, str] = {}
+
+    async def login(self, client):
+        for _, username, role in BENCH_USERS:
+            response = await client.post("/users/token", data={"username": username, "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            self.tokens[role.name] = response.json()["access_token"]
+
+    def headers(self, role: str) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[role]}"}
+
+    def build(self, operation: str, rng: random.Random) -> Optional[dict]:
+        """Argumentos de `client.request` para la operación, o None si no hay ids disponibles."""
+        method, path = OPERATIONS[operation]
+        if operation == "login":
+            _, username, _ = rng.choice(BENCH_USERS)
+            return {"method": method, "url": path, "data": {"username": username, "password": BENCH_PASSWORD}}
+        if operation == "list":
+            params = rng.choice([
+                {"status": rng.choice(list(STATUS_WEIGHTS)).value},
+                {"course_id": rng.randint(1, COURSES)},
+                {},
+            ])
+            return {"method": method, "url": path, "params": dict(params, limit=20), "headers": self.headers("ADMIN")}
+        if operation == "detail":
+            url = path.format(enrollment_id=rng.randint(1, self.max_enrollment_id))
+            return {"method": method, "url": url, "headers": self.headers("ADMIN")}
+        if operation == "by_person":
+            url = path.format(person_id=rng.randint(1, self.max_person_id))
+            return {"method": method, "url": url, "headers": self.headers("ADMIN")}
+        if operation == "stats":
+            return {"method": method, "url": path, "headers": self.headers("ADMIN")}
+        if operation == "report":
+            params = {"days_until_expiration": rng.choice([7, 30, 90]), "limit": 100}
+            return {"method": method, "url": path, "params": params, "headers": self.headers("INSPECTOR")}
+        pool, role = (self.pending, "INSPECTOR") if operation == "complete" else (self.completed, "JUDGE")
+        if not pool:
+            return None
+        enrollment_id = pool.popleft()
+        return {"method": method, "url": path.format(enrollment_id=enrollment_id), "headers": self.headers(role), "enrollment_id": enrollment_id}
+
+    def after(self, operation: str, request: dict, status_code: int):
+        if operation == "complete" and status_code == 200:
+            self.completed.append(request["enrollment_id"])
+
+
+async def run_load(client, workload: Workload, mix: Dict[str, float], concurrency: int, duration: float, warmup: float, seed: int) -> dict:
+    operations, weights = list(mix), list(mix.values())
+    latencies = {operation: [] for operation in operations}
+    errors = {operation: 0 for operation in operations}
+    skipped = {operation: 0 for operation in operations}
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+
+    async def worker(index: int):
+        rng = random.Random(seed * 100_003 + index)
+        while time.perf_counter() < deadline:
+            operation = rng.choices(operations, weights)[0]
+            request = workload.build(operation, rng)
+            if request is None:
+                skipped[operation] += 1
+                await asyncio.sleep(0)
+                continue
+            enrollment_id = request.pop("enrollment_id", None)
+            start = time.perf_counter()
+            try:
+                response = await client.request(**request)
+                status_code = response.status_code
+            except Exception:
+                status_code = None
+            elapsed = time.perf_counter() - start
+            workload.after(operation, {"enrollment_id": enrollment_id}, status_code)
+            if start < measure_from:
+                continue
+            if status_code == 200:
+                latencies[operation].append(elapsed)
+            else:
+                errors[operation] += 1
+
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - measure_from
+    endpoints = {}
+    for operation in operations:
+        method, path = OPERATIONS[operation]
+        endpoints[operation] = dict(method=method, path=path, **summarize(latencies[operation], errors[operation], elapsed), skipped=skipped[operation])
+    total = summarize([value for values in latencies.values() for value in values], sum(errors.values()), elapsed)
+    return {"endpoints": endpoints, "total": total, "measured_seconds": round(elapsed, 3)}
+
+
+async def run_inprocess(database_path: str, args, mix: Dict[str, float]) -> dict:
+    import httpx
+
+    # La URL de la base se lee al importar app.config.database
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    from app.config.database import dispose_async_engine, engine
+    from app.main import app
+
+    workload = Workload(database_path, args.seed)
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            await workload.login(client)
+            return await run_load(client, workload, mix, args.concurrency, args.duration, args.warmup, args.seed)
+    finally:
+        await dispose_async_engine()
+        engine.dispose()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_server(port: int, server: subprocess.Popen, timeout: float = 60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn terminó antes de aceptar conexiones")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("El servidor de benchmark no arrancó")
+
+
+async def run_uvicorn(database_path: str, args, mix: Dict[str, float]) -> dict:
+    import httpx
+
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database_path}", PYTHONPATH=ROOT)
+    env.pop("ASYNC_DATABASE_URL", None)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(args.workers), "--log-level", "warning"],
+        env=env,
+        cwd=ROOT,
+    )
+    try:
+        _wait_for_server(port, server)
+        workload = Workload(database_path, args.seed)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+            await workload.login(client)
+            return await run_load(client, workload, mix, args.concurrency, args.duration, args.warmup, args.seed)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def git_revision() -> dict:
+    def git(*command):
+        result = subprocess.run(["git", *command], cwd=ROOT, capture_output=True, text=True)
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def print_comparison(baseline: dict, current: dict):
+    """Tabla de diferencias de throughput y p95/p99 por operación respecto de otro resultado."""
+    def change(old, new):
+        return f"{(new - old) / old:+.1%}" if old and new is not None else "-"
+
+    print(f"{'operation':<12}{'rps':>10}{'Δ rps':>9}{'p95 ms':>10}{'Δ p95':>9}{'p99 ms':>10}{'Δ p99':>9}", file=sys.stderr)
+    rows = dict(current["endpoints"], total=current["total"])
+    old_rows = dict(baseline["endpoints"], total=baseline["total"])
+    for name, row in rows.items():
+        old = old_rows.get(name, {})
+        print(
+            f"{name:<12}{row['throughput_rps']:>10.1f}{change(old.get('throughput_rps'), row['throughput_rps']):>9}"
+            f"{row['p95_ms'] or 0:>10.2f}{change(old.get('p95_ms'), row['p95_ms']):>9}"
+            f"{row['p99_ms'] or 0:>10.2f}{change(old.get('p99_ms'), row['p99_ms']):>9}",
+            file=sys.stderr,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--persons", type=int, default=1_000_000)
+    parser.add_argument("--enrollments", type=int, default=5_000_000)
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de los datos y de la secuencia de requests")
+    parser.add_argument("--today", type=date.fromisoformat, default=date.today(), help="Fecha de referencia de los datos")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Pesos por operación, p. ej. 'list=50,detail=50'")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30, help="Segundos medidos")
+    parser.add_argument("--warmup", type=float, default=5, help="Segundos de carga previos que no se miden")
+    parser.add_argument("--workers", type=int, default=1, help="Workers de uvicorn (--mode uvicorn)")
+    parser.add_argument("--output", help="Archivo donde escribir el JSON (por defecto, salida estándar)")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior con el que comparar")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    progress = lambda message: print(message, file=sys.stderr, flush=True)
+    template = ensure_dataset(args.persons, args.enrollments, args.seed, args.today, progress)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Las transiciones modifican la base: cada ejecución parte de una copia idéntica
+        database_path = os.path.join(directory, "bench.db")
+        shutil.copyfile(template, database_path)
+        progress(f"carga: {args.mode}, {args.concurrency} clientes, {args.duration:.0f}s (+{args.warmup:.0f}s de calentamiento)")
+        runner = run_inprocess if args.mode == "inprocess" else run_uvicorn
+        measurements = asyncio.run(runner(database_path, args, mix))
+
+    result = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            **git_revision(),
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "uvicorn" else None,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "mix": mix,
+            "seed": args.seed,
+            "dataset": {"persons": args.persons, "enrollments": args.enrollments, "today": args.today.isoformat()},
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        **measurements,
+    }
+    document = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(document + "\n")
+    else:
+        print(document)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            print_comparison(json.load(file), result)
+
+
+if __name__ == "__main__":
+    main()
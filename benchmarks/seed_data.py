@@ -0,0 +1,224 @@
+"""
+Generador de datos sintéticos para los benchmarks de carga.
+
+Crea una base SQLite con el esquema de app.models y volúmenes realistas (por defecto 1M de
+personas y 5M de inscripciones). Los estados y las fechas siguen el ciclo de vida de
+CourseEnrollmentStatus respecto de una fecha de referencia:
+
+    pending     inscripción de los últimos 60 días, con el plazo (deadline) todavía vigente
+    incomplete  plazo vencido sin completar el curso
+    completed   curso completado por un inspector; el certificado vence al año y sigue vigente
+    used        certificado completado y usado ante un juez (vigente o no)
+    expired     certificado completado cuyo vencimiento ya pasó
+
+El resultado depende solo de los parámetros (tamaños, semilla y fecha de referencia), por lo que
+dos ejecuciones generan la misma base. `load_test.py` la genera una vez en benchmarks/.data y
+trabaja sobre una copia, porque las transiciones de estado la modifican.
+
+Usuarios creados (contraseña BENCH_PASSWORD): bench_admin, bench_inspector, bench_judge, y los
+usuarios inspector_<n> y judge_<n> a los que se atribuyen las inscripciones completadas y usadas.
+
+Uso:
+    python benchmarks/seed_data.py --persons 1000000 --enrollments 5000000 --output bench.db
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from typing import Iterable, Iterator, List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine
+from sqlmodel import SQLModel
+
+from app.models import CourseEnrollmentStatus, UserRole
+from app.security.security import get_password_hash
+
+CHUNK_SIZE = 50_000
+BENCH_PASSWORD = "benchmark"
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".data")
+
+# Proporción de inscripciones en cada estado
+STATUS_WEIGHTS = {
+    CourseEnrollmentStatus.PENDING: 0.20,
+    CourseEnrollmentStatus.COMPLETED: 0.30,
+    CourseEnrollmentStatus.USED: 0.25,
+    CourseEnrollmentStatus.EXPIRED: 0.15,
+    CourseEnrollmentStatus.INCOMPLETE: 0.10,
+}
+DEADLINE_DAYS = 60
+VALIDITY_DAYS = 365
+HISTORY_DAYS = 3 * 365
+COURSES = 12
+INSPECTORS = 50
+JUDGES = 30
+
+# id de usuario, username y rol de los usuarios con los que inicia sesión la prueba de carga
+BENCH_USERS = [(1, "bench_admin", UserRole.ADMIN), (2, "bench_inspector", UserRole.INSPECTOR), (3, "bench_judge", UserRole.JUDGE)]
+# Ids de los usuarios inspectores y jueces que figuran en inspector_id/judge_id de las inscripciones
+INSPECTOR_USER_IDS = range(len(BENCH_USERS) + 1, len(BENCH_USERS) + INSPECTORS + 1)
+JUDGE_USER_IDS = range(INSPECTOR_USER_IDS.stop, INSPECTOR_USER_IDS.stop + JUDGES)
+STAFF_USERS = (
+    [(user_id, f"inspector_{n}", UserRole.INSPECTOR) for n, user_id in enumerate(INSPECTOR_USER_IDS, start=1)]
+    + [(user_id, f"judge_{n}", UserRole.JUDGE) for n, user_id in enumerate(JUDGE_USER_IDS, start=1)]
+)
+
+
+def _chunks(rows: Iterable[tuple], size: int = CHUNK_SIZE) -> Iterator[List[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def dataset_path(persons: int, enrollments: int, seed: int, today: date) -> str:
+    """Ruta de la base generada para estos parámetros dentro de benchmarks/.data."""
+    return os.path.join(DATA_DIR, f"bench-p{persons}-e{enrollments}-s{seed}-{today.isoformat()}.db")
+
+
+def generate_enrollments(persons: int, enrollments: int, seed: int, today: date) -> Iterator[tuple]:
+    """
+    Filas (id, person_id, course_id, enrollment_date, completion_date, deadline_date,
+    expiration_date, status, inspector_id, judge_id) con las distribuciones del docstring del módulo.
+    """
+    rng = random.Random(seed)
+    # Fechas ISO precalculadas: formatear 5M de fechas costaría más que generarlas
+    first_day = today - timedelta(days=HISTORY_DAYS + DEADLINE_DAYS)
+    days = [(first_day + timedelta(days=offset)).isoformat() for offset in range(HISTORY_DAYS + DEADLINE_DAYS + VALIDITY_DAYS + 1)]
+    today_offset = (today - first_day).days
+
+    statuses = list(STATUS_WEIGHTS)
+    status_weights = list(STATUS_WEIGHTS.values())
+    # Unos pocos cursos concentran la mayoría de las inscripciones
+    course_weights = [1 / rank for rank in range(1, COURSES + 1)]
+    randint, random_choice, choices = rng.randint, rng.random, rng.choices
+
+    for enrollment_id, status in enumerate(choices(statuses, status_weights, k=enrollments), start=1):
+        person_id = randint(1, persons)
+        course_id = choices(range(1, COURSES + 1), course_weights)[0]
+        completion = inspector_id = judge_id = None
+        if status is CourseEnrollmentStatus.PENDING:
+            enrolled = today_offset - randint(0, DEADLINE_DAYS - 1)
+        elif status is CourseEnrollmentStatus.INCOMPLETE:
+            enrolled = today_offset - randint(DEADLINE_DAYS + 1, HISTORY_DAYS)
+        elif status is CourseEnrollmentStatus.COMPLETED:
+            enrolled = today_offset - randint(1, VALIDITY_DAYS - 1)
+        elif status is CourseEnrollmentStatus.EXPIRED:
+            enrolled = today_offset - randint(VALIDITY_DAYS + DEADLINE_DAYS + 1, HISTORY_DAYS)
+        else:
+            enrolled = today_offset - randint(1, HISTORY_DAYS)
+        deadline = enrolled + DEADLINE_DAYS
+        if status in (CourseEnrollmentStatus.PENDING, CourseEnrollmentStatus.INCOMPLETE):
+            expiration = deadline
+        else:
+            completion = min(enrolled + 1 + int(random_choice() * DEADLINE_DAYS), today_offset)
+            expiration = completion + VALIDITY_DAYS
+            inspector_id = randint(INSPECTOR_USER_IDS.start, INSPECTOR_USER_IDS.stop - 1)
+            if status is CourseEnrollmentStatus.USED:
+                judge_id = randint(JUDGE_USER_IDS.start, JUDGE_USER_IDS.stop - 1)
+        yield (
+            enrollment_id, person_id, course_id, days[enrolled], days[completion] if completion is not None else None,
+            days[deadline], days[expiration], status.name, inspector_id, judge_id,
+        )
+
+
+def seed_database(database_url: str, persons: int, enrollments: int, seed: int = 0, today: Optional[date] = None, progress=print):
+    """
+    Crea el esquema y carga los datos. Los índices secundarios se crean después de la carga,
+    que es varias veces más rápido que mantenerlos fila por fila.
+    """
+    import app.models  # noqa: F401  (registra las tablas)
+
+    today = today or date.today()
+    engine = create_engine(database_url)
+    SQLModel.metadata.create_all(engine)
+    indexes = [index for table in SQLModel.metadata.sorted_tables for index in table.indexes]
+    hashed_password = get_password_hash(BENCH_PASSWORD)
+    rng = random.Random(seed)
+    started = time.perf_counter()
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql("PRAGMA journal_mode=OFF")
+        connection.exec_driver_sql("PRAGMA synchronous=OFF")
+        for index in indexes:
+            connection.exec_driver_sql(f'DROP INDEX IF EXISTS "{index.name}"')
+
+        connection.exec_driver_sql(
+            'INSERT INTO "user" (id, username, dni, nombres, apellidos, is_active, role, hashed_password) VALUES (?, ?, ?, ?, ?, 1, ?, ?)',
+            [(user_id, username, str(10_000_000 + user_id), "Bench", username, role.value, hashed_password) for user_id, username, role in BENCH_USERS + STAFF_USERS],
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO trafficsafetycourse (id, name, description) VALUES (?, ?, ?)",
+            [(i, f"Curso {i}", f"Curso de seguridad vial {i}") for i in range(1, COURSES + 1)],
+        )
+        connection.exec_driver_sql("INSERT INTO inspector (id, name) VALUES (?, ?)", [(i, f"Inspector {i}") for i in range(1, INSPECTORS + 1)])
+        connection.exec_driver_sql("INSERT INTO judge (id, name) VALUES (?, ?)", [(i, f"Juez {i}") for i in range(1, JUDGES + 1)])
+
+        # DNI únicos pero no correlativos, como en un padrón real
+        dnis = rng.sample(range(20_000_000, 20_000_000 + persons * 4), persons)
+        for chunk in _chunks((i, f"Persona {i}", str(dni)) for i, dni in enumerate(dnis, start=1)):
+            connection.exec_driver_sql("INSERT INTO person (id, name, dni) VALUES (?, ?, ?)", chunk)
+        progress(f"personas: {persons:,} ({time.perf_counter() - started:.1f}s)")
+
+        inserted = 0
+        for chunk in _chunks(generate_enrollments(persons, enrollments, seed, today)):
+            connection.exec_driver_sql(
+                "INSERT INTO courseenrollment (id, person_id, course_id, enrollment_date, completion_date, deadline_date, "
+                "expiration_date, status, inspector_id, judge_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                chunk,
+            )
+            inserted += len(chunk)
+            if inserted % (CHUNK_SIZE * 20) == 0:
+                progress(f"inscripciones: {inserted:,} ({time.perf_counter() - started:.1f}s)")
+
+        connection.exec_driver_sql(
+            "INSERT INTO enrollmentcounter (course_id, status, count) "
+            "SELECT course_id, status, COUNT(*) FROM courseenrollment GROUP BY course_id, status"
+        )
+        for index in indexes:
+            index.create(connection)
+        connection.exec_driver_sql("ANALYZE")
+    engine.dispose()
+    progress(f"base generada: {persons:,} personas, {enrollments:,} inscripciones ({time.perf_counter() - started:.1f}s)")
+
+
+def ensure_dataset(persons: int, enrollments: int, seed: int = 0, today: Optional[date] = None, progress=print) -> str:
+    """Devuelve la base generada para estos parámetros, creándola si todavía no existe."""
+    today = today or date.today()
+    path = dataset_path(persons, enrollments, seed, today)
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        temporary = f"{path}.tmp"
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        seed_database(f"sqlite:///{temporary}", persons, enrollments, seed, today, progress)
+        os.replace(temporary, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--persons", type=int, default=1_000_000)
+    parser.add_argument("--enrollments", type=int, default=5_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--today", type=date.fromisoformat, default=date.today(), help="Fecha de referencia (AAAA-MM-DD)")
+    parser.add_argument("--output", help="Archivo .db a generar (por defecto, dentro de benchmarks/.data)")
+    args = parser.parse_args()
+
+    if args.output:
+        if os.path.exists(args.output):
+            parser.error(f"{args.output} ya existe")
+        seed_database(f"sqlite:///{args.output}", args.persons, args.enrollments, args.seed, args.today)
+    else:
+        print(ensure_dataset(args.persons, args.enrollments, args.seed, args.today))
+
+
+if __name__ == "__main__":
+    main()
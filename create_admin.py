@@ -10,12 +10,8 @@ from app.config.database import create_db_and_tables, engine, get_session
 
 # Importa User y UserRole desde el paquete 'app.models'
 from app.models import User, UserRole
-# Importa CryptContext para el hashing de contraseñas
-from passlib.context import CryptContext
-
-# Configuración del contexto de contraseñas
-# DEBE USAR pbkdf2_sha256
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Hashing de contraseñas de la aplicación (pbkdf2_sha256 con PBKDF2_ROUNDS iteraciones)
+from app.security.security import get_password_hash
 
 
 def create_admin_user():
@@ -37,7 +33,7 @@ def create_admin_user():
             print("El usuario 'admin' no existe. Procediendo a crearlo...")
             try:
                 # Hashear la contraseña del admin con el nuevo algoritmo.
-                hashed_password = pwd_context.hash("adminpassword123")
+                hashed_password = get_password_hash("adminpassword123")
 
                 admin_user = User(
                     username="admin",
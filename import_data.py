@@ -0,0 +1,80 @@
+"""
+Importación masiva de personas, cursos o inscripciones desde archivos CSV o JSONL.
+
+Los archivos se leen en streaming y se insertan en lotes transaccionales. El avance queda
+registrado en la base (tabla importcheckpoint): si la importación se interrumpe, volver a
+ejecutar el mismo comando continúa después del último lote confirmado.
+
+Columnas / claves esperadas:
+    persons:      name, dni                 (se rechazan los DNI que ya existen)
+    courses:      name, description
+    enrollments:  person_dni o person_id, course_name o course_id, deadline_date,
+                  expiration_date y opcionalmente enrollment_date, completion_date, status,
+                  inspector_id, judge_id
+
+Uso:
+    python import_data.py persons personas.csv
+    python import_data.py enrollments inscripciones.jsonl --batch-size 10000 --rejects rechazadas.jsonl
+    python import_data.py persons personas.csv --restart
+"""
+import argparse
+import os
+import sys
+import time
+
+# Asegúrate de que el path de la aplicación esté en sys.path para poder importar
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from app.config.database import create_db_and_tables, engine
+from app.models import ImportKind, ImportFileFormat
+from app.services import import_service
+
+
+def import_data():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", type=ImportKind, choices=list(ImportKind), help="Tipo de registros del archivo")
+    parser.add_argument("path", help="Archivo .csv o .jsonl")
+    parser.add_argument("--format", type=ImportFileFormat, choices=list(ImportFileFormat), help="Por defecto se deduce de la extensión")
+    parser.add_argument("--batch-size", type=int, default=import_service.IMPORT_BATCH_SIZE, help="Registros por transacción")
+    parser.add_argument("--restart", action="store_true", help="Ignora el checkpoint y empieza desde el primer registro")
+    parser.add_argument("--rejects", help="Archivo JSONL donde escribir los registros rechazados")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    started = time.perf_counter()
+    state = {"processed": None, "last_report": 0.0}
+
+    def report(checkpoint, processed, force=False):
+        state["processed"] = processed
+        now = time.perf_counter()
+        if not force and now - state["last_report"] < 1:
+            return
+        state["last_report"] = now
+        rate = processed / max(now - started, 1e-9)
+        print(f"{checkpoint.kind.value}: {checkpoint.rows_done} registros ({checkpoint.inserted} insertados, {checkpoint.failed} rechazados) - {rate:,.0f} registros/s", flush=True)
+
+    rejects = open(args.rejects, "a", encoding="utf-8") if args.rejects else None
+    try:
+        checkpoint = import_service.import_file(
+            engine,
+            args.kind,
+            args.path,
+            file_format=args.format,
+            batch_size=args.batch_size,
+            restart=args.restart,
+            rejects=rejects,
+            on_progress=report,
+        )
+    finally:
+        if rejects:
+            rejects.close()
+
+    if state["processed"] is None:
+        print(f"{args.path} ya fue importado ({checkpoint.inserted} insertados, {checkpoint.failed} rechazados). Use --restart para importarlo de nuevo.")
+        return
+    report(checkpoint, state["processed"], force=True)
+    print(f"Importación finalizada en {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == "__main__":
+    import_data()
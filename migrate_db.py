@@ -0,0 +1,34 @@
+import os
+import sys
+
+# Asegúrate de que el path de la aplicación esté en sys.path para poder importar
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from sqlmodel import Session
+
+from app.config.database import engine
+from app.config.migrations import upgrade_schema
+from app.services import enrollment_stats_service
+
+
+def migrate_db():
+    """
+    Actualiza el esquema de la base de datos configurada en DATABASE_URL:
+    tablas, columnas, claves foráneas e índices declarados en los modelos.
+    """
+    print(f"Actualizando el esquema de {engine.url.render_as_string(hide_password=True)}...")
+    actions = upgrade_schema(engine)
+    if not actions:
+        print("El esquema ya estaba actualizado.")
+    for action in actions:
+        print(f"- {action}")
+
+    # Bases con inscripciones creadas antes de la tabla de contadores
+    with Session(engine) as session:
+        if enrollment_stats_service.counters_missing(session):
+            enrollment_stats_service.rebuild_counters(session)
+            print("- calculados los contadores de inscripciones")
+
+
+if __name__ == "__main__":
+    migrate_db()
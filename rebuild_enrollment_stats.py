@@ -0,0 +1,28 @@
+import os
+import sys
+
+# Asegúrate de que el path de la aplicación esté en sys.path para poder importar
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from sqlmodel import Session
+
+from app.config.database import engine
+from app.services import enrollment_stats_service
+
+
+def rebuild_enrollment_stats():
+    """
+    Recalcula los contadores de inscripciones (GET /enrollments/stats) desde la tabla
+    courseenrollment y muestra las diferencias corregidas.
+    """
+    print(f"Recalculando los contadores de {engine.url.render_as_string(hide_password=True)}...")
+    with Session(engine) as session:
+        drift = enrollment_stats_service.rebuild_counters(session)
+    if not drift:
+        print("Los contadores ya coincidían con las inscripciones.")
+    for course_id, enrollment_status, stored, actual in drift:
+        print(f"- curso {course_id}, {enrollment_status.value}: {stored} -> {actual}")
+
+
+if __name__ == "__main__":
+    rebuild_enrollment_stats()
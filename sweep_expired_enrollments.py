@@ -0,0 +1,33 @@
+import argparse
+import os
+import sys
+from datetime import date
+
+# Asegúrate de que el path de la aplicación esté en sys.path para poder importar
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from app.config.database import engine
+from app.services import expiry_sweep_service
+
+
+def main():
+    """
+    Pasa a `incomplete` las inscripciones pending con el plazo vencido y a `expired` las
+    completed con el certificado vencido. Pensado para ejecutarse periódicamente (cron).
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--batch-size", type=int, default=expiry_sweep_service.EXPIRY_SWEEP_BATCH_SIZE, help="Inscripciones por transacción")
+    parser.add_argument("--pause", type=float, default=expiry_sweep_service.EXPIRY_SWEEP_PAUSE_SECONDS, help="Segundos de pausa entre lotes")
+    parser.add_argument("--today", type=date.fromisoformat, default=None, help="Fecha de referencia (AAAA-MM-DD)")
+    parser.add_argument("--full", action="store_true", help="Ignora la marca de agua y revisa todas las fechas pasadas")
+    args = parser.parse_args()
+
+    result = expiry_sweep_service.sweep_expired_enrollments(
+        engine, args.today, batch_size=args.batch_size, pause_seconds=args.pause, full=args.full
+    )
+    for rule in expiry_sweep_service.SWEEP_RULES:
+        print(f"{rule.from_status.value} -> {rule.to_status.value} ({rule.date_field}): {result[rule.name]}")
+
+
+if __name__ == "__main__":
+    main()